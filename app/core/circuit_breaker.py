@@ -0,0 +1,241 @@
+"""Circuit breakers for the OpenAI, MongoDB and Evolution dependencies.
+
+When a dependency degrades, every request would otherwise wait for its full
+timeout, tying up the app and piling latency on every message. Each
+dependency has a ``CircuitBreaker`` that keeps the outcome of its last
+``CIRCUIT_WINDOW_SIZE`` calls. A call fails if it raised or took longer than
+the dependency's ``CIRCUIT_SLOW_CALL_SECONDS``. Once at least
+``CIRCUIT_MIN_CALLS`` calls are recorded and the failure rate reaches
+``CIRCUIT_FAILURE_RATE``, the circuit opens and calls fail at once with
+``CircuitOpenError``. After ``CIRCUIT_RESET_TIMEOUT`` seconds it goes
+half-open and lets ``CIRCUIT_HALF_OPEN_CALLS`` probes through. A successful
+probe closes it; a failed one opens it again.
+
+Callers turn ``CircuitOpenError`` into a fallback: ``process_message``
+replies with ``CIRCUIT_OPEN_MESSAGE`` and Evolution calls return an error
+response that the outbound queue retries once the circuit may have recovered.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from enum import IntEnum
+
+import logfire
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+CIRCUIT_STATE = registry.gauge(
+    "sciencebot_circuit_state",
+    "Circuit breaker state per dependency (0 closed, 1 open, 2 half-open)",
+    labels=("dependency",),
+)
+CIRCUIT_TRANSITIONS = registry.counter(
+    "sciencebot_circuit_transitions_total",
+    "Circuit breaker state changes per dependency and new state",
+    labels=("dependency", "state"),
+)
+CIRCUIT_REJECTIONS = registry.counter(
+    "sciencebot_circuit_rejections_total",
+    "Calls failed fast because the circuit was open",
+    labels=("dependency",),
+)
+CIRCUIT_FALLBACKS = registry.counter(
+    "sciencebot_circuit_fallbacks_total",
+    "Messages answered with the fallback reply, by the open dependency",
+    labels=("dependency",),
+)
+
+
+class CircuitState(IntEnum):
+    """State of a circuit (the value is exported as the state gauge)."""
+
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+
+
+class CircuitOpenError(Exception):
+    """A call was rejected because the dependency's circuit is open."""
+
+    def __init__(self, dependency: str, retry_after: float) -> None:
+        super().__init__(f"{dependency} is unavailable (retry in {retry_after:.0f}s)")
+        self.dependency = dependency
+        self.retry_after = retry_after
+
+
+@dataclass
+class CallOutcome:
+    """Lets a guarded call report a failure that did not raise."""
+
+    failed: bool = False
+
+    def fail(self) -> None:
+        self.failed = True
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker of one dependency."""
+
+    def __init__(
+        self,
+        name: str,
+        enabled: bool,
+        window_size: int,
+        min_calls: int,
+        failure_rate: float,
+        slow_call_seconds: float,
+        reset_timeout: float,
+        half_open_calls: int,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self._outcomes: deque[bool] = deque(maxlen=window_size)  # True = failed
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state (an open circuit goes half-open after the timeout)."""
+        if (
+            self._state is CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are being rejected right now."""
+        return self.enabled and self.state is CircuitState.OPEN
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through."""
+        if self._state is not CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def _transition(self, state: CircuitState) -> None:
+        self._state = state
+        self._probes = 0
+        self._outcomes.clear()
+        if state is CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+
+        CIRCUIT_TRANSITIONS.inc(dependency=self.name, state=state.name.lower())
+        log = logfire.warn if state is CircuitState.OPEN else logfire.info
+        log("Circuit state changed", dependency=self.name, state=state.name.lower())
+
+    def _record(self, failed: bool, probe: bool) -> None:
+        if probe:
+            self._probes -= 1
+            if self._state is CircuitState.HALF_OPEN:
+                self._transition(CircuitState.OPEN if failed else CircuitState.CLOSED)
+            return
+
+        # Late outcomes of calls started before the circuit opened are ignored
+        if self._state is not CircuitState.CLOSED:
+            return
+
+        self._outcomes.append(failed)
+        failures = sum(self._outcomes)
+        if (
+            len(self._outcomes) >= self.min_calls
+            and failures / len(self._outcomes) >= self.failure_rate
+        ):
+            self._transition(CircuitState.OPEN)
+
+    def check(self) -> None:
+        """Fail fast if the circuit is open, without taking a probe slot.
+
+        Lets callers skip queueing (e.g. for a rate limiter lease) for a call
+        that ``guard()`` would reject anyway.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        if self.is_open:
+            CIRCUIT_REJECTIONS.inc(dependency=self.name)
+            raise CircuitOpenError(self.name, self.retry_after)
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[CallOutcome]:
+        """Run a call to the dependency through the circuit.
+
+        Exceptions raised in the block and calls slower than
+        ``slow_call_seconds`` count as failures. A cancelled call counts as
+        neither.
+
+        Yields:
+            Outcome the block can mark as failed without raising
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or half-open with every
+                probe slot taken)
+        """
+        outcome = CallOutcome()
+        if not self.enabled:
+            yield outcome
+            return
+
+        state = self.state
+        if state is CircuitState.OPEN or (
+            state is CircuitState.HALF_OPEN and self._probes >= self.half_open_calls
+        ):
+            CIRCUIT_REJECTIONS.inc(dependency=self.name)
+            raise CircuitOpenError(self.name, self.retry_after)
+
+        probe = state is CircuitState.HALF_OPEN
+        if probe:
+            self._probes += 1
+
+        start = time.perf_counter()
+        try:
+            yield outcome
+        except (asyncio.CancelledError, CircuitOpenError):
+            if probe:
+                self._probes -= 1
+            raise
+        except Exception:
+            self._record(failed=True, probe=probe)
+            raise
+
+        slow = time.perf_counter() - start >= self.slow_call_seconds
+        self._record(failed=outcome.failed or slow, probe=probe)
+
+    def collect_metrics(self) -> None:
+        CIRCUIT_STATE.set(self.state, dependency=self.name)
+
+
+def _create_breaker(name: str) -> CircuitBreaker:
+    breaker = CircuitBreaker(
+        name=name,
+        enabled=settings.CIRCUIT_BREAKER_ENABLED,
+        window_size=settings.CIRCUIT_WINDOW_SIZE,
+        min_calls=settings.CIRCUIT_MIN_CALLS,
+        failure_rate=settings.CIRCUIT_FAILURE_RATE,
+        slow_call_seconds=settings.CIRCUIT_SLOW_CALL_SECONDS[name],
+        reset_timeout=settings.CIRCUIT_RESET_TIMEOUT,
+        half_open_calls=settings.CIRCUIT_HALF_OPEN_CALLS,
+    )
+    registry.register_collector(breaker.collect_metrics)
+    return breaker
+
+
+# Global breakers, one per dependency
+openai_breaker = _create_breaker("openai")
+mongo_breaker = _create_breaker("mongo")
+evolution_breaker = _create_breaker("evolution")
@@ -1,6 +1,7 @@
 from enum import StrEnum
+from typing import Literal
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +11,11 @@ class Environment(StrEnum):
     PROD = "production"
 
 
+class ModelRateLimit(BaseModel):
+    requests_per_minute: int
+    tokens_per_minute: int
+
+
 class Settings(BaseSettings):
     APP_NAME: str = Field(default="ScienceBot WhatsApp API")
     APP_VERSION: str = Field(default="1.0.0")
@@ -19,6 +25,24 @@ class Settings(BaseSettings):
     EVOLUTION_API_URL: str = Field(default="http://localhost:8080")
     EVOLUTION_API_KEY: str = Field(default="mi_api_key_evolution")
 
+    PRESENCE_KEEPALIVE_INTERVAL: float = Field(
+        default=3, description="Seconds between 'composing' updates while answering"
+    )
+
+    # Outbound reply delivery
+    OUTBOUND_MAX_CONCURRENCY: int = Field(
+        default=8, description="Recipients served at once per Evolution instance"
+    )
+    OUTBOUND_MAX_RETRIES: int = Field(default=4)
+    OUTBOUND_RETRY_BASE_DELAY: float = Field(default=0.5, description="Seconds")
+    OUTBOUND_RETRY_MAX_DELAY: float = Field(default=10, description="Seconds")
+    OUTBOUND_MAX_MESSAGE_CHARS: int = Field(
+        default=3000, description="Longer replies are split into several messages"
+    )
+    OUTBOUND_DRAIN_TIMEOUT: float = Field(
+        default=10, description="Seconds to flush pending replies on shutdown"
+    )
+
     # Webhook Configuration
     WEBHOOK_EVENTS: list[str] = Field(
         default_factory=lambda: [
@@ -28,10 +52,65 @@ class Settings(BaseSettings):
         ],
         description="Events to listen to",
     )
+    DEDUP_ENABLED: bool = Field(
+        default=True, description="Drop re-delivered webhooks by message id"
+    )
+    DEDUP_BACKEND: Literal["memory", "mongo"] = Field(
+        default="memory",
+        description="'mongo' shares seen message ids between app instances",
+    )
+    DEDUP_TTL_SECONDS: float = Field(default=3600)
+    DEDUP_MAX_ENTRIES: int = Field(
+        default=100_000, description="Size bound of the in-memory store"
+    )
 
     # Bot Configuration
     BOT_NAME: str = Field(default="ScienceBot")
 
+    # Return search_documents answers directly instead of relaying them
+    # through a second chat pass (see app.scripts.benchmark_direct_return)
+    SEARCH_DIRECT_RETURN: bool = Field(default=False)
+
+    # Speculative retrieval: embed the message and pre-fetch pages of the
+    # user's known schools while the chat node runs
+    SPECULATIVE_RETRIEVAL_ENABLED: bool = Field(default=False)
+    SPECULATIVE_MIN_SIMILARITY: float = Field(
+        default=0.6,
+        description="Jaccard word similarity between the tool query and the message "
+        "to reuse",
+    )
+    SPECULATIVE_PAGES_FACTOR: int = Field(
+        default=4, description="Pages pre-fetched = PAGES_SEARCH_LIMIT * factor"
+    )
+
+    # User profiles (school, name, last activity) remembered per phone number
+    PROFILE_ENABLED: bool = Field(default=True)
+    PROFILE_BACKEND: Literal["memory", "mongo"] = Field(
+        default="memory",
+        description="'mongo' keeps profiles across restarts and app instances",
+    )
+    PROFILE_TTL_SECONDS: float = Field(
+        default=180 * 24 * 3600, description="Profiles of inactive users expire"
+    )
+    PROFILE_MAX_ENTRIES: int = Field(
+        default=100_000, description="Size bound of the in-memory store"
+    )
+
+    # Small talk fast path (templated replies without the LLM)
+    SMALL_TALK_ENABLED: bool = Field(default=True)
+    SMALL_TALK_LANGUAGES: list[str] = Field(
+        default_factory=lambda: ["es", "en"],
+        description="Languages whose small talk rules are enabled, in priority order",
+    )
+    SMALL_TALK_MAX_WORDS: int = Field(
+        default=5, description="Longer messages always go to the agent"
+    )
+    SMALL_TALK_RULES_FILE: str | None = Field(
+        default=None,
+        description="JSON file of small talk rules by language code, replacing "
+        "or adding to the built-in Spanish and English rules",
+    )
+
     # OpenAI Configuration
     OPENAI_API_KEY: str = Field(default="")
     OPENAI_MODEL: str = Field(default="gpt-4o-mini")
@@ -39,14 +118,236 @@ class Settings(BaseSettings):
     OPENAI_MAX_TOKENS: int = Field(default=1000)
     OPENAI_TEMPERATURE: float = Field(default=0)
 
+    # OpenAI rate limiting (shared by all call sites)
+    OPENAI_MAX_IN_FLIGHT: int = Field(default=16)
+    OPENAI_REQUESTS_PER_MINUTE: int = Field(default=500)
+    OPENAI_TOKENS_PER_MINUTE: int = Field(default=200_000)
+    OPENAI_MODEL_RATE_LIMITS: dict[str, ModelRateLimit] = Field(
+        default_factory=dict,
+        description="Per-model overrides of the requests/tokens per minute limits",
+    )
+
+    # Embedding micro-batching: queries of concurrent messages arriving within
+    # the window are sent as one request (see app.core.embedding_batcher)
+    EMBEDDING_BATCH_ENABLED: bool = Field(default=True)
+    EMBEDDING_BATCH_WINDOW: float = Field(
+        default=0.005, description="Seconds a query waits for others to join"
+    )
+    EMBEDDING_BATCH_MAX_SIZE: int = Field(
+        default=64, description="Queries per request (a full batch is sent at once)"
+    )
+
+    # Overload control (see app.core.overload): pressure 1.0 = a signal at its limit
+    OVERLOAD_ENABLED: bool = Field(default=True)
+    OVERLOAD_MAX_LLM_QUEUE: int = Field(
+        default=32, description="Callers waiting for an OpenAI lease"
+    )
+    OVERLOAD_MAX_ACTIVE_MESSAGES: int = Field(
+        default=64, description="Messages being answered at once"
+    )
+    OVERLOAD_LATENCY_TARGET: float = Field(
+        default=15, description="Seconds, p90 of the recently answered messages"
+    )
+    OVERLOAD_LATENCY_WINDOW: float = Field(
+        default=60, description="Seconds of latency samples considered"
+    )
+    OVERLOAD_MODE_THRESHOLDS: list[float] = Field(
+        default_factory=lambda: [1.0, 1.5, 2.0],
+        description="Pressure at which the reduced, cached first and shed modes start",
+    )
+    OVERLOAD_COOLDOWN_SECONDS: float = Field(
+        default=30, description="Calm time before recovering one mode"
+    )
+    OVERLOAD_MAX_PAGES: int = Field(
+        default=3, description="Pages per document search in degraded modes"
+    )
+    OVERLOAD_FAQ_SIMILARITY_THRESHOLD: float = Field(
+        default=0.88, description="FAQ threshold in the cached first mode"
+    )
+    OVERLOAD_BUSY_MESSAGE: str = Field(
+        default="Estoy recibiendo muchas consultas en este momento. "
+        "Por favor, intenta de nuevo en unos minutos."
+    )
+
+    # Circuit breakers of OpenAI, MongoDB and Evolution (see app.core.circuit_breaker)
+    CIRCUIT_BREAKER_ENABLED: bool = Field(default=True)
+    CIRCUIT_WINDOW_SIZE: int = Field(
+        default=20, description="Recent calls per dependency the failure rate uses"
+    )
+    CIRCUIT_MIN_CALLS: int = Field(
+        default=10, description="Calls in the window before the circuit can open"
+    )
+    CIRCUIT_FAILURE_RATE: float = Field(
+        default=0.5, description="Share of failed or slow calls that opens the circuit"
+    )
+    CIRCUIT_SLOW_CALL_SECONDS: dict[str, float] = Field(
+        default_factory=lambda: {"openai": 25.0, "mongo": 5.0, "evolution": 10.0},
+        description="Per-dependency latency above which a call counts as failed",
+    )
+    CIRCUIT_RESET_TIMEOUT: float = Field(
+        default=30, description="Seconds an open circuit waits before a probe"
+    )
+    CIRCUIT_HALF_OPEN_CALLS: int = Field(
+        default=1, description="Probe calls let through while half-open"
+    )
+    CIRCUIT_OPEN_MESSAGE: str = Field(
+        default="Estoy teniendo problemas para consultar la información en este "
+        "momento. Por favor, intenta de nuevo en unos minutos."
+    )
+
+    # End-to-end time budget of a message (see app.core.deadline)
+    DEADLINE_ENABLED: bool = Field(default=True)
+    MESSAGE_DEADLINE_SECONDS: float = Field(
+        default=30, description="Seconds from webhook arrival to the answer"
+    )
+    DEADLINE_FALLBACK_MIN_SECONDS: float = Field(
+        default=15, description="Time left needed to also search the second document"
+    )
+    DEADLINE_TIGHT_SECONDS: float = Field(
+        default=10, description="Time left below which pages and answer are reduced"
+    )
+    DEADLINE_MAX_PAGES: int = Field(
+        default=3, description="Pages per document search when time is tight"
+    )
+    DEADLINE_ANSWER_MAX_TOKENS: int = Field(
+        default=400, description="Answer completion cap when time is tight"
+    )
+    DEADLINE_MIN_STAGE_SECONDS: float = Field(
+        default=3, description="Time left needed to start a chat model call"
+    )
+    DEADLINE_EXCEEDED_MESSAGE: str = Field(
+        default="Tu consulta está tomando más tiempo de lo esperado. "
+        "Por favor, intenta de nuevo en unos minutos."
+    )
+
+    # Per-stage model and completion token cap (None = OPENAI_MODEL and
+    # OPENAI_MAX_TOKENS), and timeout
+    LLM_AGENT_MODEL: str | None = Field(default=None)
+    LLM_SELECTOR_MODEL: str | None = Field(default=None)
+    LLM_ANSWER_MODEL: str | None = Field(default=None)
+    LLM_AGENT_MAX_TOKENS: int | None = Field(default=None)
+    LLM_SELECTOR_MAX_TOKENS: int | None = Field(
+        default=100, description="The selector only returns document names"
+    )
+    LLM_ANSWER_MAX_TOKENS: int | None = Field(default=None)
+    LLM_AGENT_TIMEOUT: float = Field(default=30, description="Seconds")
+    LLM_SELECTOR_TIMEOUT: float = Field(default=15, description="Seconds")
+    LLM_ANSWER_TIMEOUT: float = Field(default=30, description="Seconds")
+
+    # Cheap-first cascade: try LLM_CASCADE_MODEL and escalate to the stage
+    # model only when the response fails its confidence check
+    LLM_CASCADE_ENABLED: bool = Field(default=False)
+    LLM_CASCADE_MODEL: str = Field(default="gpt-4.1-nano")
+    LLM_CASCADE_STAGES: list[Literal["selector", "answer"]] = Field(
+        default=["selector", "answer"],
+        description="Stages that try the cheap model first (only these two "
+        "stages call the cascade)",
+    )
+    LLM_CASCADE_MIN_CONFIDENCE: float = Field(
+        default=0.8,
+        description="Minimum geometric mean token probability to keep a cheap answer",
+    )
+
+    # LLM hedging
+    LLM_HEDGING_ENABLED: bool = Field(default=False)
+    LLM_HEDGED_STAGES: list[str] = Field(
+        default_factory=lambda: ["agent", "answer"],
+        description="Stages allowed to fire a duplicate request",
+    )
+    LLM_HEDGE_PERCENTILE: float = Field(
+        default=95, description="Latency percentile after which the hedge fires"
+    )
+    LLM_HEDGE_MIN_DELAY: float = Field(default=1.0)
+    LLM_HEDGE_MIN_SAMPLES: int = Field(
+        default=20, description="Samples needed before hedging a stage"
+    )
+
     # MongoDB Atlas Configuration
     MONGO_URL: str = Field(default="mongodb://localhost:27017")
     MONGO_DATABASE: str = Field(default="ScienceBot")
     MONGO_DOCUMENTS_COLLECTION: str = Field(default="Documents")
     MONGO_PAGES_COLLECTION: str = Field(default="ScienceBot")
+    MONGO_FAQ_COLLECTION: str = Field(default="FAQ")
+    MONGO_DEDUP_COLLECTION: str = Field(default="WebhookDedup")
+    MONGO_PROFILES_COLLECTION: str = Field(default="UserProfiles")
+    CATALOG_TTL_SECONDS: float = Field(
+        default=300,
+        description="Seconds the in-memory documents catalog is reused (0 disables it)",
+    )
+
+    # Vector search tuning (see app.scripts.benchmark_vector_search)
+    PAGES_SEARCH_INDEX: str = Field(default="default")
+    PAGES_SEARCH_LIMIT: int = Field(
+        default=5, description="Pages returned per document search"
+    )
+    PAGES_SEARCH_CANDIDATES_FACTOR: int = Field(
+        default=10, description="numCandidates = limit * factor for page search"
+    )
+
+    # Token budget of the page content sent to the answer generator; pages
+    # are sent whole or as their ingest-time summary to fit (0 = no limit)
+    ANSWER_CONTEXT_TOKEN_BUDGET: int = Field(default=6000)
+    PAGE_SUMMARY_MAX_TOKENS: int = Field(
+        default=150, description="Size of the summaries written at ingest time"
+    )
+
+    # Id-first page retrieval: $vectorSearch returns ids and scores only and
+    # the texts come from an in-process cache (misses fetched in one query)
+    PAGES_ID_FIRST: bool = Field(default=True)
+    PAGE_CACHE_MAX_BYTES: int = Field(
+        default=64 * 1024 * 1024, description="Total UTF-8 size of cached page texts"
+    )
+    PAGE_CACHE_TTL_SECONDS: float = Field(
+        default=3600, description="Re-ingested pages are picked up after this"
+    )
+
+    # FAQ fast path (precomputed answers served without the LLM)
+    FAQ_ENABLED: bool = Field(default=True)
+    FAQ_SEARCH_INDEX: str = Field(default="faq_index")
+    FAQ_SEARCH_CANDIDATES_FACTOR: int = Field(
+        default=20, description="numCandidates = limit * factor for FAQ search"
+    )
+    FAQ_SIMILARITY_THRESHOLD: float = Field(
+        default=0.93,
+        description="Minimum vectorSearchScore to serve a stored FAQ answer",
+    )
+
+    # Startup warm-up (see app.warmup)
+    WARMUP_ENABLED: bool = Field(
+        default=True,
+        description="Open Mongo/OpenAI/Evolution connections and load the catalog "
+        "before reporting ready",
+    )
+    WARMUP_STEP_TIMEOUT: float = Field(default=20, description="Seconds per step")
+
+    # Request ledger (per-message token and latency accounting)
+    LEDGER_ENABLED: bool = Field(default=True)
+    LEDGER_DB_PATH: str = Field(default="ledger.sqlite3")
+    LEDGER_FLUSH_SIZE: int = Field(default=50)
+    LEDGER_FLUSH_INTERVAL: float = Field(default=30, description="Seconds")
+
+    # Event loop stall watchdog (see app.core.loop_watchdog)
+    LOOP_WATCHDOG_ENABLED: bool = Field(default=True)
+    LOOP_WATCHDOG_INTERVAL: float = Field(
+        default=0.05, description="Seconds between heartbeats"
+    )
+    LOOP_STALL_THRESHOLD: float = Field(
+        default=0.1, description="Heartbeat delay (seconds) reported as a stall"
+    )
+
+    # Event loop profiler (see app.core.profiler and the /admin routes)
+    PROFILER_INTERVAL: float = Field(
+        default=0.005, description="Seconds between samples"
+    )
+    PROFILER_MAX_SECONDS: float = Field(
+        default=120, description="Longest profile or wait for a message to profile"
+    )
 
     # Security
     LOGFIRE_TOKEN: str | None = Field(default=None)
+    ADMIN_TOKEN: str | None = Field(
+        default=None, description="Bearer token of the /admin routes (unset = disabled)"
+    )
 
     model_config = {
         "env_file": ".env",
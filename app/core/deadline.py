@@ -0,0 +1,79 @@
+"""End-to-end time budget of a message.
+
+The webhook starts a ``Deadline`` of ``MESSAGE_DEADLINE_SECONDS`` when a
+message arrives. It travels with the graph config (``Context.deadline``) to
+the chat node and the ``search_documents`` tool, so each stage sizes its work
+to the time left:
+
+- below ``DEADLINE_FALLBACK_MIN_SECONDS`` only the best document is searched
+  (no second document as fallback),
+- below ``DEADLINE_TIGHT_SECONDS`` fewer pages are retrieved
+  (``DEADLINE_MAX_PAGES``) and the answer is capped at
+  ``DEADLINE_ANSWER_MAX_TOKENS``,
+- a chat model call is not started with less than
+  ``DEADLINE_MIN_STAGE_SECONDS`` left, and its timeout never outlasts the
+  deadline.
+
+When a stage cannot run, ``DeadlineExceeded`` ends the run and the user gets
+``DEADLINE_EXCEEDED_MESSAGE`` instead of waiting even longer.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import logfire
+
+from app.core.metrics import registry
+
+DEADLINE_ACTIONS = registry.counter(
+    "sciencebot_deadline_actions_total",
+    "Work skipped, reduced or aborted to meet the message deadline",
+    labels=("stage", "action"),
+)
+
+
+class DeadlineExceeded(Exception):
+    """Not enough time is left in the message budget to run a stage."""
+
+    def __init__(self, stage: str, remaining: float) -> None:
+        super().__init__(f"Not enough time left for {stage} ({remaining:.1f}s)")
+        self.stage = stage
+        self.remaining = remaining
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Point in time (``time.monotonic``) by which a message must be answered."""
+
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> Deadline:
+        """Deadline ``seconds`` from now."""
+        return cls(expires_at=time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        """Seconds left, 0 once the deadline has passed."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def require(self, stage: str, seconds: float) -> None:
+        """Check that a stage needing ``seconds`` can still run.
+
+        Args:
+            stage: Stage about to run
+            seconds: Minimum time the stage needs
+
+        Raises:
+            DeadlineExceeded: If less time than that is left
+        """
+        remaining = self.remaining()
+        if remaining < seconds:
+            DEADLINE_ACTIONS.inc(stage=stage, action="abort")
+            logfire.warn(
+                "Stage aborted by the message deadline",
+                stage=stage,
+                remaining=round(remaining, 3),
+            )
+            raise DeadlineExceeded(stage, remaining)
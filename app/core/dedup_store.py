@@ -0,0 +1,116 @@
+"""Deduplication of re-delivered webhooks by message id.
+
+Evolution re-delivers a webhook when the previous delivery times out, which
+is common because the request stays open during the LLM run. Each message id
+is claimed once; re-deliveries of in-flight or already processed messages are
+acknowledged and dropped without doing any work.
+
+Two backends are available: a bounded in-memory TTL store (default, per
+process) and a MongoDB collection with a TTL index, shared by all instances.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any, Protocol
+
+from pymongo.errors import DuplicateKeyError
+
+from app.core.circuit_breaker import mongo_breaker
+from app.core.config import settings
+from app.core.metrics import registry
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection
+
+WEBHOOK_DUPLICATES = registry.counter(
+    "sciencebot_webhook_duplicates_total", "Re-delivered webhooks that were dropped"
+)
+
+
+class DedupStore(Protocol):
+    """Store of claimed message ids."""
+
+    async def claim(self, key: str) -> bool:
+        """Claim a key, returning False if it was already claimed."""
+        ...
+
+    async def release(self, key: str) -> None:
+        """Forget a key so that a re-delivery is processed again."""
+        ...
+
+
+class MemoryDedupStore:
+    """Bounded in-memory TTL store (oldest entries are evicted first)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._expires_at: OrderedDict[str, float] = OrderedDict()
+
+    async def claim(self, key: str) -> bool:
+        now = time.monotonic()
+
+        # Entries are kept in insertion order, so expired ones are at the front
+        while self._expires_at:
+            oldest_key, expires_at = next(iter(self._expires_at.items()))
+            if expires_at > now and len(self._expires_at) < self.max_entries:
+                break
+            del self._expires_at[oldest_key]
+
+        if key in self._expires_at:
+            return False
+
+        self._expires_at[key] = now + self.ttl_seconds
+        return True
+
+    async def release(self, key: str) -> None:
+        self._expires_at.pop(key, None)
+
+
+class MongoDedupStore:
+    """Store shared by every app instance, backed by a MongoDB TTL collection."""
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+
+    async def _get_collection(self) -> AsyncIOMotorCollection[dict[str, Any]]:
+        # Imported here: the shared service pulls in the OpenAI client
+        from app.core.mongo_db import get_mongo_service
+
+        return await get_mongo_service().get_ttl_collection(
+            settings.MONGO_DEDUP_COLLECTION, "created_at", self.ttl_seconds
+        )
+
+    async def claim(self, key: str) -> bool:
+        async with mongo_breaker.guard():
+            collection = await self._get_collection()
+            try:
+                await collection.insert_one(
+                    {"_id": key, "created_at": datetime.now(UTC)}
+                )
+            except DuplicateKeyError:
+                # A re-delivery, not a failure of MongoDB
+                return False
+        return True
+
+    async def release(self, key: str) -> None:
+        async with mongo_breaker.guard():
+            collection = await self._get_collection()
+            await collection.delete_one({"_id": key})
+
+
+def create_dedup_store() -> DedupStore:
+    """Create the dedup store selected by ``DEDUP_BACKEND``."""
+    if settings.DEDUP_BACKEND == "mongo":
+        return MongoDedupStore(ttl_seconds=settings.DEDUP_TTL_SECONDS)
+    return MemoryDedupStore(
+        ttl_seconds=settings.DEDUP_TTL_SECONDS,
+        max_entries=settings.DEDUP_MAX_ENTRIES,
+    )
+
+
+# Global webhook dedup store
+webhook_dedup = create_dedup_store()
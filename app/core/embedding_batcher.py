@@ -0,0 +1,120 @@
+"""Micro-batching of query embeddings across concurrent messages.
+
+Every question needs one query embedding, and under load many of them arrive
+within a few milliseconds of each other. Sent one by one, each takes an
+OpenAI request and a limiter lease. ``EmbeddingBatcher`` holds a query for
+up to ``EMBEDDING_BATCH_WINDOW`` seconds. It sends all the queries collected
+in that window as a single ``embed_documents`` call, then resolves each caller
+with its own vector. A full batch (``EMBEDDING_BATCH_MAX_SIZE``) goes out
+right away, and identical queries in a batch are embedded once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from collections.abc import Awaitable, Callable
+
+import logfire
+
+from app.core.circuit_breaker import openai_breaker
+from app.core.metrics import EMBEDDING_REQUESTS, registry
+from app.core.rate_limiter import OpenAIRateLimiter, estimate_tokens, openai_limiter
+
+EMBEDDING_BATCH_SIZE = registry.histogram(
+    "sciencebot_embedding_batch_size",
+    "Queries sent per embedding request",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+EmbedDocuments = Callable[[list[str]], Awaitable[list[list[float]]]]
+
+
+class EmbeddingBatcher:
+    """Collects concurrent embedding queries and sends them in batches."""
+
+    def __init__(
+        self,
+        embed_documents: EmbedDocuments,
+        model: str,
+        window: float,
+        max_batch_size: int,
+        limiter: OpenAIRateLimiter = openai_limiter,
+    ) -> None:
+        self.embed_documents = embed_documents
+        self.model = model
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.limiter = limiter
+        self._pending: list[tuple[str, asyncio.Future[list[float]]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        # Strong references to the batches being sent
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        """Embed a query along with the others arriving in the same window.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector of the text
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[list[float]] = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # Skip callers that were cancelled while waiting
+        batch = [(text, future) for text, future in self._pending if not future.done()]
+        self._pending = []
+        if not batch:
+            return
+
+        # Run outside the context of the caller that happened to fill the
+        # batch so its span and ledger entry do not own the shared request
+        task = asyncio.create_task(self._send(batch), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list[tuple[str, asyncio.Future[list[float]]]]) -> None:
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        EMBEDDING_BATCH_SIZE.observe(len(batch))
+
+        try:
+            with logfire.span("embed_batch", queries=len(batch), texts=len(texts)):
+                # Lease first: only the request is seen by the breaker
+                openai_breaker.check()
+                async with (
+                    self.limiter.limit(
+                        model=self.model, tokens=estimate_tokens(*texts)
+                    ),
+                    openai_breaker.guard(),
+                ):
+                    vectors = await self.embed_documents(texts)
+            EMBEDDING_REQUESTS.inc(model=self.model)
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(texts, vectors, strict=True))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
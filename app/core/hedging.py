@@ -0,0 +1,163 @@
+"""Strict timeouts and hedged requests for slow, idempotent calls.
+
+A hedged call starts one attempt and, if it has not finished after the recent
+p95 latency of its stage and model, fires a duplicate attempt. Whichever attempt
+returns first wins and the other one is cancelled, which cuts tail latency
+without blanket retries. The caller can veto the duplicate when it is fired
+(e.g. when the rate limiter has no spare capacity for it).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import logfire
+
+
+@dataclass
+class HedgeStats:
+    """Counters of a stage exposed for monitoring."""
+
+    calls: int = 0
+    hedges_fired: int = 0
+    hedges_won: int = 0
+    hedges_skipped: int = 0
+    timeouts: int = 0
+
+
+class LatencyTracker:
+    """Rolling window of recent successful latencies per key (stage and model)."""
+
+    def __init__(self, window: int = 200) -> None:
+        self.window = window
+        self._samples: dict[str, deque[float]] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        """Add a latency sample for a key."""
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key: str, q: float, min_samples: int) -> float | None:
+        """Latency percentile (0-100) of a key, or None if there are too few samples."""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < max(min_samples, 2):
+            return None
+        return statistics.quantiles(samples, n=100, method="inclusive")[int(q) - 1]
+
+
+class Hedger:
+    """Runs calls with a timeout and an optional p95-based hedge."""
+
+    def __init__(self, percentile: float, min_delay: float, min_samples: int) -> None:
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker()
+        self.stats: dict[str, HedgeStats] = {}
+
+    @staticmethod
+    def latency_key(stage: str, model: str | None = None) -> str:
+        """Key of the latencies of a stage, kept apart per model."""
+        return stage if model is None else f"{stage}:{model}"
+
+    def hedge_delay(self, stage: str, model: str | None = None) -> float | None:
+        """Seconds to wait before firing the hedge, or None if not enough data."""
+        latency = self.latencies.percentile(
+            self.latency_key(stage, model), self.percentile, self.min_samples
+        )
+        return None if latency is None else max(latency, self.min_delay)
+
+    async def call[T](
+        self,
+        stage: str,
+        attempt: Callable[[], Awaitable[T]],
+        timeout: float,
+        hedge: bool = False,
+        can_hedge: Callable[[], bool] | None = None,
+        model: str | None = None,
+    ) -> T:
+        """Run ``attempt`` within ``timeout`` seconds, hedging it if enabled.
+
+        Args:
+            stage: Name of the stage (used for latency tracking and counters)
+            attempt: Factory that starts one attempt of the call
+            timeout: Maximum seconds for the whole call, hedge included
+            hedge: Whether a duplicate attempt may be fired
+            can_hedge: Checked when the hedge is due; the primary attempt is
+                awaited alone if it returns False
+            model: Model called, so that a cheap model's latencies do not set
+                the hedge delay of an expensive one
+
+        Returns:
+            Result of the first attempt that succeeds
+
+        Raises:
+            TimeoutError: If no attempt finishes within the timeout
+        """
+        stats = self.stats.setdefault(stage, HedgeStats())
+        stats.calls += 1
+        latency_key = self.latency_key(stage, model)
+
+        async def timed_attempt() -> T:
+            start = time.monotonic()
+            result = await attempt()
+            self.latencies.record(latency_key, time.monotonic() - start)
+            return result
+
+        delay = self.hedge_delay(stage, model) if hedge else None
+        try:
+            async with asyncio.timeout(timeout):
+                if delay is None:
+                    return await timed_attempt()
+                return await self._hedged(stage, timed_attempt, delay, stats, can_hedge)
+        except TimeoutError:
+            stats.timeouts += 1
+            logfire.warn("LLM call timed out", stage=stage, timeout=timeout)
+            raise
+
+    async def _hedged[T](
+        self,
+        stage: str,
+        attempt: Callable[[], Awaitable[T]],
+        delay: float,
+        stats: HedgeStats,
+        can_hedge: Callable[[], bool] | None,
+    ) -> T:
+        primary = asyncio.ensure_future(attempt())
+        pending: set[asyncio.Future[T]] = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            if can_hedge is not None and not can_hedge():
+                stats.hedges_skipped += 1
+                logfire.info("Hedge skipped", stage=stage, delay=round(delay, 3))
+                return await primary
+
+            stats.hedges_fired += 1
+            logfire.info("Hedge fired", stage=stage, delay=round(delay, 3))
+            pending.add(asyncio.ensure_future(attempt()))
+
+            errors: list[BaseException] = []
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for future in done:
+                    error = future.exception()
+                    if error is None:
+                        if future is not primary:
+                            stats.hedges_won += 1
+                        return future.result()
+                    errors.append(error)
+
+            # Both attempts failed
+            raise errors[-1]
+        finally:
+            for future in pending:
+                future.cancel()
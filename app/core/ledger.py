@@ -0,0 +1,190 @@
+"""Per-request token and latency ledger.
+
+Each ``process_message`` run opens a ledger entry that the pipeline fills as
+it goes (LLM calls with their token usage, embedding calls, retrieval time,
+document used). Finished entries are buffered in memory and flushed in
+batches to a local SQLite database, which ``app.scripts.ledger_report``
+queries to find the most expensive users/schools and the slowest requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import logfire
+
+from app.core.config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS requests (
+    request_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    school TEXT,
+    document_used TEXT,
+    created_at REAL NOT NULL,
+    total_ms REAL NOT NULL,
+    retrieval_ms REAL NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    llm_calls INTEGER NOT NULL,
+    embedding_calls INTEGER NOT NULL,
+    faq_hit INTEGER NOT NULL,
+    success INTEGER NOT NULL,
+    calls_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS requests_created_at ON requests (created_at);
+"""
+
+
+@dataclass
+class LLMCallRecord:
+    """One chat model call made while answering a message."""
+
+    stage: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    duration_ms: float
+
+
+@dataclass
+class LedgerEntry:
+    """Cost and latency of one processed message."""
+
+    user_id: str
+    request_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    created_at: float = field(default_factory=time.time)
+    school: str | None = None
+    document_used: str | None = None
+    llm_calls: list[LLMCallRecord] = field(default_factory=list)
+    embedding_calls: int = 0
+    retrieval_ms: float = 0.0
+    total_ms: float = 0.0
+    faq_hit: bool = False
+    success: bool = True
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(call.prompt_tokens for call in self.llm_calls)
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(call.completion_tokens for call in self.llm_calls)
+
+
+_current_entry: ContextVar[LedgerEntry | None] = ContextVar(
+    "ledger_entry", default=None
+)
+
+
+def current_entry() -> LedgerEntry | None:
+    """Ledger entry of the message being processed, if any."""
+    return _current_entry.get()
+
+
+class RequestLedger:
+    """Buffers ledger entries and writes them to SQLite in batches."""
+
+    def __init__(self, path: Path, flush_size: int, flush_interval: float) -> None:
+        self.path = path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer: list[LedgerEntry] = []
+        self._flush_task: asyncio.Task[None] | None = None
+
+    @contextmanager
+    def track(self, user_id: str, record: bool = True) -> Iterator[LedgerEntry]:
+        """Open a ledger entry for the duration of a message run.
+
+        Args:
+            user_id: User the message belongs to
+            record: Whether to store the entry (benchmarks only read it)
+        """
+        entry = LedgerEntry(user_id=user_id)
+        token = _current_entry.set(entry)
+        start = time.perf_counter()
+        try:
+            yield entry
+        except BaseException:
+            entry.success = False
+            raise
+        finally:
+            _current_entry.reset(token)
+            entry.total_ms = (time.perf_counter() - start) * 1000
+            if record and settings.LEDGER_ENABLED:
+                self.add(entry)
+
+    def add(self, entry: LedgerEntry) -> None:
+        """Buffer a finished entry, flushing when the batch is full."""
+        self._buffer.append(entry)
+        if len(self._buffer) >= self.flush_size and (
+            self._flush_task is None or self._flush_task.done()
+        ):
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self) -> None:
+        """Write all buffered entries to the database."""
+        if not self._buffer:
+            return
+
+        batch, self._buffer = self._buffer, []
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except Exception as e:
+            logfire.error("Ledger flush failed", entries=len(batch), exc_info=e)
+
+    async def run_periodic_flush(self) -> None:
+        """Flush the buffer every ``flush_interval`` seconds until cancelled."""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+        finally:
+            await self.flush()
+
+    def _write(self, batch: list[LedgerEntry]) -> None:
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.executescript(SCHEMA)
+            connection.executemany(
+                "INSERT OR REPLACE INTO requests VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        entry.request_id,
+                        entry.user_id,
+                        entry.school,
+                        entry.document_used,
+                        entry.created_at,
+                        round(entry.total_ms, 1),
+                        round(entry.retrieval_ms, 1),
+                        entry.prompt_tokens,
+                        entry.completion_tokens,
+                        len(entry.llm_calls),
+                        entry.embedding_calls,
+                        entry.faq_hit,
+                        entry.success,
+                        json.dumps(
+                            [asdict(call) for call in entry.llm_calls],
+                            separators=(",", ":"),
+                        ),
+                    )
+                    for entry in batch
+                ],
+            )
+
+
+# Global request ledger instance
+request_ledger = RequestLedger(
+    path=Path(settings.LEDGER_DB_PATH),
+    flush_size=settings.LEDGER_FLUSH_SIZE,
+    flush_interval=settings.LEDGER_FLUSH_INTERVAL,
+)
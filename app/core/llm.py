@@ -0,0 +1,318 @@
+"""Single entry point for chat model calls.
+
+Every chat completion goes through ``invoke_chat_model`` so that all of them
+share the OpenAI rate limiter, per-stage timeouts (capped by the message
+deadline, if any) and the optional hedging policy. Each stage has its own model, completion token cap and timeout
+(``STAGE_CONFIGS``).
+
+Stages listed in ``LLM_CASCADE_STAGES`` can go through ``invoke_cascade``,
+which tries the cheap ``LLM_CASCADE_MODEL`` first. The stage model is called
+only when the cheap response fails the caller's check or its mean token
+probability is below ``LLM_CASCADE_MIN_CONFIDENCE``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import StrEnum
+from functools import cache
+from typing import Any
+
+import logfire
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.runnables import Runnable
+from langchain_openai import ChatOpenAI
+from pydantic import SecretStr
+
+from app.core.circuit_breaker import openai_breaker
+from app.core.config import settings
+from app.core.deadline import DEADLINE_ACTIONS, Deadline, DeadlineExceeded
+from app.core.hedging import Hedger
+from app.core.ledger import LLMCallRecord, current_entry
+from app.core.metrics import LLM_TOKENS, registry
+from app.core.rate_limiter import openai_limiter
+
+
+class LLMStage(StrEnum):
+    """Pipeline stages that call a chat model."""
+
+    AGENT = "agent"
+    SELECTOR = "selector"
+    ANSWER = "answer"
+
+
+@dataclass(frozen=True)
+class StageConfig:
+    """Model, completion token cap and timeout (seconds) of a stage."""
+
+    model: str
+    max_tokens: int
+    timeout: float
+
+
+STAGE_CONFIGS: dict[LLMStage, StageConfig] = {
+    LLMStage.AGENT: StageConfig(
+        model=settings.LLM_AGENT_MODEL or settings.OPENAI_MODEL,
+        max_tokens=settings.LLM_AGENT_MAX_TOKENS or settings.OPENAI_MAX_TOKENS,
+        timeout=settings.LLM_AGENT_TIMEOUT,
+    ),
+    LLMStage.SELECTOR: StageConfig(
+        model=settings.LLM_SELECTOR_MODEL or settings.OPENAI_MODEL,
+        max_tokens=settings.LLM_SELECTOR_MAX_TOKENS or settings.OPENAI_MAX_TOKENS,
+        timeout=settings.LLM_SELECTOR_TIMEOUT,
+    ),
+    LLMStage.ANSWER: StageConfig(
+        model=settings.LLM_ANSWER_MODEL or settings.OPENAI_MODEL,
+        max_tokens=settings.LLM_ANSWER_MAX_TOKENS or settings.OPENAI_MAX_TOKENS,
+        timeout=settings.LLM_ANSWER_TIMEOUT,
+    ),
+}
+
+LLM_CASCADE = registry.counter(
+    "sciencebot_llm_cascade_total",
+    "Cheap-first cascade outcomes per stage (accepted, escalated or failed)",
+    labels=("stage", "outcome"),
+)
+
+# Global hedger shared by all stages
+hedger = Hedger(
+    percentile=settings.LLM_HEDGE_PERCENTILE,
+    min_delay=settings.LLM_HEDGE_MIN_DELAY,
+    min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+)
+
+
+@cache
+def get_chat_model(model: str, max_tokens: int, logprobs: bool = False) -> ChatOpenAI:
+    """Chat model client shared by every call with the same settings."""
+    return ChatOpenAI(
+        model=model,
+        api_key=SecretStr(secret_value=settings.OPENAI_API_KEY),
+        max_completion_tokens=max_tokens,
+        temperature=settings.OPENAI_TEMPERATURE,
+        logprobs=logprobs or None,
+    )
+
+
+def response_confidence(response: BaseMessage) -> float | None:
+    """Geometric mean probability of the response tokens, if logprobs came back."""
+    logprobs = response.response_metadata.get("logprobs") or {}
+    tokens = logprobs.get("content") or []
+    if not tokens:
+        return None
+    return math.exp(sum(token["logprob"] for token in tokens) / len(tokens))
+
+
+async def warm_up_chat_model() -> None:
+    """Open the pooled connection to OpenAI shared by every chat model.
+
+    ``ChatOpenAI`` instances share a cached HTTP client, so retrieving the
+    model metadata (no tokens involved) pays the DNS and TLS setup before the
+    first user message does.
+    """
+    config = STAGE_CONFIGS[LLMStage.AGENT]
+    model = get_chat_model(config.model, config.max_tokens)
+    await model.root_async_client.models.retrieve(config.model)
+
+
+async def invoke_chat_model(
+    stage: LLMStage,
+    runnable: Runnable[Any, Any],
+    input: Any,
+    model: str,
+    estimated_tokens: int,
+    deadline: Deadline | None = None,
+) -> BaseMessage:
+    """Invoke a chat model runnable with rate limiting, timeout and hedging.
+
+    Args:
+        stage: Pipeline stage making the call
+        runnable: Chat model (or prompt | model chain) to invoke
+        input: Input passed to the runnable
+        model: Model name used for rate limiting
+        estimated_tokens: Estimated prompt + completion tokens
+        deadline: Message deadline, which caps the stage timeout
+
+    Returns:
+        The model response message
+
+    Raises:
+        CircuitOpenError: If OpenAI's circuit is open
+        DeadlineExceeded: If the deadline leaves too little time for the call,
+            or passes before it finishes
+    """
+
+    primary_started = False
+
+    async def attempt() -> BaseMessage:
+        nonlocal primary_started
+        if not primary_started:
+            # The first attempt runs under the lease taken below
+            primary_started = True
+            response: BaseMessage = await runnable.ainvoke(input)
+            lease.record_message(response)
+            return response
+
+        # A hedge is a second request, with its own lease and token accounting
+        async with openai_limiter.limit(
+            model=model, tokens=estimated_tokens
+        ) as hedge_lease:
+            response = await runnable.ainvoke(input)
+            hedge_lease.record_message(response)
+            return response
+
+    if deadline is not None:
+        deadline.require(stage, settings.DEADLINE_MIN_STAGE_SECONDS)
+
+    # Fail fast while the circuit is open instead of queueing for a lease
+    openai_breaker.check()
+
+    start = time.perf_counter()
+    try:
+        # The deadline wraps the breaker: running out of the message's own
+        # budget cancels the call, which the breaker does not count as failed.
+        # The lease is taken before the breaker, so the wait for it is neither
+        # timed by the stage nor seen by the breaker. A hedge is only fired if
+        # the limiter can lease it right away
+        async with (
+            asyncio.timeout(deadline.remaining() if deadline else None) as budget,
+            openai_limiter.limit(model=model, tokens=estimated_tokens) as lease,
+            openai_breaker.guard(),
+        ):
+            response = await hedger.call(
+                stage=stage,
+                attempt=attempt,
+                timeout=STAGE_CONFIGS[stage].timeout,
+                hedge=settings.LLM_HEDGING_ENABLED
+                and stage in settings.LLM_HEDGED_STAGES,
+                can_hedge=lambda: openai_limiter.has_capacity(model, estimated_tokens),
+                model=model,
+            )
+    except TimeoutError as e:
+        if deadline is None or not budget.expired():
+            raise
+        DEADLINE_ACTIONS.inc(stage=stage, action="timeout")
+        raise DeadlineExceeded(stage, deadline.remaining()) from e
+
+    usage = response.usage_metadata if isinstance(response, AIMessage) else None
+    if usage:
+        LLM_TOKENS.inc(usage["input_tokens"], stage=stage, model=model, kind="prompt")
+        LLM_TOKENS.inc(
+            usage["output_tokens"], stage=stage, model=model, kind="completion"
+        )
+
+    entry = current_entry()
+    if entry is not None:
+        entry.llm_calls.append(
+            LLMCallRecord(
+                stage=stage,
+                model=model,
+                prompt_tokens=usage["input_tokens"] if usage else 0,
+                completion_tokens=usage["output_tokens"] if usage else 0,
+                duration_ms=round((time.perf_counter() - start) * 1000, 1),
+            )
+        )
+
+    return response
+
+
+async def invoke_cascade(
+    stage: LLMStage,
+    input: Any,
+    estimated_prompt_tokens: int,
+    accept: Callable[[BaseMessage], bool] = lambda response: True,
+    max_tokens: int | None = None,
+    deadline: Deadline | None = None,
+) -> BaseMessage:
+    """Invoke a stage's model, trying the cheap cascade model first if enabled.
+
+    Args:
+        stage: Pipeline stage making the call
+        input: Messages passed to the model
+        estimated_prompt_tokens: Estimated prompt tokens (the completion cap
+            is added for rate limiting)
+        accept: Stage-specific check of a cheap response (e.g. it parses)
+        max_tokens: Lower completion cap than the stage's (e.g. short on time)
+        deadline: Message deadline, which caps the stage timeout
+
+    Returns:
+        The cheap response if it passed its checks, else the stage model's
+
+    Raises:
+        DeadlineExceeded: If the deadline leaves too little time for the call
+    """
+    config = STAGE_CONFIGS[stage]
+    cheap_model = settings.LLM_CASCADE_MODEL
+    max_tokens = min(max_tokens or config.max_tokens, config.max_tokens)
+
+    if (
+        settings.LLM_CASCADE_ENABLED
+        and stage in settings.LLM_CASCADE_STAGES
+        and cheap_model != config.model
+    ):
+        try:
+            response = await invoke_chat_model(
+                stage=stage,
+                runnable=get_chat_model(cheap_model, max_tokens, logprobs=True),
+                input=input,
+                model=cheap_model,
+                estimated_tokens=max_tokens + estimated_prompt_tokens,
+                deadline=deadline,
+            )
+            confidence = response_confidence(response)
+            if accept(response) and (
+                confidence is None or confidence >= settings.LLM_CASCADE_MIN_CONFIDENCE
+            ):
+                LLM_CASCADE.inc(stage=stage, outcome="accepted")
+                return response
+
+            outcome = "escalated"
+            logfire.info(
+                "Cascade escalated",
+                stage=stage,
+                confidence=round(confidence, 4) if confidence is not None else None,
+            )
+        except Exception as e:
+            outcome = "failed"
+            logfire.warn("Cascade model failed", stage=stage, error=str(e))
+        LLM_CASCADE.inc(stage=stage, outcome=outcome)
+
+    return await invoke_chat_model(
+        stage=stage,
+        runnable=get_chat_model(config.model, max_tokens),
+        input=input,
+        model=config.model,
+        estimated_tokens=max_tokens + estimated_prompt_tokens,
+        deadline=deadline,
+    )
+
+
+LLM_CALLS = registry.counter(
+    "sciencebot_llm_calls_total", "Chat model calls per stage", labels=("stage",)
+)
+LLM_HEDGES = registry.counter(
+    "sciencebot_llm_hedges_total",
+    "Hedged requests per stage by event (fired, won or skipped)",
+    labels=("stage", "event"),
+)
+LLM_TIMEOUTS = registry.counter(
+    "sciencebot_llm_timeouts_total",
+    "Chat model calls that timed out",
+    labels=("stage",),
+)
+
+
+def _collect_hedge_metrics() -> None:
+    for stage, stats in hedger.stats.items():
+        LLM_CALLS.set_total(stats.calls, stage=stage)
+        LLM_HEDGES.set_total(stats.hedges_fired, stage=stage, event="fired")
+        LLM_HEDGES.set_total(stats.hedges_won, stage=stage, event="won")
+        LLM_HEDGES.set_total(stats.hedges_skipped, stage=stage, event="skipped")
+        LLM_TIMEOUTS.set_total(stats.timeouts, stage=stage)
+
+
+registry.register_collector(_collect_hedge_metrics)
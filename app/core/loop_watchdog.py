@@ -0,0 +1,130 @@
+"""Watchdog of event loop stalls.
+
+Synchronous work on the loop (validating a large payload, parsing phone
+numbers, rebuilding a list, building a client) delays every other message
+for as long as it runs. ``LoopWatchdog`` keeps a heartbeat task that wakes
+up every ``LOOP_WATCHDOG_INTERVAL`` seconds and a thread that checks that it
+does. When the heartbeat is late by more than ``LOOP_STALL_THRESHOLD``, the
+thread captures the stack of the loop thread, i.e. of the callback that is
+still blocking it. Once the loop is free again, the stall is logged with that
+stack and counted in the metrics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+import logfire
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.profiler import frame_label, task_label
+
+LOOP_STALLS = registry.counter(
+    "sciencebot_loop_stalls_total",
+    "Event loop stalls above the threshold, by the task that was running",
+    labels=("task",),
+)
+LOOP_STALL_SECONDS = registry.histogram(
+    "sciencebot_loop_stall_seconds", "Duration of event loop stalls"
+)
+LOOP_LAG = registry.gauge(
+    "sciencebot_loop_lag_seconds", "Delay of the last event loop heartbeat"
+)
+
+
+@dataclass
+class StallCapture:
+    """What the loop was running while it was stalled."""
+
+    task: str
+    stack: list[str]  # Innermost frame first
+
+
+class LoopWatchdog:
+    """Detects event loop stalls and captures the blocking callback's stack."""
+
+    def __init__(self, interval: float, threshold: float, max_frames: int = 20) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.max_frames = max_frames
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._capture: StallCapture | None = None
+        self._stopped = threading.Event()
+
+    async def run(self) -> None:
+        """Beat until cancelled, reporting every late heartbeat as a stall."""
+        loop = asyncio.get_running_loop()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        threading.Thread(
+            target=self._watch,
+            args=(loop, threading.get_ident()),
+            name="loop-watchdog",
+            daemon=True,
+        ).start()
+
+        try:
+            while True:
+                expected = time.monotonic() + self.interval
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                lag = max(0.0, now - expected)
+                LOOP_LAG.set(lag)
+
+                with self._lock:
+                    capture, self._capture = self._capture, None
+                    self._last_beat = now
+                if lag >= self.threshold:
+                    self._report(lag, capture)
+        finally:
+            self._stopped.set()
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, loop_thread_id: int) -> None:
+        while not self._stopped.wait(self.threshold / 2):
+            with self._lock:
+                late = (
+                    time.monotonic() - self._last_beat > self.interval + self.threshold
+                )
+                if late and self._capture is None:
+                    self._capture = self._capture_stack(loop, loop_thread_id)
+
+    def _capture_stack(
+        self, loop: asyncio.AbstractEventLoop, loop_thread_id: int
+    ) -> StallCapture | None:
+        frame = sys._current_frames().get(loop_thread_id)
+        if frame is None:
+            return None
+        try:
+            task = asyncio.current_task(loop)
+        except RuntimeError:
+            task = None
+
+        stack: list[str] = []
+        while frame is not None and len(stack) < self.max_frames:
+            stack.append(frame_label(frame))
+            frame = frame.f_back
+        return StallCapture(task=task_label(task), stack=stack)
+
+    def _report(self, seconds: float, capture: StallCapture | None) -> None:
+        task = capture.task if capture else "unknown"
+        LOOP_STALLS.inc(task=task)
+        LOOP_STALL_SECONDS.observe(seconds)
+        logfire.warn(
+            "Event loop stalled",
+            seconds=round(seconds, 3),
+            task=task,
+            stack="\n".join(capture.stack) if capture else None,
+        )
+
+
+# Global watchdog
+loop_watchdog = LoopWatchdog(
+    interval=settings.LOOP_WATCHDOG_INTERVAL,
+    threshold=settings.LOOP_STALL_THRESHOLD,
+)
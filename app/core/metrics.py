@@ -0,0 +1,281 @@
+"""In-process metrics exported in the Prometheus text format.
+
+Stage latencies are taken from the logfire spans that already wrap each stage
+(see ``StageMetricsSpanProcessor``), so the hot path only pays for a dict
+lookup and a bucket search per span. Other components update counters
+directly or register collectors that are read at scrape time.
+"""
+
+from __future__ import annotations
+
+import bisect
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from opentelemetry.context import Context as OTelContext
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.trace import StatusCode
+
+type LabelValues = tuple[str, ...]
+
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60,
+)  # fmt: skip
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind: str = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self) -> Iterable[tuple[str, LabelValues, float]]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for name, values, value in self.samples():
+            label_names = self.labels + (("le",) if name.endswith("_bucket") else ())
+            lines.append(
+                f"{name}{_format_labels(label_names, values)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels: str) -> None:
+        """Mirror a cumulative count kept elsewhere (used by collectors)."""
+        self._values[self._key(labels)] = value
+
+    def samples(self) -> Iterable[tuple[str, LabelValues, float]]:
+        for key, value in self._values.items():
+            yield self.name, key, value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterable[tuple[str, LabelValues, float]]:
+        for key, value in self._values.items():
+            yield self.name, key, value
+
+
+@dataclass
+class _HistogramValue:
+    buckets: list[int]
+    count: int = 0
+    sum: float = 0.0
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        self._values: dict[LabelValues, _HistogramValue] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        histogram = self._values.get(key)
+        if histogram is None:
+            histogram = self._values[key] = _HistogramValue(
+                buckets=[0] * len(self.buckets)
+            )
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            histogram.buckets[index] += 1
+        histogram.count += 1
+        histogram.sum += value
+
+    def samples(self) -> Iterable[tuple[str, LabelValues, float]]:
+        for key, histogram in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(
+                self.buckets, histogram.buckets, strict=True
+            ):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", (*key, _format_value(bound)), cumulative
+            yield f"{self.name}_bucket", (*key, "+Inf"), histogram.count
+            yield f"{self.name}_count", key, histogram.count
+            yield f"{self.name}_sum", key, histogram.sum
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them for scraping."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def _register[M: _Metric](self, metric: M) -> M:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def register_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback that refreshes gauges right before each scrape."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        for collector in self._collectors:
+            collector()
+
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.histogram(
+    "sciencebot_stage_duration_seconds",
+    "Duration of each pipeline stage",
+    labels=("stage",),
+)
+STAGE_ERRORS = registry.counter(
+    "sciencebot_stage_errors_total",
+    "Pipeline stages that ended with an error",
+    labels=("stage",),
+)
+STAGE_IN_FLIGHT = registry.gauge(
+    "sciencebot_stage_in_flight",
+    "Pipeline stages currently running",
+    labels=("stage",),
+)
+LLM_TOKENS = registry.counter(
+    "sciencebot_llm_tokens_total",
+    "Tokens used by chat model calls",
+    labels=("stage", "model", "kind"),
+)
+EMBEDDING_REQUESTS = registry.counter(
+    "sciencebot_embedding_requests_total",
+    "Embedding requests sent to OpenAI",
+    labels=("model",),
+)
+CACHE_REQUESTS = registry.counter(
+    "sciencebot_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)",
+    labels=("cache", "result"),
+)
+
+# Span names (already used by logfire spans) whose duration is tracked
+TRACKED_STAGES: frozenset[str] = frozenset(
+    {
+        "receive_webhook_message",
+        "validate_webhook_payload",
+        "mark_message_as_read",
+        "send_typing_presence",
+        "process_message_with_ai",
+        "send_response_message",
+        "process_message",
+        "small_talk",
+        "invoke_langgraph",
+        "chat_node",
+        "search_and_answer",
+        "search_and_answer_schools",
+        "embed_query",
+        "match_faq",
+        "get_relevant_documents",
+        "select_top_documents",
+        "search_in_documents",
+        "generate_answer",
+    }
+)
+
+
+class StageMetricsSpanProcessor(SpanProcessor):
+    """Feeds stage histograms and in-flight gauges from finished spans."""
+
+    def on_start(self, span: Span, parent_context: OTelContext | None = None) -> None:
+        if span.name in TRACKED_STAGES:
+            STAGE_IN_FLIGHT.inc(stage=span.name)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if span.name not in TRACKED_STAGES:
+            return
+
+        STAGE_IN_FLIGHT.dec(stage=span.name)
+        if span.start_time is not None and span.end_time is not None:
+            STAGE_DURATION.observe(
+                (span.end_time - span.start_time) / 1e9, stage=span.name
+            )
+        if span.status.status_code is StatusCode.ERROR:
+            STAGE_ERRORS.inc(stage=span.name)
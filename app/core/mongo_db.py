@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import asyncio
+import time
+from functools import cache
 from typing import Any
 
 from langchain_openai import OpenAIEmbeddings
@@ -10,8 +12,15 @@ from motor.motor_asyncio import (
     AsyncIOMotorDatabase,
 )
 from pydantic import BaseModel, SecretStr
+from pymongo import UpdateOne
 
+from app.core.circuit_breaker import mongo_breaker, openai_breaker
 from app.core.config import settings
+from app.core.embedding_batcher import EmbeddingBatcher
+from app.core.ledger import current_entry
+from app.core.metrics import CACHE_REQUESTS, EMBEDDING_REQUESTS
+from app.core.page_cache import PageContent, PageTextCache, page_cache
+from app.core.rate_limiter import estimate_tokens, openai_limiter
 
 
 class DocumentInfo(BaseModel):
@@ -37,6 +46,10 @@ class PageMatch(BaseModel):
     page: int
     text: str
     score: float
+    # Precomputed at ingest time (see app.scripts.enrich_pages)
+    token_count: int | None = None
+    summary: str | None = None
+    summary_token_count: int | None = None
 
 
 class SearchPagesResult(BaseModel):
@@ -45,33 +58,99 @@ class SearchPagesResult(BaseModel):
     matches: list[PageMatch]
 
 
+class FAQEntry(BaseModel):
+    """Vetted FAQ answer stored for a school."""
+
+    school: str
+    question: str
+    answer: str
+    document_used: str | None = None
+
+
+class FAQMatch(FAQEntry):
+    """FAQ entry that matches the search."""
+
+    id: str
+    score: float
+
+
+# Page fields read along with the text
+PAGE_CONTENT_PROJECTION: dict[str, int] = {
+    "text": 1,
+    "token_count": 1,
+    "summary": 1,
+    "summary_token_count": 1,
+}
+
+
 class MongoDBService:
     """MongoDB service for document and page search."""
 
-    def __init__(self):
+    def __init__(self, text_cache: PageTextCache = page_cache):
+        self.text_cache = text_cache
         self.embedding = OpenAIEmbeddings(
             api_key=SecretStr(settings.OPENAI_API_KEY),
             model=settings.OPENAI_EMBEDDING_MODEL,
         )
+        self.embedding_batcher = EmbeddingBatcher(
+            embed_documents=self.embedding.aembed_documents,
+            model=settings.OPENAI_EMBEDDING_MODEL,
+            window=settings.EMBEDDING_BATCH_WINDOW,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+        )
 
         self.mongo_client: AsyncIOMotorClient[Any] = AsyncIOMotorClient(
             settings.MONGO_URL
         )
         self.db: AsyncIOMotorDatabase[Any] | None = None
 
+        # Documents catalog (small and rarely updated), grouped by school
+        self._catalog: dict[str, list[DocumentInfo]] | None = None
+        self._catalog_loaded_at = 0.0
+        self._catalog_lock = asyncio.Lock()
+
+        # Collections whose TTL index was already ensured
+        self._ttl_collections: set[str] = set()
+
     async def connect_db(self) -> AsyncIOMotorDatabase[Any]:
         """Connect to MongoDB database.
 
-        Args:
-            database_name: Name of the database to connect to.
+        The connection is checked with a ping only the first time, so services
+        sharing this instance can call it on every use.
 
         Returns:
             MongoDB database instance
         """
-        await self.mongo_client.admin.command("ping")
-        self.db = self.mongo_client[settings.MONGO_DATABASE]
+        if self.db is None:
+            await self.mongo_client.admin.command("ping")
+            self.db = self.mongo_client[settings.MONGO_DATABASE]
         return self.db
 
+    async def get_ttl_collection(
+        self, name: str, ttl_field: str, ttl_seconds: float
+    ) -> AsyncIOMotorCollection[dict[str, Any]]:
+        """Get a collection whose documents expire through a TTL index.
+
+        The index is created the first time, so stores sharing this connection
+        (webhook dedup, user profiles) can call it on every use.
+
+        Args:
+            name: Collection name
+            ttl_field: Date field the expiry is counted from
+            ttl_seconds: Seconds a document is kept after ``ttl_field``
+
+        Returns:
+            MongoDB collection
+        """
+        db = await self.connect_db()
+        collection: AsyncIOMotorCollection[dict[str, Any]] = db[name]
+        if name not in self._ttl_collections:
+            await collection.create_index(
+                ttl_field, expireAfterSeconds=int(ttl_seconds)
+            )
+            self._ttl_collections.add(name)
+        return collection
+
     async def query_to_embedding(self, query: str) -> list[float]:
         """Convert text query to embedding vector.
 
@@ -80,8 +159,28 @@ class MongoDBService:
 
         Returns:
             List of floats representing the embedding vector
+
+        Raises:
+            CircuitOpenError: If OpenAI's circuit is open
         """
-        embedding = await self.embedding.aembed_query(query)
+        if settings.EMBEDDING_BATCH_ENABLED:
+            # Shares one OpenAI request with the queries of concurrent messages
+            embedding = await self.embedding_batcher.embed(query)
+        else:
+            # Lease first: only the request is seen by the breaker
+            openai_breaker.check()
+            async with (
+                openai_limiter.limit(
+                    model=settings.OPENAI_EMBEDDING_MODEL, tokens=estimate_tokens(query)
+                ),
+                openai_breaker.guard(),
+            ):
+                embedding = await self.embedding.aembed_query(query)
+            EMBEDDING_REQUESTS.inc(model=settings.OPENAI_EMBEDDING_MODEL)
+
+        entry = current_entry()
+        if entry is not None:
+            entry.embedding_calls += 1
         return embedding
 
     async def get_documents_by_school(self, school: str) -> DocumentsResult:
@@ -96,6 +195,10 @@ class MongoDBService:
         if self.db is None:
             raise ValueError("Database not connected. Call connect_db() first.")
 
+        if settings.CATALOG_TTL_SECONDS > 0:
+            catalog = await self._get_catalog()
+            return DocumentsResult(documents=list(catalog.get(school, [])))
+
         collection: AsyncIOMotorCollection[dict[str, Any]] = self.db[
             settings.MONGO_DOCUMENTS_COLLECTION
         ]
@@ -104,37 +207,101 @@ class MongoDBService:
         documents: list[DocumentInfo] = []
 
         async for doc in cursor:  # type: ignore[misc]
-            documents.append(
-                DocumentInfo(
-                    id=str(doc["_id"]),  # type: ignore[index]
-                    name=doc.get("nombre", ""),  # type: ignore[arg-type]
-                    description=doc.get("descripcion", ""),  # type: ignore[arg-type]
-                    type=doc.get("tipo", ""),  # type: ignore[arg-type]
-                )
-            )
+            documents.append(self._to_document_info(doc))
 
         return DocumentsResult(documents=documents)
 
+    async def load_catalog(self) -> int:
+        """Load every document description into the in-memory catalog.
+
+        Returns:
+            Number of documents loaded
+        """
+        catalog = await self._reload_catalog()
+        return sum(len(documents) for documents in catalog.values())
+
+    async def _reload_catalog(self) -> dict[str, list[DocumentInfo]]:
+        if self.db is None:
+            raise ValueError("Database not connected. Call connect_db() first.")
+
+        collection: AsyncIOMotorCollection[dict[str, Any]] = self.db[
+            settings.MONGO_DOCUMENTS_COLLECTION
+        ]
+
+        catalog: dict[str, list[DocumentInfo]] = {}
+        projection = {"nombre": 1, "descripcion": 1, "tipo": 1}
+        async with mongo_breaker.guard():
+            async for doc in collection.find({}, projection):  # type: ignore[misc]
+                document = self._to_document_info(doc)
+                catalog.setdefault(document.type, []).append(document)
+
+        self._catalog = catalog
+        self._catalog_loaded_at = time.monotonic()
+        return catalog
+
+    def _fresh_catalog(self) -> dict[str, list[DocumentInfo]] | None:
+        age = time.monotonic() - self._catalog_loaded_at
+        if self._catalog is None or age >= settings.CATALOG_TTL_SECONDS:
+            return None
+        return self._catalog
+
+    async def _get_catalog(self) -> dict[str, list[DocumentInfo]]:
+        """Catalog grouped by school, reloaded once it is older than the TTL."""
+        catalog = self._fresh_catalog()
+        CACHE_REQUESTS.inc(cache="catalog", result="miss" if catalog is None else "hit")
+        if catalog is not None:
+            return catalog
+
+        async with self._catalog_lock:
+            # Another request may have reloaded it while we waited
+            catalog = self._fresh_catalog()
+            if catalog is None:
+                catalog = await self._reload_catalog()
+            return catalog
+
+    @staticmethod
+    def _to_document_info(doc: dict[str, Any]) -> DocumentInfo:
+        return DocumentInfo(
+            id=str(doc["_id"]),
+            name=doc.get("nombre", ""),
+            description=doc.get("descripcion", ""),
+            type=doc.get("tipo", ""),
+        )
+
     async def search_best_matches(
         self,
         query: str,
-        document_name: str | None = None,
+        document_name: str | list[str] | None = None,
         limit: int = 10,
+        query_embedding: list[float] | None = None,
+        num_candidates: int | None = None,
+        index_name: str | None = None,
+        id_first: bool = settings.PAGES_ID_FIRST,
     ) -> SearchPagesResult:
         """Search for best matches in pages based on a query.
 
         Args:
             query: Search text
-            document_name: Document name to filter by
+            document_name: Document name to filter by, or several names to
+                rank the pages of all of them together
             limit: Maximum number of results to return
+            query_embedding: Precomputed embedding of the query (skips embedding)
+            num_candidates: ANN candidates to consider (default: limit * factor)
+            index_name: Atlas vector index (default: PAGES_SEARCH_INDEX)
+            id_first: Leave texts out of the vector search and resolve them
+                from the page cache (fetching only the misses)
 
         Returns:
             SearchPagesResult with best matches found
+
+        Raises:
+            CircuitOpenError: If MongoDB's or OpenAI's circuit is open
         """
         if self.db is None:
             raise ValueError("Database not connected. Call connect_db() first.")
 
-        query_embedding = await self.query_to_embedding(query)
+        if query_embedding is None:
+            query_embedding = await self.query_to_embedding(query)
 
         collection: AsyncIOMotorCollection[dict[str, Any]] = self.db[
             settings.MONGO_PAGES_COLLECTION
@@ -142,15 +309,18 @@ class MongoDBService:
 
         # Build $vectorSearch with filter
         vector_search: dict[str, Any] = {
-            "index": "default",
+            "index": index_name or settings.PAGES_SEARCH_INDEX,
             "queryVector": query_embedding,
             "path": "embedding",
-            "numCandidates": limit * 10,
+            "numCandidates": num_candidates
+            or limit * settings.PAGES_SEARCH_CANDIDATES_FACTOR,
             "limit": limit,
         }
 
-        # Add filter for document name if provided
-        if document_name:
+        # Add filter for document name(s) if provided
+        if isinstance(document_name, list):
+            vector_search["filter"] = {"nombre_archivo": {"$in": document_name}}
+        elif document_name:
             vector_search["filter"] = {"nombre_archivo": document_name}
 
         pipeline: list[dict[str, Any]] = [
@@ -160,29 +330,192 @@ class MongoDBService:
                     "_id": 1,
                     "nombre_archivo": 1,
                     "pagina": 1,
-                    "text": 1,
                     "score": {"$meta": "vectorSearchScore"},
+                    **({} if id_first else PAGE_CONTENT_PROJECTION),
                 }
             },
         ]
 
-        cursor = collection.aggregate(pipeline)
-        results: list[PageMatch] = []
+        async with mongo_breaker.guard():
+            cursor = collection.aggregate(pipeline)
+            docs: list[dict[str, Any]] = [doc async for doc in cursor]  # type: ignore[misc]
 
-        async for doc in cursor:  # type: ignore[misc]
+            if id_first:
+                contents = await self._get_page_contents(
+                    collection, [doc["_id"] for doc in docs]
+                )
+            else:
+                contents = {str(doc["_id"]): self._to_page_content(doc) for doc in docs}
+
+        results: list[PageMatch] = []
+        for doc in docs:
+            content = contents.get(str(doc["_id"]), PageContent(text=""))
             results.append(
                 PageMatch(
-                    id=str(doc["_id"]),  # type: ignore[index]
-                    file_name=doc.get("nombre_archivo", ""),  # type: ignore[arg-type]
-                    page=doc.get("pagina", 0),  # type: ignore[arg-type]
-                    text=doc.get("text", ""),  # type: ignore[arg-type]
-                    score=doc.get("score", 0.0),  # type: ignore[arg-type]
+                    id=str(doc["_id"]),
+                    file_name=doc.get("nombre_archivo", ""),
+                    page=doc.get("pagina", 0),
+                    text=content.text,
+                    score=doc.get("score", 0.0),
+                    token_count=content.token_count,
+                    summary=content.summary,
+                    summary_token_count=content.summary_token_count,
                 )
             )
 
         return SearchPagesResult(matches=results)
 
+    @staticmethod
+    def _to_page_content(doc: dict[str, Any]) -> PageContent:
+        return PageContent(
+            text=doc.get("text", ""),
+            token_count=doc.get("token_count"),
+            summary=doc.get("summary"),
+            summary_token_count=doc.get("summary_token_count"),
+        )
+
+    async def _get_page_contents(
+        self, collection: AsyncIOMotorCollection[dict[str, Any]], raw_ids: list[Any]
+    ) -> dict[str, PageContent]:
+        """Resolve page contents from the cache, fetching all misses in one query."""
+        ids_by_key = {str(raw_id): raw_id for raw_id in raw_ids}
+        contents, missing = self.text_cache.get_many(list(ids_by_key))
+
+        if missing:
+            cursor = collection.find(
+                {"_id": {"$in": [ids_by_key[key] for key in missing]}},
+                PAGE_CONTENT_PROJECTION,
+            )
+            async for doc in cursor:  # type: ignore[misc]
+                content = self._to_page_content(doc)
+                contents[str(doc["_id"])] = content
+                self.text_cache.put(str(doc["_id"]), content)
+
+        return contents
+
+    async def search_faq(
+        self,
+        query_embedding: list[float],
+        schools: list[str],
+        limit: int = 1,
+    ) -> list[FAQMatch]:
+        """Search for the closest stored FAQ questions.
+
+        Args:
+            query_embedding: Embedding of the user question
+            schools: Schools whose FAQ entries may be returned
+            limit: Maximum number of results to return
+
+        Returns:
+            List of FAQ matches ordered by score
+
+        Raises:
+            CircuitOpenError: If MongoDB's circuit is open
+        """
+        if self.db is None:
+            raise ValueError("Database not connected. Call connect_db() first.")
+
+        collection: AsyncIOMotorCollection[dict[str, Any]] = self.db[
+            settings.MONGO_FAQ_COLLECTION
+        ]
+
+        pipeline: list[dict[str, Any]] = [
+            {
+                "$vectorSearch": {
+                    "index": settings.FAQ_SEARCH_INDEX,
+                    "queryVector": query_embedding,
+                    "path": "embedding",
+                    "numCandidates": limit * settings.FAQ_SEARCH_CANDIDATES_FACTOR,
+                    "limit": limit,
+                    "filter": {"tipo": {"$in": schools}},
+                }
+            },
+            {
+                "$project": {
+                    "_id": 1,
+                    "tipo": 1,
+                    "pregunta": 1,
+                    "respuesta": 1,
+                    "nombre_archivo": 1,
+                    "score": {"$meta": "vectorSearchScore"},
+                }
+            },
+        ]
+
+        results: list[FAQMatch] = []
+        async with mongo_breaker.guard():
+            cursor = collection.aggregate(pipeline)
+            async for doc in cursor:  # type: ignore[misc]
+                results.append(
+                    FAQMatch(
+                        id=str(doc["_id"]),  # type: ignore[index]
+                        school=doc.get("tipo", ""),  # type: ignore[arg-type]
+                        question=doc.get("pregunta", ""),  # type: ignore[arg-type]
+                        answer=doc.get("respuesta", ""),  # type: ignore[arg-type]
+                        document_used=doc.get("nombre_archivo"),  # type: ignore[arg-type]
+                        score=doc.get("score", 0.0),  # type: ignore[arg-type]
+                    )
+                )
+
+        return results
+
+    async def upsert_faq_entries(self, entries: list[FAQEntry]) -> int:
+        """Embed and store FAQ entries, replacing existing ones by question.
+
+        Args:
+            entries: Vetted FAQ entries to store
+
+        Returns:
+            Number of entries written
+        """
+        if self.db is None:
+            raise ValueError("Database not connected. Call connect_db() first.")
+
+        if not entries:
+            return 0
+
+        collection: AsyncIOMotorCollection[dict[str, Any]] = self.db[
+            settings.MONGO_FAQ_COLLECTION
+        ]
+
+        questions = [entry.question for entry in entries]
+        async with openai_limiter.limit(
+            model=settings.OPENAI_EMBEDDING_MODEL, tokens=estimate_tokens(*questions)
+        ):
+            embeddings = await self.embedding.aembed_documents(questions)
+        EMBEDDING_REQUESTS.inc(model=settings.OPENAI_EMBEDDING_MODEL)
+
+        operations = [
+            UpdateOne(
+                {"tipo": entry.school, "pregunta": entry.question},
+                {
+                    "$set": {
+                        "tipo": entry.school,
+                        "pregunta": entry.question,
+                        "respuesta": entry.answer,
+                        "nombre_archivo": entry.document_used,
+                        "embedding": embedding,
+                    }
+                },
+                upsert=True,
+            )
+            for entry, embedding in zip(entries, embeddings, strict=True)
+        ]
+
+        result = await collection.bulk_write(operations)
+        return result.upserted_count + result.matched_count
+
     async def close_connection(self) -> None:
         """Close MongoDB connection."""
         if self.mongo_client:
             await asyncio.to_thread(self.mongo_client.close)
+
+
+@cache
+def get_mongo_service() -> MongoDBService:
+    """MongoDB service shared by the whole app (one connection pool).
+
+    Created on first use rather than at import time, since building the
+    embeddings client requires the OpenAI credentials.
+    """
+    return MongoDBService()
@@ -0,0 +1,175 @@
+"""Adaptive load shedding: degrade answers progressively under overload.
+
+The ``overload_controller`` turns three signals into a pressure value (1.0
+means a signal is at its configured limit):
+
+- callers queued for an OpenAI lease,
+- messages currently being answered,
+- the p90 latency of the messages answered in the last window.
+
+Pressure selects a ``LoadMode``. Each mode keeps the previous degradations
+and adds one more:
+
+1. ``REDUCED``: only the first selected document is searched (no second
+   document fallback) and fewer pages are sent to the answer generator.
+2. ``CACHED_FIRST``: FAQ answers are served with a lower similarity threshold.
+3. ``SHED``: new messages get a "busy, try again" reply without the agent.
+
+Escalation is immediate. Recovery goes one mode at a time, and only after
+pressure has stayed below the lower mode's threshold for a cooldown period.
+That way the mode does not flap at the boundary.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from enum import IntEnum
+
+import logfire
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.rate_limiter import openai_limiter
+
+
+class LoadMode(IntEnum):
+    """Degradation level (higher values degrade more)."""
+
+    NORMAL = 0
+    REDUCED = 1
+    CACHED_FIRST = 2
+    SHED = 3
+
+
+LOAD_MODE = registry.gauge(
+    "sciencebot_load_mode",
+    "Current degradation mode (0 normal, 1 reduced, 2 cached first, 3 shed)",
+)
+LOAD_PRESSURE = registry.gauge(
+    "sciencebot_load_pressure", "Overload pressure (1 = a signal at its limit)"
+)
+LOAD_MODE_CHANGES = registry.counter(
+    "sciencebot_load_mode_changes_total",
+    "Transitions into each degradation mode",
+    labels=("mode",),
+)
+LOAD_SHED = registry.counter(
+    "sciencebot_load_shed_total", "Messages answered with the busy reply"
+)
+
+
+class OverloadController:
+    """Pick the degradation mode from queue depth, concurrency and latency."""
+
+    def __init__(
+        self,
+        max_llm_queue: int,
+        max_active_messages: int,
+        latency_target: float,
+        latency_window: float,
+        thresholds: list[float],
+        cooldown_seconds: float,
+    ) -> None:
+        self.max_llm_queue = max_llm_queue
+        self.max_active_messages = max_active_messages
+        self.latency_target = latency_target
+        self.latency_window = latency_window
+        # Pressure at which REDUCED, CACHED_FIRST and SHED start
+        self.thresholds = thresholds
+        self.cooldown_seconds = cooldown_seconds
+        self.active_messages = 0
+        self._mode = LoadMode.NORMAL
+        self._calm_since: float | None = None
+        self._latencies: deque[tuple[float, float]] = deque(maxlen=1000)
+
+    def _latency_p90(self, now: float) -> float:
+        while self._latencies and self._latencies[0][0] < now - self.latency_window:
+            self._latencies.popleft()
+        if not self._latencies:
+            return 0.0
+        durations = sorted(duration for _, duration in self._latencies)
+        return durations[math.ceil(0.9 * len(durations)) - 1]
+
+    def pressure(self, now: float | None = None) -> float:
+        """Current pressure: the highest of the signals relative to its limit."""
+        now = time.monotonic() if now is None else now
+        return max(
+            openai_limiter.queue_depth / self.max_llm_queue,
+            self.active_messages / self.max_active_messages,
+            self._latency_p90(now) / self.latency_target,
+        )
+
+    def _mode_for(self, pressure: float) -> LoadMode:
+        mode = LoadMode.NORMAL
+        for level, threshold in enumerate(self.thresholds, start=1):
+            if pressure >= threshold:
+                mode = LoadMode(level)
+        return mode
+
+    @property
+    def mode(self) -> LoadMode:
+        """Re-evaluate and return the current degradation mode."""
+        if not settings.OVERLOAD_ENABLED:
+            return LoadMode.NORMAL
+
+        now = time.monotonic()
+        target = self._mode_for(self.pressure(now))
+
+        if target > self._mode:
+            self._set_mode(target)
+            self._calm_since = None
+        elif target < self._mode:
+            # Step down one mode after the cooldown, then start a new one
+            if self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= self.cooldown_seconds:
+                self._set_mode(LoadMode(self._mode - 1))
+                self._calm_since = now if target < self._mode else None
+        else:
+            self._calm_since = None
+
+        return self._mode
+
+    def _set_mode(self, mode: LoadMode) -> None:
+        logfire.warn(
+            "Load mode changed",
+            previous=self._mode.name,
+            mode=mode.name,
+            active_messages=self.active_messages,
+            llm_queue=openai_limiter.queue_depth,
+        )
+        self._mode = mode
+        LOAD_MODE_CHANGES.inc(mode=mode.name.lower())
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Count a message as active and record how long it took to answer."""
+        self.active_messages += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.active_messages -= 1
+            end = time.monotonic()
+            self._latencies.append((end, end - start))
+
+    def collect_metrics(self) -> None:
+        LOAD_PRESSURE.set(round(self.pressure(), 4))
+        LOAD_MODE.set(self.mode)
+
+
+# Global overload controller
+overload_controller = OverloadController(
+    max_llm_queue=settings.OVERLOAD_MAX_LLM_QUEUE,
+    max_active_messages=settings.OVERLOAD_MAX_ACTIVE_MESSAGES,
+    latency_target=settings.OVERLOAD_LATENCY_TARGET,
+    latency_window=settings.OVERLOAD_LATENCY_WINDOW,
+    thresholds=settings.OVERLOAD_MODE_THRESHOLDS,
+    cooldown_seconds=settings.OVERLOAD_COOLDOWN_SECONDS,
+)
+
+registry.register_collector(overload_controller.collect_metrics)
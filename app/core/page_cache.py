@@ -0,0 +1,132 @@
+"""Bounded in-process cache of page texts, keyed by page id.
+
+Page search first asks Atlas only for ids, page numbers and scores, then
+resolves the texts here; only the misses are fetched from Mongo, in a single
+batched ``$in`` query. Popular pages therefore stop crossing the network on
+every search. Each entry also holds the page summary and token counts stored
+at ingest time (see ``app.scripts.enrich_pages``). The cache is bounded by the
+total UTF-8 size of the texts and summaries it holds (least recently used
+entries are evicted first), and entries expire so re-ingested pages are
+eventually picked up.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS, registry
+
+PAGE_CACHE_BYTES = registry.gauge(
+    "sciencebot_page_cache_bytes", "Bytes of page text held in the page cache"
+)
+PAGE_CACHE_ENTRIES = registry.gauge(
+    "sciencebot_page_cache_entries", "Pages held in the page cache"
+)
+PAGE_CACHE_EVICTIONS = registry.counter(
+    "sciencebot_page_cache_evictions_total",
+    "Pages evicted to stay under the size limit",
+)
+
+
+@dataclass(frozen=True)
+class PageContent:
+    """Text of a page and what was precomputed for it at ingest time."""
+
+    text: str
+    token_count: int | None = None
+    summary: str | None = None
+    summary_token_count: int | None = None
+
+
+@dataclass
+class _CachedPage:
+    content: PageContent
+    size: int
+    expires_at: float
+
+
+class PageTextCache:
+    """LRU cache of page texts bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.size_bytes = 0
+        self._pages: OrderedDict[str, _CachedPage] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def get_many(self, page_ids: list[str]) -> tuple[dict[str, PageContent], list[str]]:
+        """Look up several pages at once.
+
+        Args:
+            page_ids: Ids of the pages to look up
+
+        Returns:
+            The contents found by page id, and the ids that must be fetched
+        """
+        now = time.monotonic()
+        found: dict[str, PageContent] = {}
+        missing: list[str] = []
+
+        for page_id in page_ids:
+            page = self._pages.get(page_id)
+            if page is not None and page.expires_at <= now:
+                self._remove(page_id)
+                page = None
+
+            if page is None:
+                missing.append(page_id)
+            else:
+                self._pages.move_to_end(page_id)
+                found[page_id] = page.content
+
+        CACHE_REQUESTS.inc(len(found), cache="page_text", result="hit")
+        CACHE_REQUESTS.inc(len(missing), cache="page_text", result="miss")
+        return found, missing
+
+    def put(self, page_id: str, content: PageContent) -> None:
+        """Store a page, evicting the least recently used pages if needed."""
+        size = len(content.text.encode()) + len((content.summary or "").encode())
+        if size > self.max_bytes:
+            return
+
+        if page_id in self._pages:
+            self._remove(page_id)
+
+        self._pages[page_id] = _CachedPage(
+            content=content,
+            size=size,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        self.size_bytes += size
+
+        while self.size_bytes > self.max_bytes:
+            oldest_id = next(iter(self._pages))
+            self._remove(oldest_id)
+            PAGE_CACHE_EVICTIONS.inc()
+
+    def clear(self) -> None:
+        self._pages.clear()
+        self.size_bytes = 0
+
+    def collect_metrics(self) -> None:
+        PAGE_CACHE_BYTES.set(self.size_bytes)
+        PAGE_CACHE_ENTRIES.set(len(self._pages))
+
+    def _remove(self, page_id: str) -> None:
+        page = self._pages.pop(page_id)
+        self.size_bytes -= page.size
+
+
+# Global page text cache
+page_cache = PageTextCache(
+    max_bytes=settings.PAGE_CACHE_MAX_BYTES,
+    ttl_seconds=settings.PAGE_CACHE_TTL_SECONDS,
+)
+
+registry.register_collector(page_cache.collect_metrics)
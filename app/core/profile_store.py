@@ -0,0 +1,139 @@
+"""Per-user profiles remembered between conversations.
+
+The conversation history only keeps the last messages, so a returning user
+used to be asked for their school again before every search. A profile is
+stored per phone number with the schools of the user's last successful
+``search_documents`` call, their WhatsApp display name and the time of their
+last message. It is passed to the agent through ``Context`` and shown in the
+system prompt, so the agent can search right away.
+
+Two backends are available: a bounded in-memory store (default, per process)
+and a MongoDB collection shared by every instance that survives restarts.
+Profiles of inactive users expire after ``PROFILE_TTL_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any, Protocol
+
+from pydantic import BaseModel, Field
+
+from app.core.circuit_breaker import mongo_breaker
+from app.core.config import settings
+from app.core.metrics import registry
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection
+
+PROFILE_LOOKUPS = registry.counter(
+    "sciencebot_profile_lookups_total",
+    "User profile lookups by result (school known or not)",
+    labels=("result",),
+)
+
+
+class UserProfile(BaseModel):
+    """What the bot remembers about a user."""
+
+    phone_number: str = Field(description="User phone number (profile key)")
+    schools: list[str] = Field(
+        default_factory=list, description="Schools of the last successful search"
+    )
+    name: str | None = Field(default=None, description="WhatsApp display name")
+    last_activity: datetime = Field(
+        default_factory=lambda: datetime.now(UTC), description="Last message time"
+    )
+
+
+class ProfileStore(Protocol):
+    """Store of user profiles keyed by phone number."""
+
+    async def get(self, phone_number: str) -> UserProfile | None:
+        """Return the profile of a user, or None if unknown or expired."""
+        ...
+
+    async def save(self, profile: UserProfile) -> None:
+        """Create or replace the profile of a user."""
+        ...
+
+
+class MemoryProfileStore:
+    """Bounded in-memory store (least recently active users are evicted)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._profiles: OrderedDict[str, tuple[float, UserProfile]] = OrderedDict()
+
+    async def get(self, phone_number: str) -> UserProfile | None:
+        entry = self._profiles.get(phone_number)
+        if entry is None:
+            return None
+
+        expires_at, profile = entry
+        if expires_at <= time.monotonic():
+            del self._profiles[phone_number]
+            return None
+        return profile.model_copy(deep=True)
+
+    async def save(self, profile: UserProfile) -> None:
+        self._profiles.pop(profile.phone_number, None)
+        self._profiles[profile.phone_number] = (
+            time.monotonic() + self.ttl_seconds,
+            profile.model_copy(deep=True),
+        )
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+
+
+class MongoProfileStore:
+    """Store shared by every app instance, backed by a MongoDB TTL collection."""
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+
+    async def _get_collection(self) -> AsyncIOMotorCollection[dict[str, Any]]:
+        # Imported here: the shared service pulls in the OpenAI client
+        from app.core.mongo_db import get_mongo_service
+
+        return await get_mongo_service().get_ttl_collection(
+            settings.MONGO_PROFILES_COLLECTION, "last_activity", self.ttl_seconds
+        )
+
+    async def get(self, phone_number: str) -> UserProfile | None:
+        async with mongo_breaker.guard():
+            collection = await self._get_collection()
+            doc = await collection.find_one({"_id": phone_number})
+        if doc is None:
+            return None
+        return UserProfile(phone_number=doc["_id"], **doc.get("profile", {}))
+
+    async def save(self, profile: UserProfile) -> None:
+        async with mongo_breaker.guard():
+            collection = await self._get_collection()
+            await collection.replace_one(
+                {"_id": profile.phone_number},
+                {
+                    "_id": profile.phone_number,
+                    "last_activity": profile.last_activity,
+                    "profile": profile.model_dump(exclude={"phone_number"}),
+                },
+                upsert=True,
+            )
+
+
+def create_profile_store() -> ProfileStore:
+    """Create the profile store selected by ``PROFILE_BACKEND``."""
+    if settings.PROFILE_BACKEND == "mongo":
+        return MongoProfileStore(ttl_seconds=settings.PROFILE_TTL_SECONDS)
+    return MemoryProfileStore(
+        ttl_seconds=settings.PROFILE_TTL_SECONDS,
+        max_entries=settings.PROFILE_MAX_ENTRIES,
+    )
+
+
+# Global user profile store
+profile_store = create_profile_store()
@@ -0,0 +1,239 @@
+"""Sampling profiler of the event loop thread for production diagnosis.
+
+A daemon thread samples the stack of the thread running the event loop every
+``PROFILER_INTERVAL`` seconds while a profile is active. Every sample starts
+with the asyncio task that was running, named after its coroutine, e.g.
+``task:receive_message``; it is ``loop`` when the loop was idle or running
+plain callbacks. So the time of concurrent messages is split by task rather
+than lumped under the event loop internals.
+
+Two kinds of profiles are available:
+
+- ``profile(seconds)`` covers the whole app for a fixed time
+  (``POST /admin/profile``).
+- ``next_request_profile(user_id)`` waits for the next ``process_message``
+  run (of a user, or of anyone) and only keeps the samples taken while that
+  run, or a task it started, was on the loop (``POST /admin/profile/request``).
+
+Profiles are returned as collapsed stacks (``frame;frame;frame count`` per
+line), which flamegraph.pl, inferno and speedscope read as is. Only the event
+loop thread is sampled: work sent to other threads shows up as the await that
+waits for it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from itertools import count
+from types import FrameType
+
+import logfire
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+PROFILES = registry.counter(
+    "sciencebot_profiles_total",
+    "Profiles taken through the admin endpoints",
+    labels=("kind",),
+)
+
+# Id of the process_message run being profiled, inherited by the tasks it starts
+_profiled_request: ContextVar[int | None] = ContextVar("profiled_request", default=None)
+
+
+@dataclass
+class Profile:
+    """Collapsed stacks of a finished profile."""
+
+    samples: int
+    seconds: float
+    collapsed: str
+
+
+@dataclass
+class _Session:
+    request_id: int | None  # None profiles every task
+    started_at: float = field(default_factory=time.perf_counter)
+    stacks: Counter[str] = field(default_factory=Counter)
+    samples: int = 0
+
+
+def frame_label(frame: FrameType) -> str:
+    """``qualname (path:line)`` of a frame's function, with a shortened path."""
+    code = frame.f_code
+    path = code.co_filename
+    # Keep paths short and stable across deployments
+    for marker in ("site-packages/", "/app/", "/lib/python"):
+        index = path.rfind(marker)
+        if index != -1:
+            path = path[index + len(marker) :]
+            break
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})"
+
+
+def task_label(task: asyncio.Task[object] | None) -> str:
+    """``task:<coroutine>`` of the running task, or ``loop`` if there is none."""
+    if task is None:
+        return "loop"
+    coroutine = task.get_coro()
+    return f"task:{getattr(coroutine, '__qualname__', task.get_name())}"
+
+
+class LoopProfiler:
+    """Samples the event loop thread while at least one profile is active."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._sessions: list[_Session] = []
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id = 0
+        self._request_ids = count(1)
+        # Callers waiting for the next process_message run, by user (None = anyone)
+        self._armed: dict[str | None, list[asyncio.Future[Profile]]] = {}
+
+    @property
+    def busy(self) -> bool:
+        """Whether an app-wide profile is running."""
+        return any(session.request_id is None for session in self._sessions)
+
+    def _start(self, request_id: int | None) -> _Session:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        session = _Session(request_id=request_id)
+        with self._lock:
+            self._sessions.append(session)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="loop-profiler", daemon=True
+                )
+                self._thread.start()
+        return session
+
+    def _stop(self, session: _Session) -> Profile:
+        with self._lock:
+            self._sessions.remove(session)
+            stacks = dict(session.stacks)
+        return Profile(
+            samples=session.samples,
+            seconds=round(time.perf_counter() - session.started_at, 3),
+            collapsed="".join(
+                f"{stack} {samples}\n"
+                for stack, samples in sorted(stacks.items(), key=lambda s: -s[1])
+            ),
+        )
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._sessions:
+                    self._thread = None
+                    return
+                self._sample()
+            time.sleep(self.interval)
+
+    def _sample(self) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None or self._loop is None:
+            return
+
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        request_id = task.get_context().get(_profiled_request) if task else None
+
+        frames: list[str] = []
+        current: FrameType | None = frame
+        while current is not None:
+            frames.append(frame_label(current))
+            current = current.f_back
+        stack = ";".join([task_label(task), *reversed(frames)])
+
+        for session in self._sessions:
+            if session.request_id is None or session.request_id == request_id:
+                session.stacks[stack] += 1
+                session.samples += 1
+
+    async def profile(self, seconds: float) -> Profile:
+        """Profile the whole app for some time.
+
+        Args:
+            seconds: Duration of the profile
+
+        Returns:
+            The collapsed stacks of every task
+        """
+        PROFILES.inc(kind="app")
+        session = self._start(request_id=None)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile = self._stop(session)
+        logfire.info("App profiled", seconds=profile.seconds, samples=profile.samples)
+        return profile
+
+    async def next_request_profile(
+        self, user_id: str | None, timeout: float
+    ) -> Profile:
+        """Wait for the next ``process_message`` run and return its profile.
+
+        Args:
+            user_id: Only profile a message of this user (None = any user)
+            timeout: Seconds to wait for the message and its answer
+
+        Returns:
+            The collapsed stacks of that run and the tasks it started
+
+        Raises:
+            TimeoutError: If no message was answered in time
+        """
+        PROFILES.inc(kind="request")
+        future: asyncio.Future[Profile] = asyncio.get_running_loop().create_future()
+        self._armed.setdefault(user_id, []).append(future)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            waiters = self._armed.get(user_id, [])
+            if future in waiters:
+                waiters.remove(future)
+
+    @contextmanager
+    def profile_request(self, user_id: str) -> Iterator[None]:
+        """Profile the block if a caller asked for this user's next message."""
+        waiters = self._armed.pop(user_id, []) + self._armed.pop(None, [])
+        if not waiters:
+            yield
+            return
+
+        request_id = next(self._request_ids)
+        token = _profiled_request.set(request_id)
+        session = self._start(request_id=request_id)
+        try:
+            yield
+        finally:
+            _profiled_request.reset(token)
+            profile = self._stop(session)
+            logfire.info(
+                "Message profiled",
+                user_id=user_id,
+                seconds=profile.seconds,
+                samples=profile.samples,
+            )
+            for future in waiters:
+                if not future.done():
+                    future.set_result(profile)
+
+
+# Global profiler
+loop_profiler = LoopProfiler(interval=settings.PROFILER_INTERVAL)
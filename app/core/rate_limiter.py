@@ -0,0 +1,324 @@
+"""Shared concurrency and rate limiter for OpenAI calls.
+
+Every OpenAI call site (chat node, document selector, answer generator and
+embeddings) acquires a lease from the global ``openai_limiter`` before calling
+the API. The limiter enforces:
+
+- a global maximum of in-flight requests,
+- requests-per-minute and tokens-per-minute token buckets per model,
+
+and queues callers when a limit is reached. Waiters are served in priority
+order (user-facing calls before background jobs) and, within a priority, in
+arrival order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from itertools import count
+
+import logfire
+from langchain_core.messages import AIMessage, BaseMessage
+
+from app.core.config import ModelRateLimit, settings
+from app.core.metrics import registry
+
+
+class Priority(IntEnum):
+    """Priority of an OpenAI call (lower values are served first)."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_current_priority: ContextVar[Priority] = ContextVar(
+    "openai_call_priority", default=Priority.INTERACTIVE
+)
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Roughly estimate the number of tokens of some texts (~4 chars per token)."""
+    return sum(len(text) for text in texts) // 4 + 1
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity: float = float(per_minute)
+        self.rate: float = per_minute / 60
+        self.available: float = self.capacity
+        self.updated_at: float = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        self.available = min(self.capacity, self.available + elapsed * self.rate)
+        self.updated_at = now
+
+    def delay_for(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken (0 if available now)."""
+        self._refill(now)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Consume tokens (may leave the bucket in debt after adjustments)."""
+        self.available -= amount
+
+
+@dataclass
+class LimiterStats:
+    """Counters exposed for monitoring."""
+
+    acquired: int = 0
+    queued: int = 0
+    throttled: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+@dataclass
+class _Waiter:
+    priority: Priority
+    sequence: int
+    model: str
+    tokens: int
+    future: asyncio.Future[None]
+    enqueued_at: float = field(default_factory=time.monotonic)
+    throttled: bool = False
+
+
+class Lease:
+    """Permission to perform one OpenAI request."""
+
+    def __init__(self, bucket: TokenBucket, estimated_tokens: int) -> None:
+        self._bucket = bucket
+        self._estimated_tokens = estimated_tokens
+
+    def record_usage(self, total_tokens: int | None) -> None:
+        """Correct the token bucket with the real usage of the request."""
+        if total_tokens is not None:
+            self._bucket.take(total_tokens - self._estimated_tokens)
+            self._estimated_tokens = total_tokens
+
+    def record_message(self, message: BaseMessage) -> None:
+        """Correct the token bucket with the usage reported in a chat response."""
+        if isinstance(message, AIMessage) and message.usage_metadata:
+            self.record_usage(message.usage_metadata["total_tokens"])
+
+
+class OpenAIRateLimiter:
+    """Priority-aware limiter of in-flight requests, RPM and TPM per model."""
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        default_limit: ModelRateLimit,
+        model_limits: dict[str, ModelRateLimit] | None = None,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.default_limit = default_limit
+        self.model_limits = model_limits or {}
+        self.in_flight = 0
+        self.stats = LimiterStats()
+        self._waiters: list[_Waiter] = []
+        self._sequence = count()
+        self._buckets: dict[str, tuple[TokenBucket, TokenBucket]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a lease."""
+        return len(self._waiters)
+
+    def _buckets_for(self, model: str) -> tuple[TokenBucket, TokenBucket]:
+        if model not in self._buckets:
+            limit = self.model_limits.get(model, self.default_limit)
+            self._buckets[model] = (
+                TokenBucket(limit.requests_per_minute),
+                TokenBucket(limit.tokens_per_minute),
+            )
+        return self._buckets[model]
+
+    def has_capacity(self, model: str, tokens: int) -> bool:
+        """Whether a lease for ``model`` would be granted right away.
+
+        Optional extra requests (e.g. hedges) check this to avoid queueing or
+        getting ahead of callers already waiting.
+        """
+        if self._waiters or self.in_flight >= self.max_in_flight:
+            return False
+
+        now = time.monotonic()
+        requests_bucket, tokens_bucket = self._buckets_for(model)
+        tokens = min(tokens, int(tokens_bucket.capacity))
+        return (
+            requests_bucket.delay_for(1, now) == 0
+            and tokens_bucket.delay_for(tokens, now) == 0
+        )
+
+    @contextmanager
+    def priority(self, priority: Priority) -> Iterator[None]:
+        """Run the calls made inside the block with the given priority."""
+        token = _current_priority.set(priority)
+        try:
+            yield
+        finally:
+            _current_priority.reset(token)
+
+    @asynccontextmanager
+    async def limit(self, model: str, tokens: int) -> AsyncIterator[Lease]:
+        """Wait for a lease to call ``model`` with about ``tokens`` tokens.
+
+        Args:
+            model: OpenAI model name
+            tokens: Estimated prompt + completion tokens of the request
+
+        Yields:
+            Lease used to report the real token usage
+        """
+        requests_bucket, tokens_bucket = self._buckets_for(model)
+        tokens = min(tokens, int(tokens_bucket.capacity))
+        await self._acquire(model=model, tokens=tokens)
+        try:
+            yield Lease(bucket=tokens_bucket, estimated_tokens=tokens)
+        finally:
+            self._release()
+
+    async def _acquire(self, model: str, tokens: int) -> None:
+        waiter = _Waiter(
+            priority=_current_priority.get(),
+            sequence=next(self._sequence),
+            model=model,
+            tokens=tokens,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(waiter)
+        self._waiters.sort(key=lambda w: (w.priority, w.sequence))
+        self._dispatch()
+
+        if not waiter.future.done():
+            self.stats.queued += 1
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                self._release()
+            raise
+
+        waited = time.monotonic() - waiter.enqueued_at
+        self.stats.acquired += 1
+        self.stats.wait_seconds_total += waited
+        self.stats.wait_seconds_max = max(self.stats.wait_seconds_max, waited)
+        if waiter.throttled:
+            self.stats.throttled += 1
+            logfire.info(
+                "OpenAI call throttled",
+                model=model,
+                priority=waiter.priority.name,
+                wait_seconds=round(waited, 3),
+            )
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant leases to waiters in priority order while capacity allows."""
+        now = time.monotonic()
+        next_refill: float | None = None
+        blocked_models: set[str] = set()
+
+        for waiter in list(self._waiters):
+            if self.in_flight >= self.max_in_flight:
+                break
+
+            if waiter.future.done():
+                self._waiters.remove(waiter)
+                continue
+
+            # Keep later waiters from starving an earlier one of the same model
+            if waiter.model in blocked_models:
+                continue
+
+            requests_bucket, tokens_bucket = self._buckets_for(waiter.model)
+            delay = max(
+                requests_bucket.delay_for(1, now),
+                tokens_bucket.delay_for(waiter.tokens, now),
+            )
+            if delay > 0:
+                waiter.throttled = True
+                blocked_models.add(waiter.model)
+                next_refill = delay if next_refill is None else min(next_refill, delay)
+                continue
+
+            requests_bucket.take(1)
+            tokens_bucket.take(waiter.tokens)
+            self.in_flight += 1
+            self._waiters.remove(waiter)
+            waiter.future.set_result(None)
+
+        if next_refill is not None:
+            self._schedule_dispatch(next_refill)
+
+    def _schedule_dispatch(self, delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        when = loop.time() + delay
+        if self._timer is not None:
+            if self._timer.when() <= when:
+                return
+            self._timer.cancel()
+        self._timer = loop.call_at(when, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+
+# Global instance shared by all OpenAI call sites
+openai_limiter = OpenAIRateLimiter(
+    max_in_flight=settings.OPENAI_MAX_IN_FLIGHT,
+    default_limit=ModelRateLimit(
+        requests_per_minute=settings.OPENAI_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.OPENAI_TOKENS_PER_MINUTE,
+    ),
+    model_limits=settings.OPENAI_MODEL_RATE_LIMITS,
+)
+
+OPENAI_IN_FLIGHT = registry.gauge(
+    "sciencebot_openai_in_flight", "OpenAI requests currently in flight"
+)
+OPENAI_QUEUE_DEPTH = registry.gauge(
+    "sciencebot_openai_queue_depth", "Callers waiting for an OpenAI lease"
+)
+OPENAI_LEASES = registry.counter(
+    "sciencebot_openai_leases_total",
+    "OpenAI leases by outcome (immediate, queued or throttled)",
+    labels=("outcome",),
+)
+OPENAI_WAIT_SECONDS = registry.counter(
+    "sciencebot_openai_wait_seconds_total", "Time spent waiting for OpenAI leases"
+)
+
+
+def _collect_limiter_metrics() -> None:
+    stats = openai_limiter.stats
+    OPENAI_IN_FLIGHT.set(openai_limiter.in_flight)
+    OPENAI_QUEUE_DEPTH.set(openai_limiter.queue_depth)
+    OPENAI_LEASES.set_total(stats.acquired - stats.queued, outcome="immediate")
+    OPENAI_LEASES.set_total(stats.queued - stats.throttled, outcome="queued")
+    OPENAI_LEASES.set_total(stats.throttled, outcome="throttled")
+    OPENAI_WAIT_SECONDS.set_total(stats.wait_seconds_total)
+
+
+registry.register_collector(_collect_limiter_metrics)
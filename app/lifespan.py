@@ -1,22 +1,45 @@
+import asyncio
+import contextlib
 from contextlib import asynccontextmanager
 from typing import TypedDict
 
 from fastapi import FastAPI
 
-from app.science_bot.agent.graph import get_graph
-from app.science_bot.agent.schemas import Graph
+from app.core.config import settings
+from app.core.ledger import request_ledger
+from app.core.loop_watchdog import loop_watchdog
+from app.services.outbound_queue import outbound_queue
+from app.warmup import WarmupState, shutdown, warm_up, warmup_state
 
 
 class AppLifespan(TypedDict):
-    science_bot_graph: Graph
+    warmup: WarmupState
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # noqa: ARG001
-    # Initialize the graph and store it in app state
-    graph = get_graph()
-    app.state.science_bot_graph = graph
+    # Import the agent, compile the graph (stored in app state) and open
+    # connections in the background; /ready reports when it is done
+    warmup_task = asyncio.create_task(warm_up(app))
+
+    # Periodically flush the request ledger to its local store
+    ledger_flush_task = asyncio.create_task(request_ledger.run_periodic_flush())
+
+    # Report synchronous work that blocks the event loop
+    background_tasks = [warmup_task, ledger_flush_task]
+    if settings.LOOP_WATCHDOG_ENABLED:
+        background_tasks.append(asyncio.create_task(loop_watchdog.run()))
 
     yield AppLifespan(
-        science_bot_graph=graph,
+        warmup=warmup_state,
     )
+
+    # Give queued replies a chance to be delivered before shutting down
+    await outbound_queue.drain(timeout=settings.OUTBOUND_DRAIN_TIMEOUT)
+
+    for task in background_tasks:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    await shutdown()
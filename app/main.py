@@ -1,11 +1,12 @@
 import logfire
 from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
-from scalar_fastapi import get_scalar_api_reference  # type: ignore
+from fastapi.responses import HTMLResponse, JSONResponse
 
 from app.core.config import Environment, settings
+from app.core.metrics import StageMetricsSpanProcessor
 from app.lifespan import lifespan
 from app.router import router as api_router
+from app.warmup import warmup_state
 
 app = FastAPI(
     lifespan=lifespan,
@@ -18,6 +19,7 @@ app = FastAPI(
 app.include_router(router=api_router)
 
 if settings.ENVIRONMENT == Environment.DEV:
+    from scalar_fastapi import get_scalar_api_reference  # type: ignore
 
     @app.get(path="/docs", include_in_schema=False)
     async def scalar_api_reference() -> HTMLResponse:
@@ -31,20 +33,26 @@ if settings.ENVIRONMENT == Environment.DEV:
 
 
 @app.get(path="/ready")
-async def readiness_check():
-    """Readiness check endpoint."""
-    return {
-        "status": "ok",
-    }
+async def readiness_check() -> JSONResponse:
+    """Readiness check endpoint (503 until the startup warm-up is done)."""
+    return JSONResponse(
+        status_code=200 if warmup_state.ready else 503,
+        content=warmup_state.report(),
+    )
 
 
-if settings.LOGFIRE_TOKEN:
-    logfire.configure(
-        service_name=settings.APP_NAME,
-        environment=settings.ENVIRONMENT.value,
-        token=settings.LOGFIRE_TOKEN,
-    )
+# Spans are always recorded locally to feed /metrics; they are only sent
+# to Logfire (and printed) when a token is configured.
+logfire.configure(
+    service_name=settings.APP_NAME,
+    environment=settings.ENVIRONMENT.value,
+    token=settings.LOGFIRE_TOKEN,
+    send_to_logfire="if-token-present",
+    console=None if settings.LOGFIRE_TOKEN else False,
+    additional_span_processors=[StageMetricsSpanProcessor()],
+)
 
+if settings.LOGFIRE_TOKEN:
     logfire.instrument_fastapi(app)
     logfire.instrument_httpx()
     logfire.instrument_openai()
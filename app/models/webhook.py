@@ -129,6 +129,12 @@ class SendMessageResponse(BaseModel):
 
     error: bool = Field(default=False, description="Whether there was an error")
     message: str | None = Field(default=None, description="Error message if any")
+    retryable: bool = Field(
+        default=False, description="Whether the error is transient and can be retried"
+    )
+    retry_after: float | None = Field(
+        default=None, description="Seconds before a retry can succeed, if known"
+    )
     data: SendMessageResponseData | None = Field(
         default=None, description="Response data"
     )
@@ -2,8 +2,12 @@
 
 from fastapi import APIRouter
 
+from app.routes.admin import router as admin_router
+from app.routes.metrics import router as metrics_router
 from app.routes.webhook import router as webhook_router
 
 router = APIRouter()
 
 router.include_router(router=webhook_router, tags=["webhook"])
+router.include_router(router=metrics_router, tags=["metrics"])
+router.include_router(router=admin_router, tags=["admin"])
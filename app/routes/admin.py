@@ -0,0 +1,65 @@
+"""Admin routes for production diagnosis (disabled unless ADMIN_TOKEN is set)."""
+
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.profiler import Profile, loop_profiler
+
+router = APIRouter(prefix="/admin")
+
+
+async def require_admin(authorization: str | None = Header(default=None)) -> None:
+    """Accept only ``Authorization: Bearer <ADMIN_TOKEN>``."""
+    if not settings.ADMIN_TOKEN:
+        # Hide the routes entirely when no token is configured
+        raise HTTPException(status_code=404)
+    expected = f"Bearer {settings.ADMIN_TOKEN}"
+    if authorization is None or not secrets.compare_digest(authorization, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def profile_response(profile: Profile) -> PlainTextResponse:
+    """Collapsed stacks, with the sample count and duration as headers."""
+    return PlainTextResponse(
+        content=profile.collapsed,
+        headers={
+            "X-Profile-Samples": str(profile.samples),
+            "X-Profile-Seconds": str(profile.seconds),
+        },
+    )
+
+
+@router.post(
+    path="/profile",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def profile_app(
+    seconds: float = Query(default=10, gt=0, le=settings.PROFILER_MAX_SECONDS),
+) -> PlainTextResponse:
+    """Sample the event loop of the whole app for some seconds."""
+    if loop_profiler.busy:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    return profile_response(await loop_profiler.profile(seconds=seconds))
+
+
+@router.post(
+    path="/profile/request",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def profile_next_request(
+    user_id: str | None = Query(default=None, description="Phone number"),
+    timeout: float = Query(default=60, gt=0, le=settings.PROFILER_MAX_SECONDS),
+) -> PlainTextResponse:
+    """Wait for the next message (of a user, or of anyone) and profile it."""
+    try:
+        profile = await loop_profiler.next_request_profile(
+            user_id=user_id, timeout=timeout
+        )
+    except TimeoutError:
+        raise HTTPException(status_code=408, detail="No message answered in time")
+    return profile_response(profile)
@@ -0,0 +1,17 @@
+"""Prometheus metrics route."""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import registry
+
+router = APIRouter()
+
+
+@router.get(path="/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Expose in-process metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        content=registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -1,12 +1,19 @@
 """Webhook routes for receiving messages from Evolution API."""
 
+import asyncio
+from collections.abc import Coroutine
+from typing import Any
+
 import logfire
 from fastapi import APIRouter, Request
 from pydantic import BaseModel
 
+from app.core.config import settings
+from app.core.deadline import Deadline
+from app.core.dedup_store import WEBHOOK_DUPLICATES, webhook_dedup
 from app.models.webhook import ParsedMessage, WebhookPayload
-from app.science_bot.core.service import process_message
 from app.services.evolution_service import evolution_service
+from app.services.outbound_queue import outbound_queue
 
 router = APIRouter()
 
@@ -16,10 +23,70 @@ class WebhookResponse(BaseModel):
     message: str | None = None
 
 
+# Strong references to fire-and-forget tasks so they are not garbage collected
+_background_tasks: set[asyncio.Task[None]] = set()
+
+
+def _background_task_done(task: asyncio.Task[None]) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and (error := task.exception()) is not None:
+        logfire.error("Background task failed", error=str(error), exc_info=error)
+
+
+def run_in_background(coroutine: Coroutine[Any, Any, None]) -> asyncio.Task[None]:
+    """Run a side effect concurrently, logging its errors instead of raising."""
+    # The task owns the coroutine, so cancelling it before its first step
+    # (e.g. after a fast small talk reply) closes the coroutine cleanly
+    task = asyncio.create_task(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+    return task
+
+
+async def mark_message_as_read(
+    phone_number: str, instance_name: str, message_id: str
+) -> None:
+    """Send the read receipt, logging failures."""
+    with logfire.span("mark_message_as_read"):
+        response = await evolution_service.mark_message_as_read(
+            phone_number=phone_number,
+            instance_name=instance_name,
+            message_id=message_id,
+        )
+        if response.error:
+            logfire.warn("Read receipt failed", error=response.message)
+
+
+async def claim_message(key: str) -> bool:
+    """Claim a message id, processing the message anyway if the store fails."""
+    try:
+        return await webhook_dedup.claim(key)
+    except Exception as e:
+        logfire.warn("Webhook dedup claim failed, processing anyway", error=str(e))
+        return True
+
+
+async def release_message(key: str) -> None:
+    """Release a message id so that a re-delivery is processed again."""
+    if not settings.DEDUP_ENABLED:
+        return
+    try:
+        await webhook_dedup.release(key)
+    except Exception as e:
+        logfire.warn("Webhook dedup release failed", error=str(e))
+
+
 @router.post(path="/webhook")
 @logfire.instrument("receive_webhook_message")
 async def receive_message(request: Request) -> WebhookResponse:
     """Receive and process incoming webhook messages from Evolution API."""
+    # The answer's time budget starts when the message arrives
+    deadline = (
+        Deadline.after(settings.MESSAGE_DEADLINE_SECONDS)
+        if settings.DEADLINE_ENABLED
+        else None
+    )
+
     try:
         body = await request.json()
         logfire.info("Webhook received", payload_size=len(str(body)))
@@ -43,37 +110,64 @@ async def receive_message(request: Request) -> WebhookResponse:
                 message_id=parsed_message.message_id,
             )
 
-            # Mark the incoming message as read
-            with logfire.span("mark_message_as_read"):
-                await evolution_service.mark_message_as_read(
+            # Drop re-deliveries of messages already in flight or processed
+            dedup_key = f"{webhook_payload.instance}:{parsed_message.message_id}"
+            if settings.DEDUP_ENABLED and not await claim_message(dedup_key):
+                WEBHOOK_DUPLICATES.inc()
+                logfire.info(
+                    "Duplicate webhook ignored", message_id=parsed_message.message_id
+                )
+                return WebhookResponse(status="success", message="duplicate")
+
+            # Mark the incoming message as read without delaying the reply
+            run_in_background(
+                mark_message_as_read(
                     phone_number=parsed_message.phone_number,
                     instance_name=webhook_payload.instance,
                     message_id=parsed_message.message_id,
                 )
+            )
 
-            # Show "typing" presence before processing
-            with logfire.span("send_typing_presence"):
-                await evolution_service.send_presence(
+            # Keep showing "typing" presence while the AI is processing
+            typing_presence = run_in_background(
+                evolution_service.keep_presence(
                     phone_number=parsed_message.phone_number,
                     instance_name=webhook_payload.instance,
                     state="composing",
                 )
+            )
 
-            # Process the message with the science bot
-            with logfire.span("process_message_with_ai"):
-                ai_response = await process_message(
-                    user_id=parsed_message.phone_number,
-                    message=parsed_message.text,
-                )
-                logfire.info("AI response generated", response_length=len(ai_response))
+            # Imported here so the agent stack (langchain, langgraph, openai)
+            # loads during the startup warm-up instead of at import time
+            from app.science_bot.core.service import process_message
 
-            # Send the AI-generated response back via Evolution API
-            with logfire.span("send_response_message"):
-                await evolution_service.send_message(
-                    phone_number=parsed_message.phone_number,
-                    message=ai_response,
-                    instance_name=webhook_payload.instance,
-                )
+            # Process the message with the science bot
+            try:
+                with logfire.span("process_message_with_ai"):
+                    ai_response = await process_message(
+                        user_id=parsed_message.phone_number,
+                        message=parsed_message.text,
+                        user_name=parsed_message.push_name,
+                        deadline=deadline,
+                    )
+                    logfire.info(
+                        "AI response generated", response_length=len(ai_response)
+                    )
+            except Exception:
+                # Nothing was sent, so let a re-delivery retry the message. Once
+                # any reply (fallback messages included) is queued, the key is
+                # kept so re-deliveries never run the pipeline or reply twice
+                await release_message(dedup_key)
+                raise
+            finally:
+                typing_presence.cancel()
+
+            # Queue the AI-generated response for delivery via Evolution API
+            outbound_queue.enqueue(
+                phone_number=parsed_message.phone_number,
+                text=ai_response,
+                instance_name=webhook_payload.instance,
+            )
 
             logfire.info("Message processed successfully", phone_number=parsed_message.phone_number)
         else:
@@ -1,15 +1,19 @@
+from functools import cache
 from typing import Literal
 
 import logfire
+from langchain_core.messages import AIMessage, ToolMessage
 from langchain_core.messages.base import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import RunnableConfig
-from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph  # type: ignore
 from langgraph.prebuilt import ToolNode
-from pydantic import SecretStr
 
+from app.core.circuit_breaker import CircuitOpenError
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded
+from app.core.llm import STAGE_CONFIGS, LLMStage, get_chat_model, invoke_chat_model
+from app.core.rate_limiter import estimate_tokens
 from app.science_bot.agent.prompts.system_prompt import get_system_prompt
 from app.science_bot.agent.schemas import (
     Context,
@@ -18,13 +22,9 @@ from app.science_bot.agent.schemas import (
     OutputState,
     OverallState,
 )
-from app.science_bot.agent.tools.search_documents.tool import TOOLS
-
-graph_builder: StateGraph[OverallState, Context, InputState, OutputState] = StateGraph(
-    state_schema=OverallState,
-    input_schema=InputState,
-    output_schema=OutputState,
-    context_schema=Context,
+from app.science_bot.agent.tools.search_documents.tool import (
+    TOOLS,
+    SearchDocumentsResponse,
 )
 
 
@@ -39,18 +39,12 @@ async def chat(
 
     # Initialize OpenAI model
     with logfire.span("initialize_model"):
-        model = ChatOpenAI(
-            model=settings.OPENAI_MODEL,
-            api_key=SecretStr(
-                secret_value=settings.OPENAI_API_KEY,
-            ),
-            max_completion_tokens=settings.OPENAI_MAX_TOKENS,
-            temperature=settings.OPENAI_TEMPERATURE,
-        )
+        stage_config = STAGE_CONFIGS[LLMStage.AGENT]
+        model = get_chat_model(stage_config.model, stage_config.max_tokens)
         logfire.info(
             "Model initialized",
-            model=settings.OPENAI_MODEL,
-            max_tokens=settings.OPENAI_MAX_TOKENS,
+            model=stage_config.model,
+            max_tokens=stage_config.max_tokens,
             temperature=settings.OPENAI_TEMPERATURE,
         )
 
@@ -70,7 +64,11 @@ async def chat(
 
     # Get system prompt with phone number context
     with logfire.span("prepare_prompt"):
-        system_prompt_text = get_system_prompt(phone_number=context.phone_number)
+        system_prompt_text = get_system_prompt(
+            phone_number=context.phone_number,
+            schools=context.schools,
+            user_name=context.user_name,
+        )
         prompt: ChatPromptTemplate = ChatPromptTemplate.from_messages(  # type: ignore
             messages=[
                 (
@@ -85,8 +83,16 @@ async def chat(
     # Invoke the model
     with logfire.span("invoke_model"):
         try:
-            response: BaseMessage = await (prompt | model_with_tools).ainvoke(  # type: ignore
-                input={"messages": state.messages}
+            estimated_tokens = stage_config.max_tokens + estimate_tokens(
+                system_prompt_text, *(str(msg.content) for msg in state.messages)
+            )
+            response: BaseMessage = await invoke_chat_model(
+                stage=LLMStage.AGENT,
+                runnable=prompt | model_with_tools,  # type: ignore
+                input={"messages": state.messages},
+                model=stage_config.model,
+                estimated_tokens=estimated_tokens,
+                deadline=context.deadline,
             )
             logfire.info(
                 "Model invocation successful",
@@ -123,15 +129,109 @@ async def should_continue(state: OverallState) -> Literal["tools"] | Literal["__
     return "__end__"
 
 
-graph_builder.add_node(node="chat", action=chat)  # type: ignore
-graph_builder.add_node(node="tools", action=ToolNode(tools=TOOLS))  # type: ignore
+def _latest_tool_results(messages: list[BaseMessage]) -> list[ToolMessage]:
+    """Tool messages produced after the last chat model response."""
+    results: list[ToolMessage] = []
+    for message in reversed(messages):
+        if not isinstance(message, ToolMessage):
+            break
+        results.append(message)
+    return list(reversed(results))
+
+
+@logfire.instrument("after_tools")
+async def after_tools(
+    state: OverallState,
+) -> Literal["chat"] | Literal["direct_answer"]:
+    """Skip the second chat pass when every tool call produced a final answer."""
+    results = _latest_tool_results(state.messages)
+
+    if results and all(
+        isinstance(result.artifact, SearchDocumentsResponse) and result.artifact.success
+        for result in results
+    ):
+        logfire.info("Routing to direct answer", tool_result_count=len(results))
+        return "direct_answer"
+
+    logfire.info("Routing back to chat")
+    return "chat"
+
+
+@logfire.instrument("direct_answer")
+async def direct_answer(state: OverallState) -> dict[str, list[BaseMessage]]:
+    """Return the answers generated by the tools as the final message."""
+    answers = [
+        result.artifact.message
+        for result in _latest_tool_results(state.messages)
+        if isinstance(result.artifact, SearchDocumentsResponse)
+    ]
+    return {"messages": [AIMessage(content="\n\n".join(answers))]}
+
+
+def handle_tool_error(e: Exception) -> str:
+    """Turn a tool failure into an error result the model can react to.
+
+    An open circuit or an exhausted deadline is re-raised instead, ending the
+    run so ``process_message`` replies with its fallback message. The handler
+    is passed explicitly since the ``ToolNode`` default differs between
+    langgraph versions (older ones catch every exception).
+
+    Raises:
+        CircuitOpenError: If a dependency of the tool is unavailable
+        DeadlineExceeded: If the message ran out of time
+    """
+    if isinstance(e, (CircuitOpenError, DeadlineExceeded)):
+        raise e
+
+    logfire.warn("Tool call failed", error=str(e), error_type=type(e).__name__)
+    return f"Error: {e!r}\n Please fix your mistakes."
+
+
+def create_graph_builder(
+    direct_return: bool,
+) -> StateGraph[OverallState, Context, InputState, OutputState]:
+    """Build the agent graph.
+
+    Args:
+        direct_return: Whether successful ``search_documents`` answers end the
+            run directly instead of going back through the chat node
+
+    Returns:
+        The graph builder, ready to compile
+    """
+    graph_builder: StateGraph[OverallState, Context, InputState, OutputState] = (
+        StateGraph(
+            state_schema=OverallState,
+            input_schema=InputState,
+            output_schema=OutputState,
+            context_schema=Context,
+        )
+    )
+
+    graph_builder.add_node(node="chat", action=chat)  # type: ignore
+    graph_builder.add_node(
+        node="tools",
+        action=ToolNode(tools=TOOLS, handle_tool_errors=handle_tool_error),  # type: ignore
+    )
+
+    graph_builder.set_entry_point("chat")
+    graph_builder.add_conditional_edges(
+        source="chat", path=should_continue, path_map=["tools", "__end__"]
+    )
+
+    if direct_return:
+        graph_builder.add_node(node="direct_answer", action=direct_answer)  # type: ignore
+        graph_builder.add_conditional_edges(
+            source="tools", path=after_tools, path_map=["chat", "direct_answer"]
+        )
+        graph_builder.add_edge(start_key="direct_answer", end_key="__end__")
+    else:
+        graph_builder.add_edge(start_key="tools", end_key="chat")
 
-graph_builder.set_entry_point("chat")
-graph_builder.add_conditional_edges(
-    source="chat", path=should_continue, path_map=["tools", "__end__"]
-)
-graph_builder.add_edge(start_key="tools", end_key="chat")
+    return graph_builder
 
 
-def get_graph() -> Graph:
-    return graph_builder.compile()  # type: ignore
+@cache
+def get_graph(direct_return: bool = settings.SEARCH_DIRECT_RETURN) -> Graph:
+    """Compiled agent graph, built once per mode and reused by every message."""
+    return create_graph_builder(direct_return).compile()  # type: ignore
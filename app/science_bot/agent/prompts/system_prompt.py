@@ -3,9 +3,6 @@
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-import phonenumbers
-from phonenumbers import timezone as phone_timezone
-
 from app.science_bot.agent.tools.search_documents.tool import SchoolEnum
 
 
@@ -18,6 +15,10 @@ def get_country_timezone(phone_number: str) -> str:
     Returns:
         IANA timezone identifier
     """
+    # phonenumbers loads large metadata tables on import, only when needed
+    import phonenumbers
+    from phonenumbers import timezone as phone_timezone
+
     try:
         if not phone_number.startswith("+"):
             phone_number = f"+{phone_number}"
@@ -53,11 +54,41 @@ def get_current_time_for_phone(phone_number: str) -> str:
         return current_time.strftime(format="%Y-%m-%d %H:%M:%S UTC")
 
 
-def get_system_prompt(phone_number: str | None = None) -> str:
+def get_user_profile_info(schools: list[str], user_name: str | None) -> str:
+    """Describe what is remembered about the user from earlier conversations.
+
+    Args:
+        schools: Schools of the user's last successful search
+        user_name: User's WhatsApp display name
+
+    Returns:
+        Prompt section, or an empty string if nothing is known
+    """
+    lines: list[str] = []
+    if user_name:
+        lines.append(f"- WhatsApp name: {user_name}")
+    if schools:
+        lines.append(f"- School(s) from previous conversations: {', '.join(schools)}")
+        lines.append(
+            "- Use these schools for search_documents without asking again, "
+            "unless the user mentions a different school"
+        )
+    if not lines:
+        return ""
+    return "\n\n<known_user>\n" + "\n".join(lines) + "\n</known_user>"
+
+
+def get_system_prompt(
+    phone_number: str | None = None,
+    schools: list[str] | None = None,
+    user_name: str | None = None,
+) -> str:
     """Generate the system prompt with current time information.
 
     Args:
         phone_number: User's phone number to determine timezone
+        schools: Schools remembered from the user's previous conversations
+        user_name: User's WhatsApp display name
 
     Returns:
         Complete system prompt string
@@ -66,6 +97,7 @@ def get_system_prompt(phone_number: str | None = None) -> str:
     if phone_number:
         current_time: str = get_current_time_for_phone(phone_number=phone_number)
         time_info: str = f"\n\nCurrent time for this user: {current_time}"
+    profile_info = get_user_profile_info(schools or [], user_name)
 
     schools_list = "\n".join([f"- {school.value}" for school in SchoolEnum])
 
@@ -130,7 +162,7 @@ GENERAL GUIDELINES:
 
 SCHOOL IDENTIFICATION:
 - IMPORTANT: When a user asks about academic info (curriculum, courses, requirements), you MUST first identify their school/faculty
-- If school is not specified, ask directly in Spanish: "¿De qué escuela o facultad eres?"
+- If school is not specified (and not listed in <known_user>), ask directly in Spanish: "¿De qué escuela o facultad eres?"
 - Once you know the school, use that information to search in the correct documents
 - Do not attempt to search across all schools
 
@@ -199,4 +231,4 @@ FORMATTING RULES (CRITICAL):
 - AVOID over-formatting with excessive bold text or headers
 
 REMEMBER: WhatsApp only supports single character formatting: *bold* _italic_ ~strikethrough~ ```monospace```
-</forbidden>{time_info}"""
+</forbidden>{time_info}{profile_info}"""
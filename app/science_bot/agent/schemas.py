@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Annotated
 
 from langchain_core.messages import BaseMessage
@@ -6,6 +6,8 @@ from langchain_core.runnables import RunnableConfig
 from langgraph.graph.message import add_messages  # type: ignore
 from langgraph.graph.state import CompiledStateGraph  # type: ignore
 
+from app.core.deadline import Deadline
+
 Messages = Annotated[list[BaseMessage], add_messages]
 
 
@@ -13,12 +15,21 @@ Messages = Annotated[list[BaseMessage], add_messages]
 class Context:
     user_id: str | None = None
     phone_number: str | None = None
+    # Remembered from earlier conversations (see app.core.profile_store)
+    schools: list[str] = field(default_factory=list)
+    user_name: str | None = None
+    # Time budget of the message (see app.core.deadline)
+    deadline: Deadline | None = None
 
     @classmethod
     def from_config(cls, config: RunnableConfig) -> "Context":
+        configurable = config.get("configurable", {})
         return cls(
-            user_id=config.get("configurable", {}).get("user_id"),
-            phone_number=config.get("configurable", {}).get("phone_number"),
+            user_id=configurable.get("user_id"),
+            phone_number=configurable.get("phone_number"),
+            schools=configurable.get("schools", []),
+            user_name=configurable.get("user_name"),
+            deadline=configurable.get("deadline"),
         )
 
 
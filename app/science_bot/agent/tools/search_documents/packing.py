@@ -0,0 +1,93 @@
+"""Fit the retrieved pages into the answer generator's token budget.
+
+Pages carry the token counts and summary stored at ingest time (see
+``app.scripts.enrich_pages``), so packing needs no tokenization at request
+time. Pages are considered from the most to the least relevant. Each page
+goes in verbatim if it fits the remaining budget, as its summary if only
+that fits, or is left out. The best page is always kept (as its smaller
+form) so the answer has something to work with. Pages ingested before
+enrichment fall back to the ~4 characters per token estimate.
+"""
+
+from __future__ import annotations
+
+from enum import StrEnum
+
+import logfire
+
+from app.core.metrics import registry
+from app.core.mongo_db import PageMatch
+from app.core.rate_limiter import estimate_tokens
+
+PACKED_PAGES = registry.counter(
+    "sciencebot_packed_pages_total",
+    "Retrieved pages by how they were sent to the answer generator",
+    labels=("form",),
+)
+
+
+class PageForm(StrEnum):
+    """How a page is sent to the answer generator."""
+
+    FULL = "full"
+    SUMMARY = "summary"
+    DROPPED = "dropped"
+
+
+def page_tokens(page: PageMatch) -> int:
+    """Tokens of the full page text."""
+    if page.token_count is not None:
+        return page.token_count
+    return estimate_tokens(page.text)
+
+
+def summary_tokens(page: PageMatch) -> int | None:
+    """Tokens of the page summary, or None if the page has no summary."""
+    if not page.summary:
+        return None
+    if page.summary_token_count is not None:
+        return page.summary_token_count
+    return estimate_tokens(page.summary)
+
+
+def pack_pages(pages: list[PageMatch], budget: int) -> dict[str, PageForm]:
+    """Choose the full text or the summary of each page to fit a token budget.
+
+    Args:
+        pages: Retrieved pages (of one or several sources)
+        budget: Maximum tokens of page content to send
+
+    Returns:
+        The form chosen for each page, by page id
+    """
+    forms: dict[str, PageForm] = {}
+    remaining = budget
+
+    for page in sorted(pages, key=lambda page: page.score, reverse=True):
+        full = page_tokens(page)
+        summary = summary_tokens(page)
+
+        if full <= remaining:
+            forms[page.id] = PageForm.FULL
+            remaining -= full
+        elif summary is not None and summary <= remaining:
+            forms[page.id] = PageForm.SUMMARY
+            remaining -= summary
+        elif not forms:
+            # Never send an empty context: keep the best page in its smaller form
+            forms[page.id] = PageForm.FULL if summary is None else PageForm.SUMMARY
+            remaining = 0
+        else:
+            forms[page.id] = PageForm.DROPPED
+
+    for form in forms.values():
+        PACKED_PAGES.inc(form=form)
+    logfire.info(
+        "Pages packed",
+        budget=budget,
+        used=budget - remaining,
+        full=sum(form is PageForm.FULL for form in forms.values()),
+        summary=sum(form is PageForm.SUMMARY for form in forms.values()),
+        dropped=sum(form is PageForm.DROPPED for form in forms.values()),
+    )
+    return forms
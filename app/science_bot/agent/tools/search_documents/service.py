@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import time
+
 import logfire
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
-from pydantic import BaseModel, Field, SecretStr
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel, Field
 
+from app.core.circuit_breaker import CircuitOpenError
 from app.core.config import settings
-from app.core.mongo_db import DocumentInfo, MongoDBService, PageMatch
+from app.core.deadline import DEADLINE_ACTIONS, Deadline, DeadlineExceeded
+from app.core.ledger import current_entry
+from app.core.llm import LLMStage, invoke_cascade
+from app.core.metrics import CACHE_REQUESTS
+from app.core.mongo_db import (
+    DocumentInfo,
+    FAQMatch,
+    MongoDBService,
+    PageMatch,
+    get_mongo_service,
+)
+from app.core.overload import LoadMode, overload_controller
+from app.core.rate_limiter import estimate_tokens
 from app.science_bot.agent.prompts.answer_generator_prompt import (
     ANSWER_GENERATOR_SYSTEM_PROMPT,
     ANSWER_GENERATOR_USER_PROMPT_TEMPLATE,
@@ -14,6 +29,15 @@ from app.science_bot.agent.prompts.answer_generator_prompt import (
 from app.science_bot.agent.prompts.document_selector_prompt import (
     DOCUMENT_SELECTOR_SYSTEM_PROMPT,
 )
+from app.science_bot.agent.tools.search_documents.packing import (
+    PageForm,
+    pack_pages,
+)
+from app.science_bot.agent.tools.search_documents.speculation import (
+    current_speculation,
+)
+
+GENERAL_INFORMATION_SCHOOL = "Información General"
 
 
 class AnswerGenerationResponse(BaseModel):
@@ -24,6 +48,24 @@ class AnswerGenerationResponse(BaseModel):
     pages_referenced: list[int] = Field(description="Referenced page numbers")
 
 
+class RetrievedSource(BaseModel):
+    """Best pages found for one school."""
+
+    school: str = Field(description="School the pages were searched for")
+    document_name: str = Field(description="Document the pages belong to")
+    pages: list[PageMatch] = Field(description="Relevant pages found")
+    avg_score: float = Field(description="Average relevance score of the pages")
+
+
+class RetrievalError(Exception):
+    """No usable pages were found for a school."""
+
+    def __init__(self, message: str, document_used: str | None = None) -> None:
+        super().__init__(message)
+        self.message = message
+        self.document_used = document_used
+
+
 class SearchDocumentsServiceResponse(BaseModel):
     """Final service response."""
 
@@ -38,12 +80,20 @@ class SearchDocumentsServiceResponse(BaseModel):
 class SearchDocumentsService:
     """Service for document search and answer generation."""
 
-    def __init__(self):
-        self.mongo_service = MongoDBService()
-        self.llm = ChatOpenAI(
-            model=settings.OPENAI_MODEL,
-            api_key=SecretStr(secret_value=settings.OPENAI_API_KEY),
-            temperature=settings.OPENAI_TEMPERATURE,
+    def __init__(
+        self,
+        mongo_service: MongoDBService | None = None,
+        deadline: Deadline | None = None,
+    ):
+        # The shared service keeps one connection pool and catalog for the app
+        self.mongo_service = mongo_service or get_mongo_service()
+        # Time budget of the message; stages do less (or abort) as it runs out
+        self.deadline = deadline
+
+    def _time_is_tight(self) -> bool:
+        return (
+            self.deadline is not None
+            and self.deadline.remaining() < settings.DEADLINE_TIGHT_SECONDS
         )
 
     async def __aenter__(self) -> SearchDocumentsService:
@@ -57,25 +107,81 @@ class SearchDocumentsService:
         exc_val: BaseException | None,
         exc_tb: object,
     ) -> None:
-        """Context manager exit."""
-        await self.mongo_service.close_connection()
+        """Context manager exit.
+
+        The MongoDB connection is shared and stays open for the next search.
+        """
 
-    async def get_relevant_documents(self, school: str) -> list[DocumentInfo]:
+    async def get_relevant_documents(
+        self, school: str, general_documents: list[DocumentInfo] | None = None
+    ) -> list[DocumentInfo]:
         """Get relevant documents from school and General Information.
 
         Args:
             school: School name
+            general_documents: General Information documents already fetched
+                (shared when several schools are searched at once)
 
         Returns:
             List of documents with their descriptions
         """
         school_docs = await self.mongo_service.get_documents_by_school(school)
+        if general_documents is None:
+            general_documents = await self.get_general_documents()
+
+        all_documents = school_docs.documents + general_documents
+        return all_documents
+
+    async def get_general_documents(self) -> list[DocumentInfo]:
+        """Get the General Information documents shared by every school."""
         general_docs = await self.mongo_service.get_documents_by_school(
-            "Información General"
+            GENERAL_INFORMATION_SCHOOL
         )
+        return general_docs.documents
 
-        all_documents = school_docs.documents + general_docs.documents
-        return all_documents
+    async def embed_query(self, query: str) -> list[float]:
+        """Embed the query, reusing the speculative embedding when it matches.
+
+        Args:
+            query: User question
+
+        Returns:
+            The query embedding
+        """
+        speculation = current_speculation()
+        if speculation is not None:
+            embedding = await speculation.embedding_for(query)
+            if embedding is not None:
+                return embedding
+
+        return await self.mongo_service.query_to_embedding(query)
+
+    async def match_faq(
+        self, query_embedding: list[float], school: str
+    ) -> FAQMatch | None:
+        """Find a stored FAQ answer close enough to the question.
+
+        Args:
+            query_embedding: Embedding of the user question
+            school: School name
+
+        Returns:
+            The best FAQ match above the similarity threshold, or None
+        """
+        matches = await self.mongo_service.search_faq(
+            query_embedding=query_embedding,
+            schools=[school, GENERAL_INFORMATION_SCHOOL],
+        )
+
+        # Under heavy load a close-enough stored answer beats a slow one
+        threshold = settings.FAQ_SIMILARITY_THRESHOLD
+        if overload_controller.mode >= LoadMode.CACHED_FIRST:
+            threshold = min(threshold, settings.OVERLOAD_FAQ_SIMILARITY_THRESHOLD)
+
+        if not matches or matches[0].score < threshold:
+            return None
+
+        return matches[0]
 
     async def select_top_documents(
         self, query: str, documents: list[DocumentInfo], top_k: int = 2
@@ -116,19 +222,38 @@ Return ONLY the exact document names, one per line, without explanations or numb
             HumanMessage(content=user_prompt),
         ]
 
-        response = await self.llm.ainvoke(messages)
-        response_text = str(response.content).strip()  # type: ignore
+        def parse(response: BaseMessage) -> list[str]:
+            # Extract document names (one per line)
+            response_text = str(response.content).strip()
+            return [line.strip() for line in response_text.split("\n") if line.strip()]
 
-        # Parse response: extract document names (one per line)
-        selected_docs = [
-            line.strip() for line in response_text.split("\n") if line.strip()
-        ]
+        # A cheap selection is kept only if it names available documents
+        available = {doc.name for doc in documents}
+
+        def names_available_documents(response: BaseMessage) -> bool:
+            selected = parse(response)[:top_k]
+            return bool(selected) and all(name in available for name in selected)
+
+        response = await invoke_cascade(
+            stage=LLMStage.SELECTOR,
+            input=messages,
+            estimated_prompt_tokens=estimate_tokens(
+                DOCUMENT_SELECTOR_SYSTEM_PROMPT, user_prompt
+            ),
+            accept=names_available_documents,
+            deadline=self.deadline,
+        )
+        selected_docs = parse(response)
 
         # Return only top_k documents
         return selected_docs[:top_k]
 
     async def search_in_document(
-        self, query: str, document_name: str, limit: int = 10
+        self,
+        query: str,
+        document_name: str,
+        limit: int = 10,
+        query_embedding: list[float] | None = None,
     ) -> list[PageMatch]:
         """Search in selected document.
 
@@ -136,34 +261,88 @@ Return ONLY the exact document names, one per line, without explanations or numb
             query: User question
             document_name: Document name to search in
             limit: Maximum number of pages to return
+            query_embedding: Precomputed embedding of the query
 
         Returns:
             List of relevant pages
         """
-        result = await self.mongo_service.search_best_matches(
-            query=query, document_name=document_name, limit=limit
+        start = time.perf_counter()
+
+        # Pages pre-fetched while the agent was deciding to call the tool
+        speculation = current_speculation()
+        matches = (
+            await speculation.pages_for(query, document_name, limit)
+            if speculation is not None
+            else None
         )
-        return result.matches
+        if matches is not None:
+            logfire.info("Speculative pages reused", document=document_name)
+        else:
+            result = await self.mongo_service.search_best_matches(
+                query=query,
+                document_name=document_name,
+                limit=limit,
+                query_embedding=query_embedding,
+            )
+            matches = result.matches
+
+        ledger_entry = current_entry()
+        if ledger_entry is not None:
+            ledger_entry.retrieval_ms += (time.perf_counter() - start) * 1000
+        return matches
 
     async def generate_answer(
-        self, query: str, document_name: str, pages: list[PageMatch]
+        self, query: str, sources: list[RetrievedSource]
     ) -> AnswerGenerationResponse:
         """Generate final answer using AI.
 
         Args:
             query: User question
-            document_name: Document name used
-            pages: Relevant pages found
+            sources: Relevant pages found, one source per school searched
 
         Returns:
             Generated response
         """
-        pages_content = "\n\n---\n\n".join(
-            [
-                f"[Page {page.page}]\n{page.text}\n(Relevance: {page.score:.4f})"
-                for page in pages
+
+        # Fit the pages into the token budget (split evenly between sources).
+        # Forms are kept per source: a page found for two schools (e.g. from
+        # General Information) is packed within each source's own budget
+        budget = settings.ANSWER_CONTEXT_TOKEN_BUDGET
+        with logfire.span("pack_pages"):
+            source_forms: list[dict[str, PageForm]] = [
+                pack_pages(source.pages, budget // len(sources))
+                if budget > 0
+                else {page.id: PageForm.FULL for page in source.pages}
+                for source in sources
             ]
-        )
+
+        def format_page(page: PageMatch, form: PageForm) -> str:
+            if form is PageForm.SUMMARY:
+                header, content = f"[Page {page.page} - summary]", page.summary
+            else:
+                header, content = f"[Page {page.page}]", page.text
+            return f"{header}\n{content}\n(Relevance: {page.score:.4f})"
+
+        def format_pages(pages: list[PageMatch], forms: dict[str, PageForm]) -> str:
+            return "\n\n---\n\n".join(
+                format_page(page, forms[page.id])
+                for page in pages
+                if forms[page.id] is not PageForm.DROPPED
+            )
+
+        if len(sources) == 1:
+            document_name = sources[0].document_name
+            pages_content = format_pages(sources[0].pages, source_forms[0])
+        else:
+            # Label each school's pages so the answer can compare them
+            document_name = "; ".join(
+                f"{source.school}: {source.document_name}" for source in sources
+            )
+            pages_content = "\n\n===\n\n".join(
+                f"SCHOOL: {source.school} (document: {source.document_name})\n\n"
+                + format_pages(source.pages, forms)
+                for source, forms in zip(sources, source_forms, strict=True)
+            )
 
         messages: list[SystemMessage | HumanMessage] = [
             SystemMessage(content=ANSWER_GENERATOR_SYSTEM_PROMPT),
@@ -176,8 +355,28 @@ Return ONLY the exact document names, one per line, without explanations or numb
             ),
         ]
 
-        response = await self.llm.ainvoke(messages)
-        pages_referenced = [page.page for page in pages]
+        # Short on time: ask for a shorter answer
+        max_tokens = None
+        if self._time_is_tight():
+            max_tokens = settings.DEADLINE_ANSWER_MAX_TOKENS
+            DEADLINE_ACTIONS.inc(stage=LLMStage.ANSWER, action="shorter_answer")
+
+        response = await invoke_cascade(
+            stage=LLMStage.ANSWER,
+            input=messages,
+            estimated_prompt_tokens=estimate_tokens(
+                *(str(message.content) for message in messages)
+            ),
+            accept=lambda response: bool(str(response.content).strip()),
+            max_tokens=max_tokens,
+            deadline=self.deadline,
+        )
+        pages_referenced = [
+            page.page
+            for source, forms in zip(sources, source_forms, strict=True)
+            for page in source.pages
+            if forms[page.id] is not PageForm.DROPPED
+        ]
 
         return AnswerGenerationResponse(
             answer=str(response.content).strip(),  # type: ignore
@@ -185,13 +384,188 @@ Return ONLY the exact document names, one per line, without explanations or numb
             pages_referenced=pages_referenced,
         )
 
+    async def retrieve_best_pages(
+        self,
+        query: str,
+        school: str,
+        query_embedding: list[float],
+        max_pages: int,
+        general_documents: list[DocumentInfo] | None = None,
+    ) -> RetrievedSource:
+        """Select the best documents of a school and find their relevant pages.
+
+        Args:
+            query: User question
+            school: School to search in
+            query_embedding: Precomputed embedding of the query
+            max_pages: Maximum number of pages to return
+            general_documents: General Information documents already fetched
+
+        Returns:
+            The best pages found
+
+        Raises:
+            RetrievalError: If no relevant pages were found
+        """
+        # Under load, search a single document and send fewer pages
+        max_documents = 2
+        load_mode = overload_controller.mode
+        if load_mode >= LoadMode.REDUCED:
+            max_documents = 1
+            max_pages = min(max_pages, settings.OVERLOAD_MAX_PAGES)
+            logfire.info(
+                "Degraded retrieval",
+                load_mode=load_mode.name,
+                max_documents=max_documents,
+                max_pages=max_pages,
+            )
+
+        # Short on time: skip the fallback document and send fewer pages
+        if self.deadline is not None:
+            remaining = self.deadline.remaining()
+            if max_documents > 1 and remaining < settings.DEADLINE_FALLBACK_MIN_SECONDS:
+                max_documents = 1
+                DEADLINE_ACTIONS.inc(stage="retrieval", action="skip_fallback")
+            if self._time_is_tight() and max_pages > settings.DEADLINE_MAX_PAGES:
+                max_pages = settings.DEADLINE_MAX_PAGES
+                DEADLINE_ACTIONS.inc(stage="retrieval", action="fewer_pages")
+            logfire.info(
+                "Retrieval sized to the deadline",
+                remaining=round(remaining, 3),
+                max_documents=max_documents,
+                max_pages=max_pages,
+            )
+
+        # Step 1: Get relevant documents
+        with logfire.span("get_relevant_documents"):
+            documents = await self.get_relevant_documents(school, general_documents)
+            logfire.info(
+                "Documents retrieved", school=school, document_count=len(documents)
+            )
+
+            if not documents:
+                raise RetrievalError(f"No documents found for school: {school}")
+
+        # Step 2: Select TOP 2 documents in a single LLM call (optimized)
+        with logfire.span("select_top_documents"):
+            selected_documents = await self.select_top_documents(
+                query, documents, top_k=max_documents
+            )
+            logfire.info(
+                "Documents selected",
+                selected_count=len(selected_documents),
+                documents=selected_documents,
+            )
+
+            if not selected_documents:
+                raise RetrievalError(
+                    "Could not select relevant documents for the query."
+                )
+
+        # Step 3: Try up to 2 documents, keeping the best results
+        with logfire.span("search_in_documents"):
+            best_pages: list[PageMatch] = []
+            best_document: str | None = None
+            best_avg_score = 0.0
+
+            for doc_name in selected_documents[:max_documents]:  # Max 2 attempts
+                pages = await self.search_in_document(
+                    query,
+                    doc_name,
+                    limit=max_pages,
+                    query_embedding=query_embedding,
+                )
+
+                if not pages:
+                    logfire.warn("No pages found in document", document=doc_name)
+                    continue  # Try next document
+
+                # Calculate average relevance score
+                avg_score = sum(p.score for p in pages) / len(pages)
+                logfire.info(
+                    "Pages found in document",
+                    document=doc_name,
+                    page_count=len(pages),
+                    avg_score=round(avg_score, 4),
+                )
+
+                # If we found excellent results (>= 0.75), use immediately
+                if avg_score >= 0.75:
+                    best_pages = pages
+                    best_document = doc_name
+                    best_avg_score = avg_score
+                    logfire.info(
+                        "Excellent results found, stopping search",
+                        avg_score=round(avg_score, 4),
+                    )
+                    break  # No need to try second document
+
+                # Keep track of the best results so far
+                if avg_score > best_avg_score:
+                    best_pages = pages
+                    best_document = doc_name
+                    best_avg_score = avg_score
+
+            # Check if we found any valid results
+            if not best_pages or best_document is None:
+                logfire.warn("No relevant pages found in any document")
+                raise RetrievalError(
+                    f"No relevant information found in available documents for: {school}",
+                    document_used=selected_documents[0] if selected_documents else None,
+                )
+
+        return RetrievedSource(
+            school=school,
+            document_name=best_document,
+            pages=best_pages,
+            avg_score=best_avg_score,
+        )
+
+    async def answer_from_sources(
+        self, query: str, sources: list[RetrievedSource]
+    ) -> SearchDocumentsServiceResponse:
+        """Generate the final answer from the retrieved pages.
+
+        Args:
+            query: User question
+            sources: Relevant pages found, one source per school searched
+
+        Returns:
+            Final service response
+        """
+        # Step 4: Generate final answer with the best pages found
+        with logfire.span("generate_answer"):
+            answer_response = await self.generate_answer(query, sources)
+            logfire.info(
+                "Answer generated successfully",
+                document=answer_response.document_used,
+                pages_used=len(answer_response.pages_referenced),
+                final_score=round(min(source.avg_score for source in sources), 4),
+            )
+
+        ledger_entry = current_entry()
+        if ledger_entry is not None:
+            ledger_entry.document_used = answer_response.document_used
+
+        return SearchDocumentsServiceResponse(
+            success=True,
+            message=answer_response.answer,
+            document_used=answer_response.document_used,
+            pages_count=len(answer_response.pages_referenced),
+        )
+
     @logfire.instrument("search_and_answer")
     async def search_and_answer(
-        self, query: str, school: str, max_pages: int = 5
+        self,
+        query: str,
+        school: str,
+        max_pages: int = settings.PAGES_SEARCH_LIMIT,
+        use_faq: bool = True,
     ) -> SearchDocumentsServiceResponse:
         """Complete pipeline with optimized document selection and fallback.
 
         This method implements a smart retry strategy:
+        0. Returns a stored FAQ answer if the question is close enough to one
         1. Selects TOP 2 most relevant documents in a single LLM call
         2. Tries the first document and validates result quality
         3. If quality is low (avg_score < 0.75), tries the second document
@@ -203,104 +577,143 @@ Return ONLY the exact document names, one per line, without explanations or numb
         Args:
             query: User question
             school: School to search in
-            max_pages: Maximum number of pages to consult (default: 5)
+            max_pages: Maximum number of pages to consult (default: PAGES_SEARCH_LIMIT)
+            use_faq: Whether to try the precomputed FAQ answers first
 
         Returns:
             Final service response with quality metrics
+
+        Raises:
+            CircuitOpenError: If a dependency's circuit is open
+            DeadlineExceeded: If the message deadline left no time for a stage
         """
+        ledger_entry = current_entry()
+        if ledger_entry is not None:
+            ledger_entry.school = school
+
         try:
-            # Step 1: Get relevant documents
-            with logfire.span("get_relevant_documents"):
-                documents = await self.get_relevant_documents(school)
-                logfire.info("Documents retrieved", school=school, document_count=len(documents))
-
-                if not documents:
-                    return SearchDocumentsServiceResponse(
-                        success=False,
-                        message=f"No documents found for school: {school}",
+            # Step 0: Embed the query once and try the FAQ fast path
+            with logfire.span("embed_query"):
+                query_embedding = await self.embed_query(query)
+
+            if use_faq and settings.FAQ_ENABLED:
+                with logfire.span("match_faq"):
+                    faq_match = await self.match_faq(query_embedding, school)
+                    CACHE_REQUESTS.inc(
+                        cache="faq", result="hit" if faq_match else "miss"
+                    )
+                    logfire.info(
+                        "FAQ lookup completed",
+                        hit=faq_match is not None,
+                        score=round(faq_match.score, 4) if faq_match else None,
                     )
 
-            # Step 2: Select TOP 2 documents in a single LLM call (optimized)
-            with logfire.span("select_top_documents"):
-                selected_documents = await self.select_top_documents(
-                    query, documents, top_k=2
-                )
-                logfire.info(
-                    "Documents selected",
-                    selected_count=len(selected_documents),
-                    documents=selected_documents,
-                )
+                    if faq_match:
+                        if ledger_entry is not None:
+                            ledger_entry.faq_hit = True
+                            ledger_entry.document_used = faq_match.document_used
+                        return SearchDocumentsServiceResponse(
+                            success=True,
+                            message=faq_match.answer,
+                            document_used=faq_match.document_used,
+                        )
+
+            # Steps 1-3: Select documents and find the best pages
+            source = await self.retrieve_best_pages(
+                query, school, query_embedding, max_pages
+            )
 
-                if not selected_documents:
-                    return SearchDocumentsServiceResponse(
-                        success=False,
-                        message="Could not select relevant documents for the query.",
-                    )
+            # Step 4: Generate the answer
+            return await self.answer_from_sources(query, [source])
 
-            # Step 3: Try up to 2 documents, keeping the best results
-            with logfire.span("search_in_documents"):
-                best_pages: list[PageMatch] = []
-                best_document: str | None = None
-                best_avg_score = 0.0
+        except RetrievalError as e:
+            return SearchDocumentsServiceResponse(
+                success=False, message=e.message, document_used=e.document_used
+            )
+        except (CircuitOpenError, DeadlineExceeded):
+            # The caller answers with the fallback reply instead
+            raise
+        except Exception as e:
+            logfire.error("Search and answer pipeline failed", error=str(e), exc_info=e)
+            return SearchDocumentsServiceResponse(
+                success=False, message=f"Search error: {str(e)}"
+            )
 
-                for doc_name in selected_documents[:2]:  # Max 2 attempts
-                    pages = await self.search_in_document(query, doc_name, limit=max_pages)
+    @logfire.instrument("search_and_answer_schools")
+    async def search_and_answer_schools(
+        self,
+        query: str,
+        schools: list[str],
+        max_pages: int = settings.PAGES_SEARCH_LIMIT,
+    ) -> SearchDocumentsServiceResponse:
+        """Answer a question that spans several schools (e.g. a comparison).
 
-                    if not pages:
-                        logfire.warn("No pages found in document", document=doc_name)
-                        continue  # Try next document
+        The query is embedded once and the General Information catalog is
+        fetched once; the per-school document selection and page searches run
+        concurrently, and a single answer is generated from all the pages
+        found. A single school goes through ``search_and_answer``.
 
-                    # Calculate average relevance score
-                    avg_score = sum(p.score for p in pages) / len(pages)
-                    logfire.info(
-                        "Pages found in document",
-                        document=doc_name,
-                        page_count=len(pages),
-                        avg_score=round(avg_score, 4),
-                    )
+        Args:
+            query: User question
+            schools: Schools to search in
+            max_pages: Maximum number of pages to consult per school
 
-                    # If we found excellent results (>= 0.75), use immediately
-                    if avg_score >= 0.75:
-                        best_pages = pages
-                        best_document = doc_name
-                        best_avg_score = avg_score
-                        logfire.info("Excellent results found, stopping search", avg_score=round(avg_score, 4))
-                        break  # No need to try second document
-
-                    # Keep track of the best results so far
-                    if avg_score > best_avg_score:
-                        best_pages = pages
-                        best_document = doc_name
-                        best_avg_score = avg_score
-
-                # Check if we found any valid results
-                if not best_pages or best_document is None:
-                    logfire.warn("No relevant pages found in any document")
-                    return SearchDocumentsServiceResponse(
-                        success=False,
-                        message=f"No relevant information found in available documents for: {school}",
-                        document_used=selected_documents[0] if selected_documents else None,
-                    )
+        Returns:
+            Final service response, merged across schools
 
-            # Step 4: Generate final answer with the best pages found
-            with logfire.span("generate_answer"):
-                answer_response = await self.generate_answer(
-                    query, best_document, best_pages
-                )
-                logfire.info(
-                    "Answer generated successfully",
-                    document=best_document,
-                    pages_used=len(best_pages),
-                    final_score=round(best_avg_score, 4),
+        Raises:
+            CircuitOpenError: If a dependency's circuit is open
+            DeadlineExceeded: If the message deadline left no time for a stage
+        """
+        schools = list(dict.fromkeys(schools))
+        if len(schools) == 1:
+            return await self.search_and_answer(query, schools[0], max_pages)
+
+        ledger_entry = current_entry()
+        if ledger_entry is not None:
+            ledger_entry.school = ", ".join(schools)
+
+        try:
+            # Shared work: one embedding and one General Information catalog
+            with logfire.span("prepare_shared_search"):
+                query_embedding, general_documents = await asyncio.gather(
+                    self.embed_query(query),
+                    self.get_general_documents(),
                 )
 
-            return SearchDocumentsServiceResponse(
-                success=True,
-                message=answer_response.answer,
-                document_used=answer_response.document_used,
-                pages_count=len(best_pages),
+            results = await asyncio.gather(
+                *(
+                    self.retrieve_best_pages(
+                        query, school, query_embedding, max_pages, general_documents
+                    )
+                    for school in schools
+                ),
+                return_exceptions=True,
             )
 
+            sources: list[RetrievedSource] = []
+            failures: list[RetrievalError] = []
+            for school, result in zip(schools, results, strict=True):
+                if isinstance(result, RetrievedSource):
+                    sources.append(result)
+                elif isinstance(result, RetrievalError):
+                    logfire.warn(
+                        "School retrieval failed", school=school, error=result.message
+                    )
+                    failures.append(result)
+                else:
+                    raise result
+
+            if not sources:
+                return SearchDocumentsServiceResponse(
+                    success=False,
+                    message=" ".join(failure.message for failure in failures),
+                )
+
+            return await self.answer_from_sources(query, sources)
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except Exception as e:
             logfire.error("Search and answer pipeline failed", error=str(e), exc_info=e)
             return SearchDocumentsServiceResponse(
@@ -0,0 +1,206 @@
+"""Speculative retrieval started while the chat node is still thinking.
+
+When the schools a user asked about are already known from their profile,
+``process_message`` starts a ``Speculation`` alongside the graph run. It embeds the raw user message and, for each school,
+pre-fetches the best pages across all of that school's candidate documents
+with a single vector search. No LLM calls are made.
+
+If the agent then calls the tool with a query close enough to the raw message,
+``SearchDocumentsService`` reuses the speculative embedding, and it reuses the
+pre-fetched pages of the documents the selector picks. Otherwise the
+speculation is discarded and the regular pipeline runs unchanged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import unicodedata
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import logfire
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.mongo_db import MongoDBService, PageMatch
+
+SPECULATIONS = registry.counter(
+    "sciencebot_speculative_retrievals_total",
+    "Speculative retrievals by outcome (hit, miss, unused or failed)",
+    labels=("outcome",),
+)
+
+_current_speculation: ContextVar[Speculation | None] = ContextVar(
+    "speculation", default=None
+)
+
+
+def current_speculation() -> Speculation | None:
+    """Speculation started for the message being processed, if any."""
+    return _current_speculation.get()
+
+
+def _words(text: str) -> set[str]:
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    plain = "".join(char for char in decomposed if not unicodedata.combining(char))
+    cleaned = "".join(char if char.isalnum() else " " for char in plain)
+    return {word for word in cleaned.split() if len(word) > 2}
+
+
+def query_similarity(first: str, second: str) -> float:
+    """Jaccard similarity of the two texts' words.
+
+    Dividing by the union keeps a terse query contained in a broader message
+    (or the reverse) from scoring as a match.
+    """
+    first_words, second_words = _words(first), _words(second)
+    if not first_words or not second_words:
+        return 0.0
+    return len(first_words & second_words) / len(first_words | second_words)
+
+
+class Speculation:
+    """Embedding and candidate pages fetched ahead of the tool call."""
+
+    def __init__(
+        self,
+        message: str,
+        schools: list[str],
+        mongo_service: MongoDBService,
+        pages_limit: int,
+    ) -> None:
+        self.message = message
+        self.schools = schools
+        self.used = False
+        self.missed = False
+        self._mongo_service = mongo_service
+        self._embedding = asyncio.create_task(mongo_service.query_to_embedding(message))
+        self._pages = [
+            asyncio.create_task(self._prefetch(school, pages_limit))
+            for school in schools
+        ]
+
+    async def _prefetch(self, school: str, limit: int) -> list[PageMatch]:
+        """Best pages across all the candidate documents of a school."""
+        # Imported here: the service module imports this one
+        from app.science_bot.agent.tools.search_documents.service import (
+            GENERAL_INFORMATION_SCHOOL,
+        )
+
+        with logfire.span("speculative_retrieval", school=school):
+            await self._mongo_service.connect_db()
+            documents = [
+                document.name
+                for name in (school, GENERAL_INFORMATION_SCHOOL)
+                for document in (
+                    await self._mongo_service.get_documents_by_school(name)
+                ).documents
+            ]
+            if not documents:
+                return []
+
+            result = await self._mongo_service.search_best_matches(
+                query=self.message,
+                document_name=documents,
+                limit=limit,
+                query_embedding=await self._embedding,
+            )
+            return result.matches
+
+    def matches(self, query: str) -> bool:
+        """Whether the tool's query is close enough to reuse the speculation."""
+        similarity = query_similarity(query, self.message)
+        matched = similarity >= settings.SPECULATIVE_MIN_SIMILARITY
+        if not matched:
+            self.missed = True
+        logfire.info(
+            "Speculative query compared",
+            similarity=round(similarity, 3),
+            matched=matched,
+        )
+        return matched
+
+    async def embedding_for(self, query: str) -> list[float] | None:
+        """Speculative embedding, if ``query`` matches and it was computed."""
+        if not self.matches(query):
+            return None
+        try:
+            embedding = await self._embedding
+        except Exception:
+            return None
+        self.used = True
+        return embedding
+
+    async def pages_for(
+        self, query: str, document_name: str, limit: int
+    ) -> list[PageMatch] | None:
+        """Best pre-fetched pages of a document, if they cover ``limit`` pages.
+
+        The pre-fetch ranks the pages of all the candidate documents together,
+        so the pages it holds for one document are that document's best pages
+        only when at least ``limit`` of them made the cut.
+        """
+        if not self.matches(query):
+            return None
+
+        for task in self._pages:
+            try:
+                pages = await task
+            except Exception:
+                continue
+            document_pages = [page for page in pages if page.file_name == document_name]
+            if len(document_pages) >= limit:
+                self.used = True
+                return document_pages[:limit]
+
+        self.missed = True
+        return None
+
+    def finish(self) -> None:
+        """Cancel pending work and record the outcome."""
+        failed = False
+        for task in (self._embedding, *self._pages):
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled() and task.exception() is not None:
+                failed = True
+
+        if self.used:
+            outcome = "hit"
+        elif self.missed:
+            outcome = "miss"
+        elif failed:
+            outcome = "failed"
+        else:
+            outcome = "unused"
+        SPECULATIONS.inc(outcome=outcome)
+
+
+@contextmanager
+def speculate(
+    message: str, schools: list[str], mongo_service: MongoDBService
+) -> Iterator[Speculation]:
+    """Run a speculation for the duration of a message run.
+
+    Args:
+        message: Raw user message
+        schools: Schools the user asked about before
+        mongo_service: Service used for the embedding and the vector search
+
+    Yields:
+        The running speculation, visible to the tool through
+        ``current_speculation()``
+    """
+    speculation = Speculation(
+        message=message,
+        schools=schools,
+        mongo_service=mongo_service,
+        pages_limit=settings.PAGES_SEARCH_LIMIT * settings.SPECULATIVE_PAGES_FACTOR,
+    )
+    token = _current_speculation.set(speculation)
+    try:
+        yield speculation
+    finally:
+        _current_speculation.reset(token)
+        speculation.finish()
@@ -1,10 +1,14 @@
 from enum import Enum
 
 import logfire
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool  # type: ignore
 from langchain_core.tools.base import BaseTool
 from pydantic import BaseModel
 
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.deadline import DeadlineExceeded
+from app.science_bot.agent.schemas import Context
 from app.science_bot.agent.tools.search_documents.service import (
     SearchDocumentsService,
     SearchDocumentsServiceResponse,
@@ -54,11 +58,12 @@ class SearchDocumentsResponse(BaseModel):
     message: str
 
 
-@tool
+@tool(response_format="content_and_artifact")
 async def search_documents(
     query: str,
-    school: SchoolEnum,
-) -> SearchDocumentsResponse:
+    schools: list[SchoolEnum],
+    config: RunnableConfig,
+) -> tuple[str, SearchDocumentsResponse]:
     """
     Searches for information in academic documents from the National University of Piura.
 
@@ -71,9 +76,12 @@ async def search_documents(
     3. Searches for the most relevant pages within that document.
     4. Generates a comprehensive response based on the retrieved content.
 
+    When the question involves several schools (e.g. comparing two programs), pass all of
+    them in a single call: they are searched concurrently and answered together.
+
     Args:
         query: The user's search question, written as a well-formulated query to find relevant information in the documents.
-        school: The specific school or faculty where the search should be performed. Must match one of the available schools in the SchoolEnum. This is REQUIRED — do not guess the school.
+        schools: The schools or faculties where the search should be performed, usually just the user's school. Each must match one of the available schools in the SchoolEnum. This is REQUIRED — do not guess the school.
 
     Returns:
         SearchDocumentsResponse containing the success status and the generated answer based on the documents.
@@ -82,14 +90,29 @@ async def search_documents(
         - User: "How much is the tuition?"
         - Assistant: "Which school/faculty are you in?"
         - User: "Computer Engineering"
-        - Assistant: [calls search_documents with school=INFORMATICA and query about tuition cost]
+        - Assistant: [calls search_documents with schools=[INFORMATICA] and query about tuition cost]
+        - User: "What is the difference between Computer and Electronic Engineering?"
+        - Assistant: [calls search_documents with schools=[INFORMATICA, ELECTRONICA] and the comparison query]
     """
     try:
-        logfire.info("Tool invoked", tool="search_documents", school=school.value, query_length=len(query))
+        school_names = [school.value for school in schools]
+        logfire.info(
+            "Tool invoked",
+            tool="search_documents",
+            schools=school_names,
+            query_length=len(query),
+        )
 
-        async with SearchDocumentsService() as service:
-            result: SearchDocumentsServiceResponse = await service.search_and_answer(
-                query=query, school=school.value
+        if not school_names:
+            raise ValueError("At least one school is required")
+
+        # Stages size their work to the time left for this message
+        deadline = Context.from_config(config).deadline
+        async with SearchDocumentsService(deadline=deadline) as service:
+            result: SearchDocumentsServiceResponse = (
+                await service.search_and_answer_schools(
+                    query=query, schools=school_names
+                )
             )
 
             logfire.info(
@@ -99,16 +122,24 @@ async def search_documents(
                 pages_count=result.pages_count,
             )
 
-            return SearchDocumentsResponse(
+            response = SearchDocumentsResponse(
                 success=result.success,
                 message=result.message,
             )
+    except (CircuitOpenError, DeadlineExceeded):
+        # The tool node re-raises these (see graph.handle_tool_error), ending
+        # the run so process_message replies with the fallback message
+        raise
     except Exception as e:
         logfire.error("Tool execution failed", error=str(e), exc_info=e)
-        return SearchDocumentsResponse(
+        response = SearchDocumentsResponse(
             success=False,
             message=f"Error searching documents: {str(e)}",
         )
 
+    # The response is also kept as the artifact so the graph can return the
+    # answer directly instead of relaying it through another chat pass
+    return str(response), response
+
 
 TOOLS: list[BaseTool] = [search_documents]
@@ -1,102 +1,292 @@
 """Science Bot Service for processing messages with conversation history."""
 
+from contextlib import nullcontext
+from datetime import UTC, datetime
+
 import logfire
+from langchain_core.messages import AIMessage, ToolMessage
 from langchain_core.messages.base import BaseMessage
 
+from app.core.circuit_breaker import CIRCUIT_FALLBACKS, CircuitOpenError, openai_breaker
+from app.core.config import settings
+from app.core.deadline import Deadline, DeadlineExceeded
+from app.core.ledger import request_ledger
+from app.core.mongo_db import get_mongo_service
+from app.core.overload import LOAD_SHED, LoadMode, overload_controller
+from app.core.profile_store import PROFILE_LOOKUPS, UserProfile, profile_store
+from app.core.profiler import loop_profiler
 from app.science_bot.agent.graph import get_graph
 from app.science_bot.agent.schemas import InputState
+from app.science_bot.agent.tools.search_documents.speculation import speculate
+from app.science_bot.agent.tools.search_documents.tool import SearchDocumentsResponse
 from app.science_bot.core.conversation_manager import conversation_manager
+from app.science_bot.core.small_talk import (
+    LLM_CALLS_SAVED,
+    SMALL_TALK_REPLIES,
+    classify_small_talk,
+)
 
 
-@logfire.instrument("process_message")
-async def process_message(user_id: str, message: str) -> str:
-    """Process a message using the science bot graph with conversation history.
+def answer_small_talk(user_id: str, message: str) -> str | None:
+    """Answer greetings, thanks and other trivial messages without the agent.
 
     Args:
         user_id: The ID of the user sending the message
-        message: The message content to process
+        message: The message content
 
     Returns:
-        The AI response as a string
+        The templated reply, or None if the message needs the agent
     """
-    try:
+    with logfire.span("small_talk"):
+        # Right after a question from the bot, even "ok" or "hola" answers it
+        history = conversation_manager.get_conversation_history(user_id=user_id)
+        last_message = history[-1] if history else None
+        last_reply = str(last_message.content).rstrip() if last_message else ""
+        if isinstance(last_message, AIMessage) and last_reply.endswith("?"):
+            return None
+
+        match = classify_small_talk(
+            text=message,
+            languages=settings.SMALL_TALK_LANGUAGES,
+            max_words=settings.SMALL_TALK_MAX_WORDS,
+        )
+        if match is None:
+            return None
+
+        conversation_manager.add_user_message(user_id=user_id, content=message)
+        conversation_manager.add_assistant_message(user_id, content=match.reply)
+
+        SMALL_TALK_REPLIES.inc(intent=match.intent, language=match.language)
+        LLM_CALLS_SAVED.inc(reason="small_talk")
         logfire.info(
-            "Processing message",
+            "Small talk answered without LLM",
             user_id=user_id,
-            message_length=len(message),
+            intent=match.intent,
+            language=match.language,
         )
+        return match.reply
+
 
-        # Add user message to conversation history
-        with logfire.span("add_user_message_to_history"):
-            conversation_manager.add_user_message(user_id=user_id, content=message)
+def _searched_schools(messages: list[BaseMessage]) -> list[str]:
+    """Schools of the last successful ``search_documents`` call of a run."""
+    succeeded = {
+        message.tool_call_id
+        for message in messages
+        if isinstance(message, ToolMessage)
+        and isinstance(message.artifact, SearchDocumentsResponse)
+        and message.artifact.success
+    }
+    for message in reversed(messages):
+        if not isinstance(message, AIMessage):
+            continue
+        for tool_call in reversed(message.tool_calls):
+            if tool_call["name"] == "search_documents" and tool_call["id"] in succeeded:
+                return [str(school) for school in tool_call["args"].get("schools", [])]
+    return []
 
-        # Get full conversation history for context
-        with logfire.span("get_conversation_history"):
-            conversation_history: list[BaseMessage] = (
-                conversation_manager.get_conversation_history(user_id=user_id)
+
+async def load_profile(user_id: str) -> UserProfile:
+    """Load the user's profile, starting a new one if unknown or unavailable."""
+    profile: UserProfile | None = None
+    if settings.PROFILE_ENABLED:
+        with logfire.span("load_user_profile"):
+            try:
+                profile = await profile_store.get(user_id)
+            except Exception as e:
+                logfire.warn("User profile lookup failed", error=str(e))
+            PROFILE_LOOKUPS.inc(
+                result="school" if profile and profile.schools else "none"
             )
+
+    return profile or UserProfile(phone_number=user_id)
+
+
+async def save_profile(
+    profile: UserProfile, messages: list[BaseMessage], user_name: str | None
+) -> None:
+    """Record the schools searched in this run, the name and the activity time."""
+    if not settings.PROFILE_ENABLED:
+        return
+
+    searched_schools = _searched_schools(messages)
+    if searched_schools:
+        profile.schools = searched_schools
+    if user_name:
+        profile.name = user_name
+    profile.last_activity = datetime.now(UTC)
+
+    with logfire.span("save_user_profile"):
+        try:
+            await profile_store.save(profile)
+        except Exception as e:
+            logfire.warn("User profile update failed", error=str(e))
+
+
+@logfire.instrument("process_message")
+async def process_message(
+    user_id: str,
+    message: str,
+    user_name: str | None = None,
+    deadline: Deadline | None = None,
+) -> str:
+    """Process a message using the science bot graph with conversation history.
+
+    Args:
+        user_id: The ID of the user sending the message
+        message: The message content to process
+        user_name: The sender's WhatsApp display name, if known
+        deadline: Time budget of the message, passed to every stage
+
+    Returns:
+        The AI response as a string
+    """
+    if settings.SMALL_TALK_ENABLED:
+        small_talk_reply = answer_small_talk(user_id=user_id, message=message)
+        if small_talk_reply is not None:
+            return small_talk_reply
+
+    # Past every degraded mode, tell the user to come back instead of queueing
+    load_mode = overload_controller.mode
+    if load_mode is LoadMode.SHED:
+        LOAD_SHED.inc()
+        LLM_CALLS_SAVED.inc(reason="load_shed")
+        logfire.warn("Message shed under overload", user_id=user_id)
+        return settings.OVERLOAD_BUSY_MESSAGE
+
+    # Every answer needs OpenAI: fail fast while its circuit is open
+    if openai_breaker.is_open:
+        CIRCUIT_FALLBACKS.inc(dependency=openai_breaker.name)
+        logfire.warn("OpenAI circuit open, sent fallback reply", user_id=user_id)
+        return settings.CIRCUIT_OPEN_MESSAGE
+
+    with (
+        overload_controller.track(),
+        loop_profiler.profile_request(user_id=user_id),
+        request_ledger.track(user_id=user_id) as ledger_entry,
+    ):
+        try:
             logfire.info(
-                "Conversation history retrieved",
-                history_length=len(conversation_history),
+                "Processing message",
+                user_id=user_id,
+                message_length=len(message),
+                load_mode=load_mode.name,
             )
 
-        # Get graph instance
-        with logfire.span("get_graph_instance"):
-            graph = get_graph()
-
-        # Create input state with full conversation history
-        with logfire.span("create_input_state"):
-            state = InputState(messages=conversation_history)
-
-        # Invoke the graph with context
-        with logfire.span("invoke_langgraph"):
-            logfire.info("Invoking LangGraph agent", user_id=user_id)
-            response = await graph.ainvoke(  # type: ignore
-                input=state,
-                config={
-                    "run_name": "process_webhook_message",
-                    "configurable": {
-                        "user_id": user_id,
-                        "phone_number": user_id,
-                    },
-                },
-            )
+            # Add user message to conversation history
+            with logfire.span("add_user_message_to_history"):
+                conversation_manager.add_user_message(user_id=user_id, content=message)
+
+            # Get full conversation history for context
+            with logfire.span("get_conversation_history"):
+                conversation_history: list[BaseMessage] = (
+                    conversation_manager.get_conversation_history(user_id=user_id)
+                )
+                logfire.info(
+                    "Conversation history retrieved",
+                    history_length=len(conversation_history),
+                )
+
+            # Get graph instance
+            with logfire.span("get_graph_instance"):
+                graph = get_graph()
+
+            # Create input state with full conversation history
+            with logfire.span("create_input_state"):
+                state = InputState(messages=conversation_history)
 
-        # Extract the last message content
-        with logfire.span("extract_response"):
-            last_message = response["messages"][-1]
-            response_content = (
-                str(object=last_message.content)
-                if last_message.content
-                else "I'm not sure how to respond to that."
+            # Returning users keep their school even after the history rolls over
+            profile = await load_profile(user_id)
+
+            # Pre-fetch pages for the user's known schools while the agent
+            # decides whether to search (skipped when degrading under load)
+            speculation = (
+                speculate(message, profile.schools, get_mongo_service())
+                if settings.SPECULATIVE_RETRIEVAL_ENABLED
+                and profile.schools
+                and load_mode is LoadMode.NORMAL
+                else nullcontext()
             )
-            logfire.info(
-                "Response generated",
-                response_length=len(response_content),
+
+            # Invoke the graph with context
+            with logfire.span("invoke_langgraph"), speculation:
+                logfire.info("Invoking LangGraph agent", user_id=user_id)
+                response = await graph.ainvoke(  # type: ignore
+                    input=state,
+                    config={
+                        "run_name": "process_webhook_message",
+                        "configurable": {
+                            "user_id": user_id,
+                            "phone_number": user_id,
+                            "schools": profile.schools,
+                            "user_name": user_name or profile.name,
+                            "deadline": deadline,
+                        },
+                    },
+                )
+
+            await save_profile(profile, response["messages"], user_name)
+
+            # Extract the last message content
+            with logfire.span("extract_response"):
+                last_message = response["messages"][-1]
+                response_content = (
+                    str(object=last_message.content)
+                    if last_message.content
+                    else "I'm not sure how to respond to that."
+                )
+                logfire.info(
+                    "Response generated",
+                    response_length=len(response_content),
+                    user_id=user_id,
+                )
+
+            # Add assistant response to conversation history
+            with logfire.span("add_assistant_message_to_history"):
+                conversation_manager.add_assistant_message(
+                    user_id, content=response_content
+                )
+
+            logfire.info("Message processed successfully", user_id=user_id)
+            return response_content
+
+        except CircuitOpenError as e:
+            ledger_entry.success = False
+            CIRCUIT_FALLBACKS.inc(dependency=e.dependency)
+            logfire.warn(
+                "Dependency circuit open, sent fallback reply",
                 user_id=user_id,
+                dependency=e.dependency,
             )
-
-        # Add assistant response to conversation history
-        with logfire.span("add_assistant_message_to_history"):
             conversation_manager.add_assistant_message(
-                user_id, content=response_content
+                user_id=user_id, content=settings.CIRCUIT_OPEN_MESSAGE
             )
+            return settings.CIRCUIT_OPEN_MESSAGE
 
-        logfire.info("Message processed successfully", user_id=user_id)
-        return response_content
+        except DeadlineExceeded as e:
+            ledger_entry.success = False
+            logfire.warn(
+                "Message deadline exceeded, sent fallback reply",
+                user_id=user_id,
+                stage=e.stage,
+            )
+            conversation_manager.add_assistant_message(
+                user_id=user_id, content=settings.DEADLINE_EXCEEDED_MESSAGE
+            )
+            return settings.DEADLINE_EXCEEDED_MESSAGE
 
-    except Exception as e:
-        logfire.error(
-            "Error processing message",
-            user_id=user_id,
-            error=str(e),
-            exc_info=e,
-        )
-        error_response = "Sorry, something went wrong. Please try again later."
+        except Exception as e:
+            ledger_entry.success = False
+            logfire.error(
+                "Error processing message",
+                user_id=user_id,
+                error=str(e),
+                exc_info=e,
+            )
+            error_response = "Sorry, something went wrong. Please try again later."
 
-        # Still add the error response to history to maintain conversation flow
-        conversation_manager.add_assistant_message(
-            user_id=user_id, content=error_response
-        )
+            # Still add the error response to history to maintain conversation flow
+            conversation_manager.add_assistant_message(
+                user_id=user_id, content=error_response
+            )
 
-        return error_response
+            return error_response
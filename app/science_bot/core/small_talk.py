@@ -0,0 +1,307 @@
+"""Zero-LLM replies for small talk and trivial messages.
+
+Greetings, thanks, acknowledgements, farewells and emoji-only messages make up
+a large share of inbound traffic. They are recognized with per-language
+keyword rules and answered with a templated reply, skipping the agent (and its
+large system prompt and tool schema) entirely.
+
+A message only matches when it is made of whole phrases of a single intent
+(besides filler words and laughter), so "hola, ¿cuáles son los requisitos?"
+still goes to the agent, and neither does a bare "mañana" or "ya" that
+answers a question: "hasta mañana" is a farewell, "mañana" alone is not.
+
+Spanish and English rules are built in. ``SMALL_TALK_RULES_FILE`` points to a
+JSON file of rules by language code that replace the built-in rules of the
+same language or add new languages, e.g.::
+
+    {"pt": {"phrases": {"greeting": ["olá", "bom dia"], "thanks": ["obrigado"]},
+            "replies": {"greeting": "Olá! Como posso ajudar?",
+                        "thanks": "De nada!", "emoji": "Como posso ajudar?"},
+            "filler": ["muito"]}}
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from enum import StrEnum
+from pathlib import Path
+from typing import Self
+
+import logfire
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    TypeAdapter,
+    field_validator,
+    model_validator,
+)
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+SMALL_TALK_REPLIES = registry.counter(
+    "sciencebot_small_talk_replies_total",
+    "Messages answered by the small talk fast path",
+    labels=("intent", "language"),
+)
+LLM_CALLS_SAVED = registry.counter(
+    "sciencebot_llm_calls_saved_total",
+    "Chat model calls avoided by answering without the agent",
+    labels=("reason",),
+)
+
+
+class SmallTalkIntent(StrEnum):
+    GREETING = "greeting"
+    THANKS = "thanks"
+    ACKNOWLEDGEMENT = "acknowledgement"
+    FAREWELL = "farewell"
+    EMOJI = "emoji"
+
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_REPEATED_LETTERS = re.compile(r"(\w)\1+")
+_LAUGHTER = re.compile(r"^(?:ja|je|ha|he|ji|xd)+$")
+
+
+def _normalize(text: str) -> list[str]:
+    """Lowercase, strip accents/punctuation and collapse repeated letters."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    collapsed = _REPEATED_LETTERS.sub(r"\1", _NON_WORD.sub(" ", without_accents))
+    return collapsed.split()
+
+
+class LanguageRules(BaseModel):
+    """Phrases and templated replies of one language.
+
+    Phrases and filler are stored normalized like incoming messages (see
+    ``_normalize``), so "llamar" and "good" are matched as "lamar" and "god",
+    and "graciass" still matches "gracias".
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    phrases: dict[SmallTalkIntent, frozenset[str]]
+    replies: dict[SmallTalkIntent, str]
+    # Words allowed around the phrases ("hola bot", "te agradezco")
+    filler: frozenset[str] = frozenset()
+
+    @field_validator("phrases", mode="after")
+    @classmethod
+    def _normalize_phrases(
+        cls, phrases: dict[SmallTalkIntent, frozenset[str]]
+    ) -> dict[SmallTalkIntent, frozenset[str]]:
+        normalized = {
+            intent: frozenset(" ".join(_normalize(phrase)) for phrase in texts)
+            for intent, texts in phrases.items()
+        }
+        return {intent: texts - {""} for intent, texts in normalized.items()}
+
+    @field_validator("filler", mode="after")
+    @classmethod
+    def _normalize_filler(cls, filler: frozenset[str]) -> frozenset[str]:
+        return frozenset(w for word in filler for w in _normalize(word))
+
+    @model_validator(mode="after")
+    def _check_replies(self) -> Self:
+        missing = {*self.phrases, SmallTalkIntent.EMOJI} - set(self.replies)
+        if missing:
+            raise ValueError(f"Missing replies for {sorted(missing)}")
+        return self
+
+
+BUILTIN_LANGUAGE_RULES: dict[str, LanguageRules] = {
+    "es": LanguageRules(
+        phrases={
+            SmallTalkIntent.GREETING: frozenset(
+                {"hola", "buenas", "buen dia", "buenos dias", "buenas tardes",
+                 "buenas noches", "saludos", "hey", "ola", "alo"}
+            ),
+            SmallTalkIntent.THANKS: frozenset(
+                {"gracias", "muchas gracias", "muchisimas gracias", "mil gracias",
+                 "grax", "agradecido", "agradecida", "agradezco"}
+            ),
+            SmallTalkIntent.ACKNOWLEDGEMENT: frozenset(
+                {"ok", "oka", "okey", "okay", "vale", "listo", "entendido",
+                 "perfecto", "genial", "excelente", "bueno", "dale",
+                 "ya entendi", "ya esta"}
+            ),
+            SmallTalkIntent.FAREWELL: frozenset(
+                {"chau", "chao", "adios", "hasta luego", "hasta pronto",
+                 "hasta manana", "nos vemos", "bye"}
+            ),
+        },
+        replies={
+            SmallTalkIntent.GREETING: (
+                "¡Hola! Soy el asistente virtual de la Universidad Nacional de "
+                "Piura. ¿En qué te puedo ayudar?"
+            ),
+            SmallTalkIntent.THANKS: "¡Con gusto! Escríbeme si tienes otra consulta.",
+            SmallTalkIntent.ACKNOWLEDGEMENT: (
+                "Perfecto. Escríbeme si tienes otra consulta."
+            ),
+            SmallTalkIntent.FAREWELL: "¡Hasta luego! Aquí estaré cuando me necesites.",
+            SmallTalkIntent.EMOJI: "¿En qué te puedo ayudar?",
+        },
+        filler=frozenset(
+            {"y", "que", "tal", "muy", "bot", "senor", "senorita", "amigo", "a",
+             "ti", "te"}
+        ),
+    ),
+    "en": LanguageRules(
+        phrases={
+            SmallTalkIntent.GREETING: frozenset(
+                {"hi", "hello", "hey", "good morning", "good afternoon",
+                 "good evening", "greetings"}
+            ),
+            SmallTalkIntent.THANKS: frozenset(
+                {"thanks", "thank you", "thx", "ty", "thanks a lot",
+                 "thanks so much", "thank you so much", "thank you very much"}
+            ),
+            SmallTalkIntent.ACKNOWLEDGEMENT: frozenset(
+                {"ok", "okay", "k", "got it", "great", "cool", "perfect",
+                 "understood", "alright", "fine"}
+            ),
+            SmallTalkIntent.FAREWELL: frozenset(
+                {"bye", "goodbye", "see you", "see you later", "see you soon",
+                 "cya"}
+            ),
+        },
+        replies={
+            SmallTalkIntent.GREETING: (
+                "Hi! I'm the virtual assistant of Universidad Nacional de Piura. "
+                "How can I help you?"
+            ),
+            SmallTalkIntent.THANKS: "You're welcome! Write to me if you have another question.",
+            SmallTalkIntent.ACKNOWLEDGEMENT: (
+                "Great. Write to me if you have another question."
+            ),
+            SmallTalkIntent.FAREWELL: "Bye! I'll be here whenever you need me.",
+            SmallTalkIntent.EMOJI: "How can I help you?",
+        },
+        filler=frozenset({"you", "a", "very", "bot", "there"}),
+    ),
+}  # fmt: skip
+
+DEFAULT_LANGUAGE = "es"
+
+
+def load_language_rules(path: str | None) -> dict[str, LanguageRules]:
+    """Built-in rules, replaced or extended by the languages of a rules file.
+
+    Args:
+        path: JSON file of rules by language code, or None for the built-ins
+
+    Returns:
+        Rules by language code
+
+    Raises:
+        OSError: If the file cannot be read
+        pydantic.ValidationError: If the file has invalid rules
+    """
+    rules = dict(BUILTIN_LANGUAGE_RULES)
+    if path:
+        loaded = TypeAdapter(dict[str, LanguageRules]).validate_json(
+            Path(path).read_bytes()
+        )
+        rules.update(loaded)
+        logfire.info("Small talk rules loaded", path=path, languages=sorted(loaded))
+    return rules
+
+
+# Global small talk rules (built-in and from SMALL_TALK_RULES_FILE)
+language_rules = load_language_rules(settings.SMALL_TALK_RULES_FILE)
+
+
+@dataclass(frozen=True)
+class SmallTalkMatch:
+    """Recognized trivial message and its templated reply."""
+
+    intent: SmallTalkIntent
+    language: str
+    reply: str
+
+
+def _is_emoji_only(text: str) -> bool:
+    """Whether the message only has emojis, symbols, punctuation and spaces."""
+    stripped = "".join(text.split())
+    return bool(stripped) and all(
+        # Zero width joiners and variation selectors glue emoji sequences
+        unicodedata.category(c)[0] in {"S", "P"} or c in "\u200d\ufe0f"
+        for c in stripped
+    )
+
+
+def _is_made_of(
+    words: list[str], phrases: frozenset[str], filler: frozenset[str]
+) -> bool:
+    """Whether the words split into whole phrases (at least one) and filler."""
+    longest = max((phrase.count(" ") + 1 for phrase in phrases), default=0)
+    # Positions the split can reach, and whether a phrase was used to get there
+    reached: dict[int, bool] = {0: False}
+    for start, word in enumerate(words):
+        if start not in reached:
+            continue
+        if word in filler or _LAUGHTER.match(word):
+            reached[start + 1] = reached.get(start + 1, False) or reached[start]
+        for size in range(1, min(longest, len(words) - start) + 1):
+            if " ".join(words[start : start + size]) in phrases:
+                reached[start + size] = True
+    return reached.get(len(words), False)
+
+
+def _match_language(words: list[str], rules: LanguageRules) -> SmallTalkIntent | None:
+    """Intent whose phrases (and the filler) make up the whole message, if any."""
+    for intent, phrases in rules.phrases.items():
+        if _is_made_of(words, phrases, rules.filler):
+            return intent
+    return None
+
+
+def classify_small_talk(
+    text: str,
+    languages: list[str],
+    max_words: int,
+    rules_by_language: dict[str, LanguageRules] | None = None,
+) -> SmallTalkMatch | None:
+    """Recognize a trivial message that can be answered without the LLM.
+
+    Args:
+        text: Incoming message
+        languages: Languages whose rules are enabled, in priority order
+        max_words: Longer messages are never treated as small talk
+        rules_by_language: Rules to use instead of the loaded ``language_rules``
+
+    Returns:
+        The matched intent with its reply, or None if the agent must answer
+    """
+    if rules_by_language is None:
+        rules_by_language = language_rules
+
+    enabled = [language for language in languages if language in rules_by_language]
+    if not enabled:
+        return None
+
+    if _is_emoji_only(text):
+        language = DEFAULT_LANGUAGE if DEFAULT_LANGUAGE in enabled else enabled[0]
+        return SmallTalkMatch(
+            intent=SmallTalkIntent.EMOJI,
+            language=language,
+            reply=rules_by_language[language].replies[SmallTalkIntent.EMOJI],
+        )
+
+    words = _normalize(text)
+    if not words or len(words) > max_words:
+        return None
+
+    for language in enabled:
+        rules = rules_by_language[language]
+        intent = _match_language(words, rules)
+        if intent is not None:
+            return SmallTalkMatch(
+                intent=intent, language=language, reply=rules.replies[intent]
+            )
+    return None
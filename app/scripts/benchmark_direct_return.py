@@ -0,0 +1,132 @@
+"""End-to-end latency benchmark of the ``SEARCH_DIRECT_RETURN`` graph mode.
+
+Runs the same document questions through the agent graph with and without
+direct return (alternating modes to spread any drift in OpenAI/Atlas latency
+evenly) and reports latency percentiles, chat model calls and tokens per
+question for each mode.
+
+Usage:
+    uv run python -m app.scripts.benchmark_direct_return \\
+        --questions questions.json --repeats 3
+
+The questions file is a JSON list of ``{"school": ..., "question": ...}``. The
+school is stated in the message so the agent calls ``search_documents`` right
+away, as it does once the user has told it their school.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel
+
+from app.core.ledger import request_ledger
+from app.science_bot.agent.graph import get_graph
+from app.science_bot.agent.schemas import InputState
+
+
+class BenchmarkQuestion(BaseModel):
+    """Question asked to the agent."""
+
+    school: str
+    question: str
+
+
+class RunResult(BaseModel):
+    """Measurements of one graph run."""
+
+    direct_return: bool
+    seconds: float
+    llm_calls: int
+    tokens: int
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))]
+
+
+async def run_question(question: BenchmarkQuestion, direct_return: bool) -> RunResult:
+    """Run one question through a fresh conversation and measure it."""
+    graph = get_graph(direct_return=direct_return)
+    message = f"Soy de {question.school}. {question.question}"
+
+    with request_ledger.track(user_id="benchmark", record=False) as entry:
+        start = time.perf_counter()
+        await graph.ainvoke(  # type: ignore
+            input=InputState(messages=[HumanMessage(content=message)]),
+            config={"configurable": {"user_id": "benchmark"}},
+        )
+        seconds = time.perf_counter() - start
+
+    return RunResult(
+        direct_return=direct_return,
+        seconds=seconds,
+        llm_calls=len(entry.llm_calls),
+        tokens=entry.prompt_tokens + entry.completion_tokens,
+    )
+
+
+async def benchmark(questions_path: Path, repeats: int) -> None:
+    """Compare both graph modes over every question."""
+    questions = [
+        BenchmarkQuestion.model_validate(item)
+        for item in json.loads(questions_path.read_text(encoding="utf-8"))
+    ]
+    results: list[RunResult] = []
+
+    for repeat in range(repeats):
+        for index, question in enumerate(questions):
+            # Alternate which mode goes first so warm caches favor neither
+            modes = [True, False] if (repeat + index) % 2 == 0 else [False, True]
+            for direct_return in modes:
+                result = await run_question(question, direct_return)
+                results.append(result)
+                print(
+                    f"[{'direct' if direct_return else 'relay '}] "
+                    f"{result.seconds:6.2f}s {result.llm_calls} calls "
+                    f"{result.tokens:6d} tokens  {question.question}"
+                )
+
+    print()
+    print(f"{'mode':<8}{'runs':>6}{'p50 s':>9}{'p95 s':>9}{'mean s':>9}"
+          f"{'calls':>8}{'tokens':>9}")  # fmt: skip
+    summary: dict[bool, float] = {}
+    for direct_return in (False, True):
+        runs = [r for r in results if r.direct_return is direct_return]
+        if not runs:
+            continue
+        seconds = [r.seconds for r in runs]
+        summary[direct_return] = statistics.mean(seconds)
+        print(
+            f"{'direct' if direct_return else 'relay':<8}{len(runs):>6}"
+            f"{percentile(seconds, 50):>9.2f}{percentile(seconds, 95):>9.2f}"
+            f"{statistics.mean(seconds):>9.2f}"
+            f"{statistics.mean(r.llm_calls for r in runs):>8.2f}"
+            f"{statistics.mean(r.tokens for r in runs):>9.0f}"
+        )
+
+    if len(summary) == 2:
+        saved = summary[False] - summary[True]
+        print(
+            f"\nDirect return saves {saved:.2f}s per question on average "
+            f"({saved / summary[False]:.0%})"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=Path, required=True)
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args()
+
+    asyncio.run(benchmark(questions_path=args.questions, repeats=args.repeats))
+
+
+if __name__ == "__main__":
+    main()
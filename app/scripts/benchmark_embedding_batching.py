@@ -0,0 +1,198 @@
+"""Throughput benchmark of embedding micro-batching under concurrent users.
+
+Each simulated user embeds one question at the same moment, once with one
+request per question and once through ``EmbeddingBatcher``. Every run gets a
+fresh rate limiter built from the OpenAI settings, so the in-flight and
+requests-per-minute limits apply as in production without one run draining
+the next one's budget. The benchmark reports throughput, latency percentiles
+and the number of OpenAI requests for each number of users.
+
+By default the OpenAI API is replaced by a local stand-in whose latency is
+``--latency`` seconds plus ``--per-text`` seconds per embedded text. ``--live``
+calls the real embeddings API (a few tokens per question).
+
+Usage:
+    uv run python -m app.scripts.benchmark_embedding_batching
+    uv run python -m app.scripts.benchmark_embedding_batching \\
+        --users 50 100 200 500 --window 0.005 --max-batch-size 64
+    uv run python -m app.scripts.benchmark_embedding_batching --live --users 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from langchain_openai import OpenAIEmbeddings
+from pydantic import BaseModel, SecretStr
+
+from app.core.config import ModelRateLimit, settings
+from app.core.embedding_batcher import EmbeddingBatcher, EmbedDocuments
+from app.core.rate_limiter import OpenAIRateLimiter, estimate_tokens
+
+QUESTIONS = [
+    "¿Cuánto cuesta la matrícula?",
+    "¿Cuándo empiezan las clases del semestre?",
+    "¿Qué requisitos necesito para titularme?",
+    "¿Cómo solicito una constancia de estudios?",
+    "¿Cuál es el horario de la biblioteca?",
+    "¿Cuántos créditos debo aprobar por ciclo?",
+    "¿Dónde pago los derechos de trámite?",
+    "¿Cómo me reincorporo después de una reserva de matrícula?",
+]
+
+
+class RunResult(BaseModel):
+    """Measurements of one run."""
+
+    users: int
+    batched: bool
+    seconds: float
+    requests: int
+    latencies: list[float]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))]
+
+
+def new_limiter() -> OpenAIRateLimiter:
+    """Limiter with the production settings and full buckets."""
+    return OpenAIRateLimiter(
+        max_in_flight=settings.OPENAI_MAX_IN_FLIGHT,
+        default_limit=ModelRateLimit(
+            requests_per_minute=settings.OPENAI_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.OPENAI_TOKENS_PER_MINUTE,
+        ),
+        model_limits=settings.OPENAI_MODEL_RATE_LIMITS,
+    )
+
+
+def stand_in(latency: float, per_text: float) -> EmbedDocuments:
+    """Local replacement of ``embed_documents`` with a fixed latency model."""
+
+    async def embed_documents(texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(latency + per_text * len(texts))
+        return [[float(len(text))] for text in texts]
+
+    return embed_documents
+
+
+async def run(
+    users: int,
+    batched: bool,
+    embed_documents: EmbedDocuments,
+    window: float,
+    max_batch_size: int,
+) -> RunResult:
+    """Embed one question per user, all users at once."""
+    model = settings.OPENAI_EMBEDDING_MODEL
+    limiter = new_limiter()
+    requests = 0
+
+    async def counted(texts: list[str]) -> list[list[float]]:
+        nonlocal requests
+        requests += 1
+        return await embed_documents(texts)
+
+    batcher = EmbeddingBatcher(
+        embed_documents=counted,
+        model=model,
+        window=window,
+        max_batch_size=max_batch_size,
+        limiter=limiter,
+    )
+
+    async def embed(text: str) -> list[float]:
+        if batched:
+            return await batcher.embed(text)
+        async with limiter.limit(model=model, tokens=estimate_tokens(text)):
+            return (await counted([text]))[0]
+
+    async def user(index: int) -> float:
+        # Suffix the index so questions are distinct, as real messages are
+        text = f"{QUESTIONS[index % len(QUESTIONS)]} ({index})"
+        start = time.perf_counter()
+        await embed(text)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(user(index) for index in range(users)))
+    return RunResult(
+        users=users,
+        batched=batched,
+        seconds=time.perf_counter() - start,
+        requests=requests,
+        latencies=list(latencies),
+    )
+
+
+async def benchmark(
+    users: list[int],
+    window: float,
+    max_batch_size: int,
+    live: bool,
+    latency: float,
+    per_text: float,
+) -> None:
+    """Compare unbatched and batched embedding for each number of users."""
+    if live:
+        embeddings = OpenAIEmbeddings(
+            api_key=SecretStr(settings.OPENAI_API_KEY),
+            model=settings.OPENAI_EMBEDDING_MODEL,
+        )
+        embed_documents: EmbedDocuments = embeddings.aembed_documents
+    else:
+        embed_documents = stand_in(latency=latency, per_text=per_text)
+
+    print(
+        f"{'users':>6}{'mode':>10}{'seconds':>9}{'q/s':>9}{'p50 ms':>9}"
+        f"{'p95 ms':>9}{'mean ms':>9}{'requests':>10}"
+    )
+    for count in users:
+        for batched in (False, True):
+            result = await run(count, batched, embed_documents, window, max_batch_size)
+            print(
+                f"{count:>6}{'batched' if batched else 'single':>10}"
+                f"{result.seconds:>9.2f}{count / result.seconds:>9.0f}"
+                f"{percentile(result.latencies, 50) * 1000:>9.0f}"
+                f"{percentile(result.latencies, 95) * 1000:>9.0f}"
+                f"{statistics.mean(result.latencies) * 1000:>9.0f}"
+                f"{result.requests:>10}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[50, 100, 200, 500])
+    parser.add_argument("--window", type=float, default=settings.EMBEDDING_BATCH_WINDOW)
+    parser.add_argument(
+        "--max-batch-size", type=int, default=settings.EMBEDDING_BATCH_MAX_SIZE
+    )
+    parser.add_argument(
+        "--live", action="store_true", help="Call the OpenAI embeddings API"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.15, help="Stand-in seconds per request"
+    )
+    parser.add_argument(
+        "--per-text", type=float, default=0.001, help="Stand-in seconds per text"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(
+        benchmark(
+            users=args.users,
+            window=args.window,
+            max_batch_size=args.max_batch_size,
+            live=args.live,
+            latency=args.latency,
+            per_text=args.per_text,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""Recall vs latency harness for the pages $vectorSearch settings.
+
+Compares the approximate (ANN) results of ``search_best_matches`` against an
+exact brute-force cosine ranking computed locally over an exported sample of
+the pages collection, for every ``numCandidates``/``limit`` combination.
+
+The sample is made of whole documents, and every query is filtered by its
+document (as the ``search_documents`` pipeline does), so the exact ranking
+covers exactly the same pages the ANN search sees.
+
+Usage:
+    uv run python -m app.scripts.benchmark_vector_search export \\
+        --documents 10 --output pages_sample.jsonl
+    uv run python -m app.scripts.benchmark_vector_search run \\
+        --sample pages_sample.jsonl --candidates 20,50,100,200 --limits 5,10 \\
+        --target-recall 0.95
+
+Queries are read from ``--queries`` (a JSON list of
+``{"document": ..., "query": ...}``) or synthesized from the sampled pages.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import statistics
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.mongo_db import MongoDBService
+from app.core.rate_limiter import Priority, estimate_tokens, openai_limiter
+
+
+class SamplePage(BaseModel):
+    """Exported page with its embedding."""
+
+    id: str
+    file_name: str
+    page: int
+    text: str
+    embedding: list[float]
+
+
+class BenchmarkQuery(BaseModel):
+    """Query restricted to one document."""
+
+    document: str
+    query: str
+
+
+class BenchmarkResult(BaseModel):
+    """Aggregated results for one numCandidates/limit combination."""
+
+    num_candidates: int
+    limit: int
+    recall: float
+    p50_ms: float
+    p95_ms: float
+
+
+def cosine_similarity(a: list[float], b: list[float]) -> float:
+    """Cosine similarity between two vectors."""
+    dot = sum(x * y for x, y in zip(a, b, strict=True))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def exact_top_k(
+    query_embedding: list[float], pages: list[SamplePage], k: int
+) -> list[str]:
+    """Ids of the k pages closest to the query by exact cosine similarity."""
+    ranked = sorted(
+        pages,
+        key=lambda page: cosine_similarity(query_embedding, page.embedding),
+        reverse=True,
+    )
+    return [page.id for page in ranked[:k]]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Percentile (0-100) of a list of values."""
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+async def export_sample(documents: int, output_path: Path, seed: int) -> None:
+    """Export every page of a random sample of documents."""
+    mongo_service = MongoDBService()
+    db = await mongo_service.connect_db()
+    collection = db[settings.MONGO_PAGES_COLLECTION]
+
+    try:
+        names: list[str] = await collection.distinct("nombre_archivo")
+        sampled = random.Random(seed).sample(names, k=min(documents, len(names)))
+
+        count = 0
+        with output_path.open("w", encoding="utf-8") as output:
+            cursor = collection.find({"nombre_archivo": {"$in": sampled}})
+            async for doc in cursor:
+                page = SamplePage(
+                    id=str(doc["_id"]),
+                    file_name=doc.get("nombre_archivo", ""),
+                    page=doc.get("pagina", 0),
+                    text=doc.get("text", ""),
+                    embedding=doc["embedding"],
+                )
+                output.write(page.model_dump_json() + "\n")
+                count += 1
+    finally:
+        await mongo_service.close_connection()
+
+    print(f"{count} pages from {len(sampled)} documents exported to {output_path}")
+
+
+def synthesize_queries(
+    pages_by_document: dict[str, list[SamplePage]], per_document: int, seed: int
+) -> list[BenchmarkQuery]:
+    """Build queries from the opening words of randomly chosen pages."""
+    rng = random.Random(seed)
+    queries: list[BenchmarkQuery] = []
+
+    for document, pages in pages_by_document.items():
+        candidates = [page for page in pages if page.text.strip()]
+        for page in rng.sample(candidates, k=min(per_document, len(candidates))):
+            queries.append(
+                BenchmarkQuery(
+                    document=document, query=" ".join(page.text.split()[:25])
+                )
+            )
+
+    return queries
+
+
+async def run_benchmark(
+    sample_path: Path,
+    queries_path: Path | None,
+    candidates: list[int],
+    limits: list[int],
+    queries_per_document: int,
+    target_recall: float,
+    seed: int,
+) -> None:
+    """Measure recall@limit and latency for every configuration."""
+    pages_by_document: dict[str, list[SamplePage]] = defaultdict(list)
+    with sample_path.open(encoding="utf-8") as sample:
+        for line in sample:
+            page = SamplePage.model_validate_json(line)
+            pages_by_document[page.file_name].append(page)
+
+    if queries_path:
+        raw: list[dict[str, Any]] = json.loads(queries_path.read_text(encoding="utf-8"))
+        queries = [
+            query
+            for query in map(BenchmarkQuery.model_validate, raw)
+            if query.document in pages_by_document
+        ]
+    else:
+        queries = synthesize_queries(pages_by_document, queries_per_document, seed)
+
+    mongo_service = MongoDBService()
+    await mongo_service.connect_db()
+
+    try:
+        texts = [query.query for query in queries]
+        async with openai_limiter.limit(
+            model=settings.OPENAI_EMBEDDING_MODEL, tokens=estimate_tokens(*texts)
+        ):
+            embeddings = await mongo_service.embedding.aembed_documents(texts)
+        print(f"{len(queries)} queries over {len(pages_by_document)} documents\n")
+
+        results: list[BenchmarkResult] = []
+        for limit in limits:
+            expected = [
+                set(exact_top_k(embedding, pages_by_document[query.document], limit))
+                for query, embedding in zip(queries, embeddings, strict=True)
+            ]
+
+            for num_candidates in candidates:
+                if num_candidates < limit:
+                    continue
+
+                recalls: list[float] = []
+                latencies: list[float] = []
+                for query, embedding, exact_ids in zip(
+                    queries, embeddings, expected, strict=True
+                ):
+                    start = time.perf_counter()
+                    matches = await mongo_service.search_best_matches(
+                        query=query.query,
+                        document_name=query.document,
+                        limit=limit,
+                        query_embedding=embedding,
+                        num_candidates=num_candidates,
+                        # Texts come with the search: resolving them from the
+                        # page cache would favour configurations run later
+                        id_first=False,
+                    )
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+                    if exact_ids:
+                        found = {match.id for match in matches.matches}
+                        recalls.append(len(found & exact_ids) / len(exact_ids))
+
+                results.append(
+                    BenchmarkResult(
+                        num_candidates=num_candidates,
+                        limit=limit,
+                        recall=statistics.fmean(recalls) if recalls else 0.0,
+                        p50_ms=percentile(latencies, 50),
+                        p95_ms=percentile(latencies, 95),
+                    )
+                )
+    finally:
+        await mongo_service.close_connection()
+
+    print(
+        f"{'limit':>6} {'numCandidates':>14} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8}"
+    )
+    for row in results:
+        print(
+            f"{row.limit:>6} {row.num_candidates:>14} {row.recall:>8.3f} "
+            f"{row.p50_ms:>8.1f} {row.p95_ms:>8.1f}"
+        )
+
+    print()
+    for limit in limits:
+        passing = [r for r in results if r.limit == limit and r.recall >= target_recall]
+        if passing:
+            best = min(passing, key=lambda r: (r.num_candidates, r.p95_ms))
+            print(
+                f"limit={limit}: cheapest numCandidates with recall >= {target_recall} "
+                f"is {best.num_candidates} "
+                f"(PAGES_SEARCH_CANDIDATES_FACTOR={math.ceil(best.num_candidates / limit)})"
+            )
+        else:
+            print(f"limit={limit}: no configuration reached recall {target_recall}")
+
+
+def parse_int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export a pages sample")
+    export_parser.add_argument("--documents", type=int, default=10)
+    export_parser.add_argument("--output", type=Path, required=True)
+    export_parser.add_argument("--seed", type=int, default=0)
+
+    run_parser = subparsers.add_parser("run", help="Run the recall/latency sweep")
+    run_parser.add_argument("--sample", type=Path, required=True)
+    run_parser.add_argument("--queries", type=Path, default=None)
+    run_parser.add_argument(
+        "--candidates", type=parse_int_list, default=[20, 50, 100, 200]
+    )
+    run_parser.add_argument(
+        "--limits", type=parse_int_list, default=[settings.PAGES_SEARCH_LIMIT]
+    )
+    run_parser.add_argument("--queries-per-document", type=int, default=5)
+    run_parser.add_argument("--target-recall", type=float, default=0.95)
+    run_parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+
+    # Offline work must never delay user-facing OpenAI calls
+    with openai_limiter.priority(Priority.BACKGROUND):
+        if args.command == "export":
+            asyncio.run(
+                export_sample(
+                    documents=args.documents, output_path=args.output, seed=args.seed
+                )
+            )
+        else:
+            asyncio.run(
+                run_benchmark(
+                    sample_path=args.sample,
+                    queries_path=args.queries,
+                    candidates=args.candidates,
+                    limits=args.limits,
+                    queries_per_document=args.queries_per_document,
+                    target_recall=args.target_recall,
+                    seed=args.seed,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
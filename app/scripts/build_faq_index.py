@@ -0,0 +1,109 @@
+"""Offline job that builds the precomputed FAQ answer index.
+
+The job runs in two steps so that every stored answer is reviewed by a person:
+
+1. ``generate`` runs the full search pipeline for a curated list of questions
+   per school and writes the answers to a review file.
+2. ``load`` embeds the questions marked as ``vetted`` in the review file and
+   upserts them into the FAQ collection used by the ``search_documents`` tool.
+
+Usage:
+    uv run python -m app.scripts.build_faq_index generate \\
+        --questions faq_questions.json --output faq_review.json
+    uv run python -m app.scripts.build_faq_index load --input faq_review.json
+
+The questions file maps each school name to its list of questions:
+    {"Ingeniería Informática": ["¿Cuánto cuesta la matrícula?", ...]}
+"""
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+
+from app.core.mongo_db import FAQEntry, MongoDBService
+from app.core.rate_limiter import Priority, openai_limiter
+from app.science_bot.agent.tools.search_documents.service import (
+    SearchDocumentsService,
+)
+
+
+async def generate(questions_path: Path, output_path: Path) -> None:
+    """Generate candidate answers for every curated question."""
+    questions: dict[str, list[str]] = json.loads(
+        questions_path.read_text(encoding="utf-8")
+    )
+    review: list[dict[str, Any]] = []
+
+    async with SearchDocumentsService() as service:
+        for school, school_questions in questions.items():
+            for question in school_questions:
+                result = await service.search_and_answer(
+                    query=question, school=school, use_faq=False
+                )
+                print(f"[{'ok' if result.success else 'failed'}] {school}: {question}")
+
+                if not result.success:
+                    continue
+
+                review.append(
+                    {
+                        **FAQEntry(
+                            school=school,
+                            question=question,
+                            answer=result.message,
+                            document_used=result.document_used,
+                        ).model_dump(),
+                        "vetted": False,
+                    }
+                )
+
+    output_path.write_text(
+        json.dumps(review, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    print(f"{len(review)} answers written to {output_path} for review")
+
+
+async def load(input_path: Path) -> None:
+    """Store the vetted answers of a review file in the FAQ collection."""
+    review: list[dict[str, Any]] = json.loads(input_path.read_text(encoding="utf-8"))
+    entries = [FAQEntry.model_validate(item) for item in review if item.get("vetted")]
+
+    mongo_service = MongoDBService()
+    await mongo_service.connect_db()
+    try:
+        written = await mongo_service.upsert_faq_entries(entries)
+    finally:
+        await mongo_service.close_connection()
+
+    print(f"{written} vetted FAQ entries stored ({len(review) - len(entries)} skipped)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser(
+        "generate", help="Generate answers for review"
+    )
+    generate_parser.add_argument("--questions", type=Path, required=True)
+    generate_parser.add_argument("--output", type=Path, required=True)
+
+    load_parser = subparsers.add_parser("load", help="Store vetted answers")
+    load_parser.add_argument("--input", type=Path, required=True)
+
+    args = parser.parse_args()
+
+    # Offline work must never delay user-facing OpenAI calls
+    with openai_limiter.priority(Priority.BACKGROUND):
+        if args.command == "generate":
+            asyncio.run(
+                generate(questions_path=args.questions, output_path=args.output)
+            )
+        else:
+            asyncio.run(load(input_path=args.input))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Offline job that stores token counts and summaries on the pages collection.
+
+Run it after ingesting new documents (and once over existing ones). For every
+page without a ``token_count`` it writes:
+
+- ``token_count``: tokens of the page text for the answer model's tokenizer
+- ``summary``: for pages longer than ``PAGE_SUMMARY_MAX_TOKENS``, an
+  extractive summary (highest-scoring sentences, in page order) or, with
+  ``--llm``, a summary written by the chat model
+- ``summary_token_count``: tokens of the summary
+
+The answer generator uses these fields to fit pages into
+``ANSWER_CONTEXT_TOKEN_BUDGET`` without tokenizing at request time.
+
+Usage:
+    uv run python -m app.scripts.enrich_pages
+    uv run python -m app.scripts.enrich_pages --llm --concurrency 4
+    uv run python -m app.scripts.enrich_pages --force --limit 100
+"""
+
+import argparse
+import asyncio
+import re
+import unicodedata
+from collections import Counter
+from typing import Any
+
+import tiktoken
+from langchain_core.messages import HumanMessage, SystemMessage
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.llm import STAGE_CONFIGS, LLMStage, get_chat_model
+from app.core.mongo_db import MongoDBService
+from app.core.rate_limiter import Priority, estimate_tokens, openai_limiter
+
+SUMMARY_SYSTEM_PROMPT = (
+    "Summarize the following page of an official university document in the "
+    "same language as the page. Keep names, dates, amounts, requirements and "
+    "procedures; leave out everything else. Return only the summary."
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+|\n{2,}")
+
+
+def get_encoding() -> tiktoken.Encoding:
+    """Tokenizer of the model that receives the pages."""
+    try:
+        return tiktoken.encoding_for_model(STAGE_CONFIGS[LLMStage.ANSWER].model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def _words(text: str) -> list[str]:
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    plain = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return [word for word in re.findall(r"\w+", plain) if len(word) > 3]
+
+
+def extractive_summary(text: str, max_tokens: int, encoding: tiktoken.Encoding) -> str:
+    """Keep the sentences with the most frequent words of the page.
+
+    Args:
+        text: Page text
+        max_tokens: Token budget of the summary
+        encoding: Tokenizer used to measure the summary
+
+    Returns:
+        The selected sentences, in their original order
+    """
+    sentences = [
+        sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()
+    ]
+    frequencies = Counter(_words(text))
+
+    def score(sentence: str) -> float:
+        words = _words(sentence)
+        return sum(frequencies[word] for word in words) / (len(words) + 1)
+
+    ranked = sorted(
+        range(len(sentences)), key=lambda i: score(sentences[i]), reverse=True
+    )
+    selected: list[int] = []
+    used = 0
+    for index in ranked:
+        tokens = len(encoding.encode(sentences[index]))
+        if used + tokens > max_tokens or score(sentences[index]) == 0:
+            continue
+        selected.append(index)
+        used += tokens
+
+    return " ".join(sentences[index] for index in sorted(selected))
+
+
+async def llm_summary(text: str, max_tokens: int) -> str:
+    """Summarize a page with the chat model, as a background OpenAI call."""
+    model = settings.OPENAI_MODEL
+    messages = [
+        SystemMessage(content=SUMMARY_SYSTEM_PROMPT),
+        HumanMessage(content=text),
+    ]
+    with openai_limiter.priority(Priority.BACKGROUND):
+        async with openai_limiter.limit(
+            model=model,
+            tokens=max_tokens + estimate_tokens(SUMMARY_SYSTEM_PROMPT, text),
+        ) as lease:
+            response = await get_chat_model(model, max_tokens).ainvoke(messages)
+            lease.record_message(response)
+    return str(response.content).strip()
+
+
+async def enrich(
+    force: bool, use_llm: bool, batch_size: int, concurrency: int, limit: int | None
+) -> None:
+    """Write token counts and summaries for the pages that lack them."""
+    encoding = get_encoding()
+    max_tokens = settings.PAGE_SUMMARY_MAX_TOKENS
+    semaphore = asyncio.Semaphore(concurrency)
+
+    mongo_service = MongoDBService()
+    db = await mongo_service.connect_db()
+    collection = db[settings.MONGO_PAGES_COLLECTION]
+
+    async def enrich_page(doc: dict[str, Any]) -> UpdateOne:
+        text: str = doc.get("text", "")
+        token_count = len(encoding.encode(text))
+        fields: dict[str, Any] = {
+            "token_count": token_count,
+            "summary": None,
+            "summary_token_count": None,
+        }
+
+        # Short pages fit as they are; a summary would not save anything
+        if token_count > max_tokens:
+            if use_llm:
+                async with semaphore:
+                    summary = await llm_summary(text, max_tokens)
+            else:
+                summary = extractive_summary(text, max_tokens, encoding)
+            fields["summary"] = summary
+            fields["summary_token_count"] = len(encoding.encode(summary))
+
+        return UpdateOne({"_id": doc["_id"]}, {"$set": fields})
+
+    query: dict[str, Any] = {} if force else {"token_count": {"$exists": False}}
+    cursor = collection.find(query, {"text": 1})
+    if limit is not None:
+        cursor = cursor.limit(limit)
+
+    written = 0
+    try:
+        batch: list[dict[str, Any]] = []
+        async for doc in cursor:  # type: ignore[misc]
+            batch.append(doc)
+            if len(batch) < batch_size:
+                continue
+            updates = await asyncio.gather(*(enrich_page(doc) for doc in batch))
+            written += (
+                await collection.bulk_write(updates, ordered=False)
+            ).modified_count
+            print(f"{written} pages enriched")
+            batch = []
+
+        if batch:
+            updates = await asyncio.gather(*(enrich_page(doc) for doc in batch))
+            written += (
+                await collection.bulk_write(updates, ordered=False)
+            ).modified_count
+    finally:
+        await mongo_service.close_connection()
+
+    print(
+        f"Done: {written} pages enriched ({'llm' if use_llm else 'extractive'} summaries)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--force", action="store_true", help="Recompute pages already enriched"
+    )
+    parser.add_argument(
+        "--llm", action="store_true", help="Summarize with the chat model"
+    )
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="Concurrent LLM summaries"
+    )
+    parser.add_argument("--limit", type=int, default=None, help="Pages to process")
+    args = parser.parse_args()
+
+    asyncio.run(
+        enrich(
+            force=args.force,
+            use_llm=args.llm,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            limit=args.limit,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Report the top consumers and slowest requests from the request ledger.
+
+Usage:
+    uv run python -m app.scripts.ledger_report users --by tokens --hours 24
+    uv run python -m app.scripts.ledger_report schools --by time
+    uv run python -m app.scripts.ledger_report slowest --limit 20
+"""
+
+import argparse
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+from app.core.config import settings
+
+ORDER_COLUMNS: dict[str, str] = {
+    "tokens": "total_tokens",
+    "time": "total_ms",
+    "requests": "requests",
+}
+
+
+def top_consumers(
+    connection: sqlite3.Connection, group_by: str, order: str, since: float, limit: int
+) -> None:
+    """Print users or schools ordered by tokens, time or number of requests."""
+    rows = connection.execute(
+        f"""
+        SELECT COALESCE({group_by}, '-') AS name,
+               COUNT(*) AS requests,
+               SUM(prompt_tokens + completion_tokens) AS total_tokens,
+               SUM(total_ms) AS total_ms,
+               AVG(total_ms) AS avg_ms,
+               SUM(faq_hit) AS faq_hits
+        FROM requests
+        WHERE created_at >= ?
+        GROUP BY name
+        ORDER BY {ORDER_COLUMNS[order]} DESC
+        LIMIT ?
+        """,
+        (since, limit),
+    ).fetchall()
+
+    print(
+        f"{group_by:<45} {'requests':>9} {'tokens':>10} {'total s':>9} "
+        f"{'avg ms':>9} {'faq':>5}"
+    )
+    for name, requests, tokens, total_ms, avg_ms, faq_hits in rows:
+        print(
+            f"{name[:45]:<45} {requests:>9} {tokens:>10} {total_ms / 1000:>9.1f} "
+            f"{avg_ms:>9.0f} {faq_hits:>5}"
+        )
+
+
+def slowest(connection: sqlite3.Connection, since: float, limit: int) -> None:
+    """Print the slowest requests with their token usage breakdown."""
+    rows = connection.execute(
+        """
+        SELECT created_at, user_id, school, document_used, total_ms, retrieval_ms,
+               prompt_tokens, completion_tokens, llm_calls, embedding_calls, success
+        FROM requests
+        WHERE created_at >= ?
+        ORDER BY total_ms DESC
+        LIMIT ?
+        """,
+        (since, limit),
+    ).fetchall()
+
+    for row in rows:
+        (
+            created_at,
+            user_id,
+            school,
+            document_used,
+            total_ms,
+            retrieval_ms,
+            prompt_tokens,
+            completion_tokens,
+            llm_calls,
+            embedding_calls,
+            success,
+        ) = row
+        print(
+            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created_at))} "
+            f"{total_ms:>8.0f} ms (retrieval {retrieval_ms:.0f} ms) "
+            f"user={user_id} school={school or '-'} document={document_used or '-'} "
+            f"llm_calls={llm_calls} embeddings={embedding_calls} "
+            f"tokens={prompt_tokens}+{completion_tokens}"
+            f"{'' if success else ' FAILED'}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", type=Path, default=Path(settings.LEDGER_DB_PATH))
+    parser.add_argument("--hours", type=float, default=24 * 7)
+    parser.add_argument("--limit", type=int, default=10)
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command in ("users", "schools"):
+        consumers_parser = subparsers.add_parser(command, help=f"Top {command} by cost")
+        consumers_parser.add_argument(
+            "--by", choices=list(ORDER_COLUMNS), default="tokens"
+        )
+    subparsers.add_parser("slowest", help="Slowest requests")
+
+    args = parser.parse_args()
+    since = time.time() - args.hours * 3600
+
+    if not args.db.exists():
+        parser.error(f"ledger database not found: {args.db}")
+
+    with closing(sqlite3.connect(args.db)) as connection:
+        if args.command == "slowest":
+            slowest(connection, since=since, limit=args.limit)
+        else:
+            top_consumers(
+                connection,
+                group_by="user_id" if args.command == "users" else "school",
+                order=args.by,
+                since=since,
+                limit=args.limit,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+"""End-to-end load generator for the ``/webhook`` endpoint.
+
+Synthesizes Evolution ``messages.upsert`` payloads for a population of phone
+numbers, each with a school and a name (first messages state the school,
+later ones are follow-up questions or small talk). It posts them to
+``/webhook`` as Poisson arrivals at a target rate, raised step by step. After
+each step it prints the throughput, the p50/p95/p99 latency and the error
+rate. The ramp stops once the error rate or the p95 latency exceeds its
+limit, and the last step within both is reported as the saturation point.
+
+Without ``--target``, the tool starts two local processes and drives the app
+in isolation:
+
+- ``standins``: OpenAI and Evolution stand-ins with simulated latencies
+- ``serve``: the app itself, pointed at those stand-ins and backed by an
+  in-memory MongoDB stand-in (see ``app.scripts.load_test_standins``)
+
+Usage:
+    uv run python -m app.scripts.load_test run
+    uv run python -m app.scripts.load_test run \\
+        --start-rate 2 --rate-step 2 --max-rate 40 --step-seconds 30 \\
+        --chat-latency 0.8 --embedding-latency 0.1 --mongo-latency 0.03
+    uv run python -m app.scripts.load_test run --target http://localhost:8000
+
+The stand-in processes can also be started by hand:
+    uv run python -m app.scripts.load_test standins --port 9100
+    uv run python -m app.scripts.load_test serve --port 9000 \\
+        --standins-url http://127.0.0.1:9100
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+import httpx
+
+QUESTIONS = [
+    "¿Cuánto cuesta la matrícula?",
+    "¿Cuándo empiezan las clases del semestre?",
+    "¿Qué requisitos necesito para obtener el bachiller?",
+    "¿Cómo solicito una constancia de estudios?",
+    "¿Cuál es el horario de la biblioteca?",
+    "¿Cuántos créditos puedo llevar por ciclo?",
+    "¿Dónde pago los derechos de trámite?",
+    "¿Cómo hago una reserva de matrícula?",
+    "¿Qué pasa si desapruebo un curso tres veces?",
+    "¿Cuál es el plazo para presentar la tesis?",
+]
+SMALL_TALK = ["hola", "gracias", "ok", "muchas gracias!", "buenas noches"]
+NAMES = ["María", "José", "Lucía", "Carlos", "Ana", "Luis", "Rosa", "Jorge"]
+
+
+@dataclass
+class SyntheticUser:
+    """Phone number with a school and a display name."""
+
+    phone_number: str
+    school: str
+    name: str
+    messages_sent: int = 0
+
+
+class SyntheticTraffic:
+    """Realistic Evolution webhook payloads for a population of users."""
+
+    def __init__(self, users: int, small_talk_ratio: float, seed: int) -> None:
+        # Loaded lazily: it imports the app settings
+        from app.scripts.load_test_standins import SCHOOLS
+
+        self.rng = random.Random(seed)
+        self.small_talk_ratio = small_talk_ratio
+        self.instance_id = str(uuid.UUID(int=self.rng.getrandbits(128)))
+        self.users = [
+            SyntheticUser(
+                phone_number=f"519{self.rng.randrange(10**8):08d}",
+                school=self.rng.choice(SCHOOLS),
+                name=self.rng.choice(NAMES),
+            )
+            for _ in range(users)
+        ]
+
+    def _text(self, user: SyntheticUser) -> str:
+        question = self.rng.choice(QUESTIONS)
+        if user.messages_sent == 0:
+            return f"Hola, soy de {user.school}. {question}"
+        if self.rng.random() < self.small_talk_ratio:
+            return self.rng.choice(SMALL_TALK)
+        return question
+
+    def next_payload(self, instance: str) -> dict[str, Any]:
+        """``messages.upsert`` payload of a random user's next message."""
+        user = self.rng.choice(self.users)
+        text = self._text(user)
+        user.messages_sent += 1
+        now = int(time.time())
+
+        return {
+            "event": "messages.upsert",
+            "instance": instance,
+            "data": {
+                "key": {
+                    "remoteJid": f"{user.phone_number}@s.whatsapp.net",
+                    "fromMe": False,
+                    "id": uuid.uuid4().hex[:20].upper(),
+                },
+                "pushName": user.name,
+                "message": {
+                    "conversation": text,
+                    "messageContextInfo": {
+                        "deviceListMetadata": {
+                            "senderKeyHash": base64.b64encode(
+                                self.rng.randbytes(10)
+                            ).decode(),
+                            "senderTimestamp": str(now - 86_400),
+                            "recipientKeyHash": base64.b64encode(
+                                self.rng.randbytes(10)
+                            ).decode(),
+                            "recipientTimestamp": str(now - 3_600),
+                        },
+                        "deviceListMetadataVersion": 2,
+                        "messageSecret": base64.b64encode(
+                            self.rng.randbytes(32)
+                        ).decode(),
+                    },
+                },
+                "messageType": "conversation",
+                "messageTimestamp": now,
+                "instanceId": self.instance_id,
+                "source": self.rng.choice(["android", "ios", "web"]),
+            },
+            "destination": "http://localhost/webhook",
+            "date_time": datetime.now(UTC).isoformat(),
+            "sender": "51900000000@s.whatsapp.net",
+            "server_url": "http://localhost:8080",
+            "apikey": "load-test",
+        }
+
+
+@dataclass
+class StepResult:
+    """Outcome of the requests sent during one ramp step."""
+
+    rate: float
+    seconds: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    @property
+    def sent(self) -> int:
+        return len(self.latencies) + self.errors
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.sent if self.sent else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank latency percentile (0 without successes)."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))]
+
+
+async def send(
+    client: httpx.AsyncClient, payload: dict[str, Any], result: StepResult
+) -> None:
+    """Post one webhook and record its latency or error."""
+    start = time.perf_counter()
+    try:
+        response = await client.post("/webhook", json=payload)
+        ok = response.status_code == 200 and response.json().get("status") == "success"
+    except (httpx.HTTPError, ValueError):
+        ok = False
+
+    if ok:
+        result.latencies.append(time.perf_counter() - start)
+    else:
+        result.errors += 1
+
+
+async def run_step(
+    client: httpx.AsyncClient,
+    traffic: SyntheticTraffic,
+    instance: str,
+    rate: float,
+    seconds: float,
+) -> StepResult:
+    """Send Poisson arrivals at ``rate`` for ``seconds`` and wait for them."""
+    result = StepResult(rate=rate)
+    tasks: list[asyncio.Task[None]] = []
+    start = time.perf_counter()
+    next_at = 0.0
+
+    while True:
+        next_at += traffic.rng.expovariate(rate)
+        if next_at >= seconds:
+            break
+        await asyncio.sleep(max(0.0, next_at - (time.perf_counter() - start)))
+        payload = traffic.next_payload(instance)
+        tasks.append(asyncio.create_task(send(client, payload, result)))
+
+    await asyncio.gather(*tasks)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+async def ramp(args: argparse.Namespace, target: str) -> None:
+    """Raise the rate step by step until a limit is exceeded."""
+    traffic = SyntheticTraffic(
+        users=args.users, small_talk_ratio=args.small_talk_ratio, seed=args.seed
+    )
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    saturation: float | None = None
+
+    print(
+        f"{'rate/s':>7}{'sent':>7}{'ok/s':>8}{'p50 s':>8}{'p95 s':>8}"
+        f"{'p99 s':>8}{'mean s':>8}{'errors':>8}"
+    )
+    async with httpx.AsyncClient(
+        base_url=target, timeout=args.timeout, limits=limits
+    ) as client:
+        rate = args.start_rate
+        while rate <= args.max_rate:
+            result = await run_step(
+                client, traffic, args.instance, rate, args.step_seconds
+            )
+            mean = statistics.mean(result.latencies) if result.latencies else 0.0
+            print(
+                f"{rate:>7.1f}{result.sent:>7}"
+                f"{len(result.latencies) / result.seconds:>8.2f}"
+                f"{result.percentile(50):>8.2f}{result.percentile(95):>8.2f}"
+                f"{result.percentile(99):>8.2f}{mean:>8.2f}"
+                f"{result.error_rate:>8.1%}"
+            )
+
+            if (
+                result.error_rate > args.max_error_rate
+                or result.percentile(95) > args.max_p95
+            ):
+                break
+            saturation = rate
+            rate += args.rate_step
+
+    if saturation is None:
+        print("\nLimits exceeded at the first step")
+    else:
+        print(
+            f"\nHighest rate within {args.max_error_rate:.0%} errors and "
+            f"p95 <= {args.max_p95:.1f}s: {saturation:.1f} messages/s"
+        )
+
+
+async def wait_ready(url: str, timeout: float) -> None:
+    """Poll ``url`` until it answers 200."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=5) as client:
+        while True:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{url} not ready after {timeout:.0f}s")
+            await asyncio.sleep(0.5)
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Start the stand-ins and the app (unless ``--target``), then ramp."""
+    if args.target:
+        await ramp(args, args.target)
+        return
+
+    standins_url = f"http://127.0.0.1:{args.standins_port}"
+    target = f"http://127.0.0.1:{args.app_port}"
+    latency_args = [
+        f"--chat-latency={args.chat_latency}",
+        f"--chat-token-latency={args.chat_token_latency}",
+        f"--embedding-latency={args.embedding_latency}",
+        f"--evolution-latency={args.evolution_latency}",
+        f"--answer-words={args.answer_words}",
+    ]
+    command = [sys.executable, "-m", "app.scripts.load_test"]
+
+    standins = await asyncio.create_subprocess_exec(
+        *command, "standins", f"--port={args.standins_port}", *latency_args
+    )
+    server = await asyncio.create_subprocess_exec(
+        *command,
+        "serve",
+        f"--port={args.app_port}",
+        f"--standins-url={standins_url}",
+        f"--mongo-latency={args.mongo_latency}",
+    )
+    try:
+        await wait_ready(f"{standins_url}/", timeout=30)
+        await wait_ready(f"{target}/ready", timeout=120)
+        await ramp(args, target)
+    finally:
+        for process in (server, standins):
+            process.terminate()
+            await process.wait()
+
+
+def run_standins(args: argparse.Namespace) -> None:
+    """Serve the OpenAI and Evolution stand-ins."""
+    import uvicorn
+
+    from app.scripts.load_test_standins import StandInLatencies, create_standins_app
+
+    latencies = StandInLatencies(
+        chat=args.chat_latency,
+        chat_per_token=args.chat_token_latency,
+        embedding=args.embedding_latency,
+        evolution=args.evolution_latency,
+    )
+    uvicorn.run(
+        create_standins_app(latencies, answer_words=args.answer_words),
+        host="127.0.0.1",
+        port=args.port,
+        log_level="warning",
+    )
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Run the app against the stand-ins."""
+    # Must be set before the app settings are loaded
+    os.environ.update(
+        {
+            "OPENAI_API_KEY": "stand-in",
+            "OPENAI_BASE_URL": f"{args.standins_url}/v1",
+            "OPENAI_API_BASE": f"{args.standins_url}/v1",
+            "EVOLUTION_API_URL": args.standins_url,
+            "DEDUP_BACKEND": "memory",
+            "PROFILE_BACKEND": "memory",
+            "LEDGER_DB_PATH": os.path.join(tempfile.gettempdir(), "load_test.sqlite3"),
+            "LOGFIRE_TOKEN": "",
+        }
+    )
+
+    import uvicorn
+
+    from app.scripts.load_test_standins import install_mongo_standin
+
+    install_mongo_standin(
+        latency=args.mongo_latency,
+        pages_per_document=args.pages_per_document,
+        words_per_page=args.words_per_page,
+        seed=args.seed,
+    )
+
+    from app.main import app
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def add_latency_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--chat-latency", type=float, default=0.6, help="Seconds per chat call"
+    )
+    parser.add_argument(
+        "--chat-token-latency",
+        type=float,
+        default=0.005,
+        help="Extra seconds per completion token",
+    )
+    parser.add_argument(
+        "--embedding-latency", type=float, default=0.1, help="Seconds per request"
+    )
+    parser.add_argument(
+        "--evolution-latency", type=float, default=0.05, help="Seconds per request"
+    )
+    parser.add_argument(
+        "--answer-words", type=int, default=120, help="Words per generated answer"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Ramp the load on /webhook")
+    run_parser.add_argument(
+        "--target", default=None, help="App URL (default: start the stand-ins)"
+    )
+    run_parser.add_argument("--users", type=int, default=500)
+    run_parser.add_argument("--start-rate", type=float, default=1)
+    run_parser.add_argument("--rate-step", type=float, default=1)
+    run_parser.add_argument("--max-rate", type=float, default=30)
+    run_parser.add_argument("--step-seconds", type=float, default=30)
+    run_parser.add_argument(
+        "--timeout", type=float, default=60, help="Seconds per webhook"
+    )
+    run_parser.add_argument("--max-error-rate", type=float, default=0.01)
+    run_parser.add_argument(
+        "--max-p95", type=float, default=20, help="Seconds of p95 latency"
+    )
+    run_parser.add_argument("--small-talk-ratio", type=float, default=0.1)
+    run_parser.add_argument("--instance", default="load-test")
+    run_parser.add_argument("--seed", type=int, default=7)
+    run_parser.add_argument("--app-port", type=int, default=9000)
+    run_parser.add_argument("--standins-port", type=int, default=9100)
+    run_parser.add_argument(
+        "--mongo-latency", type=float, default=0.03, help="Seconds per query"
+    )
+    add_latency_arguments(run_parser)
+
+    standins_parser = subparsers.add_parser(
+        "standins", help="Serve the OpenAI and Evolution stand-ins"
+    )
+    standins_parser.add_argument("--port", type=int, default=9100)
+    add_latency_arguments(standins_parser)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the app on stand-ins")
+    serve_parser.add_argument("--port", type=int, default=9000)
+    serve_parser.add_argument("--standins-url", default="http://127.0.0.1:9100")
+    serve_parser.add_argument("--mongo-latency", type=float, default=0.03)
+    serve_parser.add_argument("--pages-per-document", type=int, default=20)
+    serve_parser.add_argument("--words-per-page", type=int, default=350)
+    serve_parser.add_argument("--seed", type=int, default=7)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        asyncio.run(run(args))
+    elif args.command == "standins":
+        run_standins(args)
+    else:
+        serve(args)
+
+
+if __name__ == "__main__":
+    main()
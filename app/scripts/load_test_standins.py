@@ -0,0 +1,367 @@
+"""Local stand-ins for OpenAI, MongoDB and Evolution used by ``load_test``.
+
+- ``create_standins_app`` serves the OpenAI endpoints the app calls (chat
+  completions, embeddings, model retrieval) and the Evolution endpoints
+  (send text, presence, read receipts) with simulated latencies. The chat
+  stand-in plays each stage: the agent calls ``search_documents`` once the
+  school is known, the selector names available documents and the answer
+  generator writes a fixed-length answer.
+- ``StandInMongoService`` is a ``MongoDBService`` whose database is an
+  in-memory synthetic corpus (a few documents per school, pages of
+  plausible text) answering ``find`` and ``$vectorSearch`` aggregations
+  after a simulated latency. The service logic above the driver (catalog,
+  id-first retrieval, page cache) runs unchanged.
+
+Import this module only after the environment points the app at the
+stand-ins: it loads the app settings.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import random
+import re
+import struct
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import FastAPI, Request
+
+from app.core import mongo_db
+from app.core.config import settings
+from app.core.rate_limiter import estimate_tokens
+from app.science_bot.agent.tools.search_documents.tool import SchoolEnum
+
+SCHOOLS = [school.value for school in SchoolEnum]
+GENERAL_INFO = "Información General"
+DOCUMENT_KINDS = ["Reglamento Académico", "Plan de Estudios", "Tarifario de Trámites"]
+EMBEDDING_DIMENSIONS = 1536
+
+WORDS = (
+    "matrícula semestre créditos estudiante facultad escuela reglamento pago "
+    "constancia trámite requisito plazo solicitud resolución curso docente "
+    "evaluación nota promedio titulación bachiller tesis asesor jurado ciclo "
+    "horario biblioteca certificado vacante admisión reserva retiro convalidación "
+    "prácticas preprofesionales costo soles oficina registro académico decano"
+).split()
+
+
+@dataclass
+class StandInLatencies:
+    """Simulated latencies in seconds (each call waits 0.5x-1.5x the value)."""
+
+    chat: float = 0.6
+    chat_per_token: float = 0.005
+    embedding: float = 0.1
+    evolution: float = 0.05
+
+
+async def simulate(seconds: float) -> None:
+    """Wait about ``seconds`` (uniform jitter of +-50%)."""
+    if seconds > 0:
+        await asyncio.sleep(seconds * random.uniform(0.5, 1.5))
+
+
+# --- OpenAI and Evolution ---------------------------------------------------
+
+_VECTOR = [1 / EMBEDDING_DIMENSIONS**0.5] * EMBEDDING_DIMENSIONS
+_VECTOR_BASE64 = base64.b64encode(struct.pack(f"<{len(_VECTOR)}f", *_VECTOR)).decode()
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, list):
+        return " ".join(str(part.get("text", "")) for part in content)
+    return str(content or "")
+
+
+def _completion(
+    model: str,
+    prompt_tokens: int,
+    content: str | None = None,
+    tool_calls: list[dict[str, Any]] | None = None,
+) -> dict[str, Any]:
+    message: dict[str, Any] = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    completion_tokens = estimate_tokens(content or json.dumps(tool_calls))
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+                "logprobs": None,
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def _answer(words: int) -> str:
+    return " ".join(random.choices(WORDS, k=words)).capitalize() + "."
+
+
+def _chat_reply(body: dict[str, Any], answer_words: int) -> dict[str, Any]:
+    model = body.get("model", "stand-in")
+    messages = body.get("messages", [])
+    transcript = "\n".join(_text(message.get("content")) for message in messages)
+    prompt_tokens = estimate_tokens(transcript)
+    last = messages[-1] if messages else {}
+    last_text = _text(last.get("content"))
+
+    # Agent: search once the school is known, then relay the tool result
+    if body.get("tools"):
+        if last.get("role") == "tool":
+            return _completion(model, prompt_tokens, content=last_text[:2000])
+        schools = [school for school in SCHOOLS if school in transcript]
+        if not schools:
+            return _completion(
+                model, prompt_tokens, content="¿De qué escuela profesional eres?"
+            )
+        arguments = {"query": last_text, "schools": schools[-1:]}
+        tool_call = {
+            "id": f"call_{uuid.uuid4().hex[:24]}",
+            "type": "function",
+            "function": {
+                "name": "search_documents",
+                "arguments": json.dumps(arguments, ensure_ascii=False),
+            },
+        }
+        return _completion(model, prompt_tokens, tool_calls=[tool_call])
+
+    # Document selector: name the first available documents
+    if "AVAILABLE DOCUMENTS:" in last_text:
+        names = re.findall(r"^Document: (.+)$", last_text, flags=re.MULTILINE)
+        top = re.search(r"TOP (\d+)", last_text)
+        count = int(top.group(1)) if top else 2
+        return _completion(model, prompt_tokens, content="\n".join(names[:count]))
+
+    # Answer generator
+    return _completion(model, prompt_tokens, content=_answer(answer_words))
+
+
+def create_standins_app(latencies: StandInLatencies, answer_words: int) -> FastAPI:
+    """OpenAI and Evolution stand-ins served from a single app."""
+    standins = FastAPI()
+
+    @standins.get("/v1/models/{model}")
+    async def retrieve_model(model: str) -> dict[str, Any]:
+        return {"id": model, "object": "model", "created": 0, "owned_by": "stand-in"}
+
+    @standins.post("/v1/embeddings")
+    async def embeddings(request: Request) -> dict[str, Any]:
+        body = await request.json()
+        inputs = body["input"]
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        await simulate(latencies.embedding)
+
+        vector: Any = (
+            _VECTOR_BASE64 if body.get("encoding_format") == "base64" else _VECTOR
+        )
+        tokens = sum(
+            len(item) if isinstance(item, list) else estimate_tokens(item)
+            for item in inputs
+        )
+        return {
+            "object": "list",
+            "model": body.get("model", "stand-in"),
+            "data": [
+                {"object": "embedding", "index": index, "embedding": vector}
+                for index in range(len(inputs))
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @standins.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> dict[str, Any]:
+        reply = _chat_reply(await request.json(), answer_words)
+        completion_tokens = reply["usage"]["completion_tokens"]
+        await simulate(latencies.chat + latencies.chat_per_token * completion_tokens)
+        return reply
+
+    @standins.get("/")
+    async def evolution_root() -> dict[str, Any]:
+        return {"status": 200, "message": "Evolution API stand-in"}
+
+    @standins.post("/message/sendText/{instance}")
+    async def send_text(instance: str, request: Request) -> dict[str, Any]:  # noqa: ARG001
+        body = await request.json()
+        await simulate(latencies.evolution)
+        return {
+            "key": {
+                "remoteJid": f"{body['number']}@s.whatsapp.net",
+                "fromMe": True,
+                "id": uuid.uuid4().hex[:20].upper(),
+            },
+            "message": {"conversation": body.get("text", "")},
+            "messageTimestamp": int(time.time()),
+            "status": "PENDING",
+        }
+
+    @standins.post("/chat/sendPresence/{instance}")
+    @standins.post("/chat/markMessageAsRead/{instance}")
+    async def chat_action(instance: str) -> dict[str, Any]:  # noqa: ARG001
+        await simulate(latencies.evolution)
+        return {"status": "ok"}
+
+    return standins
+
+
+# --- MongoDB ----------------------------------------------------------------
+
+
+def build_corpus(
+    pages_per_document: int, words_per_page: int, seed: int
+) -> dict[str, list[dict[str, Any]]]:
+    """Documents and pages collections of a synthetic corpus."""
+    rng = random.Random(seed)
+    documents: list[dict[str, Any]] = []
+    pages: list[dict[str, Any]] = []
+
+    for school in [*SCHOOLS, GENERAL_INFO]:
+        for kind in DOCUMENT_KINDS:
+            name = f"{kind} - {school}"
+            documents.append(
+                {
+                    "_id": f"doc-{len(documents)}",
+                    "nombre": name,
+                    "descripcion": f"{kind} vigente de {school}: requisitos, "
+                    "plazos, costos y procedimientos.",
+                    "tipo": school,
+                }
+            )
+            for page in range(1, pages_per_document + 1):
+                text = " ".join(rng.choices(WORDS, k=words_per_page))
+                pages.append(
+                    {
+                        "_id": f"page-{len(pages)}",
+                        "nombre_archivo": name,
+                        "pagina": page,
+                        "text": text.capitalize() + ".",
+                    }
+                )
+
+    return {
+        settings.MONGO_DOCUMENTS_COLLECTION: documents,
+        settings.MONGO_PAGES_COLLECTION: pages,
+    }
+
+
+def _matches(doc: dict[str, Any], query: dict[str, Any]) -> bool:
+    for field, condition in query.items():
+        if isinstance(condition, dict) and "$in" in condition:
+            if doc.get(field) not in condition["$in"]:
+                return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+
+def _project(doc: dict[str, Any], projection: dict[str, Any] | None) -> dict[str, Any]:
+    if not projection:
+        return dict(doc)
+    return {key: doc[key] for key in doc if key == "_id" or projection.get(key) == 1}
+
+
+class StandInCursor:
+    """Async iterable of documents delivered after a simulated round trip."""
+
+    def __init__(self, docs: list[dict[str, Any]], latency: float) -> None:
+        self.docs = docs
+        self.latency = latency
+
+    async def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        await simulate(self.latency)
+        for doc in self.docs:
+            yield doc
+
+
+class StandInCollection:
+    """The ``find`` and ``aggregate`` subset of a Motor collection."""
+
+    def __init__(self, docs: list[dict[str, Any]], latency: float) -> None:
+        self.docs = docs
+        self.latency = latency
+
+    def find(
+        self, query: dict[str, Any], projection: dict[str, Any] | None = None
+    ) -> StandInCursor:
+        docs = [_project(doc, projection) for doc in self.docs if _matches(doc, query)]
+        return StandInCursor(docs, self.latency)
+
+    def aggregate(self, pipeline: list[dict[str, Any]]) -> StandInCursor:
+        docs = self.docs
+        for stage in pipeline:
+            if "$vectorSearch" in stage:
+                search = stage["$vectorSearch"]
+                candidates = [
+                    doc for doc in docs if _matches(doc, search.get("filter", {}))
+                ]
+                picked = random.sample(
+                    candidates, min(search["limit"], len(candidates))
+                )
+                scores = sorted(
+                    (random.uniform(0.6, 0.95) for _ in picked), reverse=True
+                )
+                docs = [
+                    {**doc, "score": score}
+                    for doc, score in zip(picked, scores, strict=True)
+                ]
+            elif "$project" in stage:
+                projection = {
+                    key: 1 for key, value in stage["$project"].items() if value
+                }
+                docs = [_project(doc, projection) for doc in docs]
+        return StandInCursor(docs, self.latency)
+
+
+class StandInDatabase:
+    """Collections by name; unknown collections are empty (e.g. no FAQ)."""
+
+    def __init__(
+        self, collections: dict[str, list[dict[str, Any]]], latency: float
+    ) -> None:
+        self.collections = collections
+        self.latency = latency
+
+    def __getitem__(self, name: str) -> StandInCollection:
+        return StandInCollection(self.collections.get(name, []), self.latency)
+
+
+class StandInMongoService(mongo_db.MongoDBService):
+    """``MongoDBService`` backed by the synthetic in-memory corpus."""
+
+    corpus: dict[str, list[dict[str, Any]]] = {}
+    latency: float = 0.0
+
+    async def connect_db(self) -> Any:
+        if self.db is None:
+            await simulate(self.latency)
+            self.db = StandInDatabase(self.corpus, self.latency)  # type: ignore[assignment]
+        return self.db
+
+    async def close_connection(self) -> None:
+        pass
+
+
+def install_mongo_standin(
+    latency: float, pages_per_document: int, words_per_page: int, seed: int
+) -> None:
+    """Make ``get_mongo_service()`` build the stand-in (call before first use)."""
+    StandInMongoService.corpus = build_corpus(pages_per_document, words_per_page, seed)
+    StandInMongoService.latency = latency
+    mongo_db.MongoDBService = StandInMongoService  # type: ignore[misc]
@@ -0,0 +1,57 @@
+"""Import-time profile of the app entry point.
+
+Runs ``python -X importtime`` on a module in a fresh interpreter and prints
+the total import time and the modules with the largest cumulative cost, to
+check which heavy dependencies are still imported before the app can serve.
+
+Usage:
+    uv run python -m app.scripts.profile_imports
+    uv run python -m app.scripts.profile_imports --module app.science_bot.agent.graph --top 40
+"""
+
+import argparse
+import subprocess
+import sys
+
+
+def profile(module: str) -> list[tuple[str, int, int]]:
+    """Import ``module`` in a subprocess and parse its import timings.
+
+    Returns:
+        ``(module, self_us, cumulative_us)`` for every imported module
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    timings: list[tuple[str, int, int]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    timings = profile(args.module)
+    total = next(cumulative for name, _, cumulative in timings if name == args.module)
+    print(f"import {args.module}: {total / 1000:.0f} ms ({len(timings)} modules)\n")
+
+    print(f"{'cumulative ms':>14}{'self ms':>9}  module")
+    for name, self_us, cumulative_us in sorted(
+        timings, key=lambda timing: timing[2], reverse=True
+    )[: args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>9.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
+import asyncio
 import re
+from typing import Any
 
 import httpx
+import logfire
 
+from app.core.circuit_breaker import CircuitOpenError, evolution_breaker
 from app.core.config import settings
 from app.models.webhook import (
     MessageData,
@@ -20,6 +24,25 @@ class EvolutionAPIService:
     def __init__(self) -> None:
         self.base_url: str = settings.EVOLUTION_API_URL
         self.api_key: str = settings.EVOLUTION_API_KEY
+        self._client: httpx.AsyncClient | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared HTTP client, so requests reuse pooled (already open) connections."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient()
+        return self._client
+
+    async def warm_up(self) -> None:
+        """Open a connection to Evolution API ahead of the first message."""
+        response = await self._get_client().get(
+            url=self.base_url, headers=self._get_headers()
+        )
+        logfire.info("Evolution API reachable", status_code=response.status_code)
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
 
     def _format_phone_number(self, phone_number: str) -> str:
         """Format phone number for WhatsApp (remove non-digits)."""
@@ -32,6 +55,16 @@ class EvolutionAPIService:
             "Content-Type": "application/json",
         }
 
+    async def _post(self, url: str, payload: dict[str, Any]) -> httpx.Response:
+        """POST through Evolution's circuit (server errors count as failures)."""
+        async with evolution_breaker.guard() as call:
+            response = await self._get_client().post(
+                url=url, json=payload, headers=self._get_headers()
+            )
+            if response.is_server_error:
+                call.fail()
+        return response
+
     async def send_message(
         self, phone_number: str, message: str, instance_name: str
     ) -> SendMessageResponse:
@@ -42,19 +75,29 @@ class EvolutionAPIService:
             "text": message,
         }
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response: httpx.Response = await client.post(
-                    url=url, json=payload, headers=self._get_headers()
-                )
-                response.raise_for_status()
+        try:
+            response: httpx.Response = await self._post(url=url, payload=payload)
+            response.raise_for_status()
 
-                return SendMessageResponse(
-                    error=False, message="Message sent successfully"
-                )
+            return SendMessageResponse(error=False, message="Message sent successfully")
 
-            except httpx.HTTPError as e:
-                return SendMessageResponse(error=True, message=str(object=e))
+        except CircuitOpenError as e:
+            return SendMessageResponse(
+                error=True, message=str(e), retryable=True, retry_after=e.retry_after
+            )
+
+        except httpx.HTTPStatusError as e:
+            status_code = e.response.status_code
+            return SendMessageResponse(
+                error=True,
+                message=str(object=e),
+                retryable=status_code == 429 or status_code >= 500,
+            )
+
+        except httpx.HTTPError as e:
+            return SendMessageResponse(
+                error=True, message=str(object=e), retryable=True
+            )
 
     async def send_presence(
         self,
@@ -84,19 +127,47 @@ class EvolutionAPIService:
             "delay": delay,
         }
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response: httpx.Response = await client.post(
-                    url=url, json=payload, headers=self._get_headers()
-                )
-                response.raise_for_status()
+        try:
+            response: httpx.Response = await self._post(url=url, payload=payload)
+            response.raise_for_status()
+
+            return PresenceResponse(error=False, message="Presence sent successfully")
 
-                return PresenceResponse(
-                    error=False, message="Presence sent successfully"
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            return PresenceResponse(error=True, message=str(object=e))
+
+    async def keep_presence(
+        self,
+        phone_number: str,
+        instance_name: str,
+        state: str = "composing",
+        interval: float = settings.PRESENCE_KEEPALIVE_INTERVAL,
+    ) -> None:
+        """Re-send a presence status every ``interval`` seconds until cancelled.
+
+        Args:
+            phone_number: Phone number to send presence to
+            instance_name: Evolution API instance name
+            state: Presence state - 'composing' (typing), 'recording', etc.
+            interval: Seconds between presence updates
+        """
+        loop = asyncio.get_running_loop()
+        next_send = loop.time()
+
+        while True:
+            with logfire.span("send_typing_presence"):
+                response = await self.send_presence(
+                    phone_number=phone_number,
+                    instance_name=instance_name,
+                    state=state,
+                    delay=int(interval * 1000),
                 )
+                if response.error:
+                    logfire.warn("Presence update failed", error=response.message)
 
-            except httpx.HTTPError as e:
-                return PresenceResponse(error=True, message=str(object=e))
+            # Keep a steady cadence even if Evolution holds the request open
+            next_send += interval
+            await asyncio.sleep(max(0.0, next_send - loop.time()))
 
     async def mark_message_as_read(
         self, phone_number: str, instance_name: str, message_id: str
@@ -126,19 +197,14 @@ class EvolutionAPIService:
             ]
         }
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response: httpx.Response = await client.post(
-                    url=url, json=payload, headers=self._get_headers()
-                )
-                response.raise_for_status()
+        try:
+            response: httpx.Response = await self._post(url=url, payload=payload)
+            response.raise_for_status()
 
-                return ReadMessageResponse(
-                    error=False, message="Message marked as read"
-                )
+            return ReadMessageResponse(error=False, message="Message marked as read")
 
-            except httpx.HTTPError as e:
-                return ReadMessageResponse(error=True, message=str(object=e))
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            return ReadMessageResponse(error=True, message=str(object=e))
 
     def parse_webhook_message(
         self, webhook_payload: WebhookPayload
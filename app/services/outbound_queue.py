@@ -0,0 +1,286 @@
+"""Outbound delivery of bot replies through Evolution API.
+
+Replies are queued per Evolution instance and delivered in the background:
+
+- messages to the same recipient are sent strictly in order,
+- each instance sends to at most ``OUTBOUND_MAX_CONCURRENCY`` recipients at once,
+- transient failures (network errors, 429, 5xx) are retried with exponential
+  backoff and jitter, waiting for Evolution's circuit breaker to half-open,
+- long answers are split at WhatsApp-friendly boundaries (paragraphs, lines,
+  sentences, words) before sending.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import logfire
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.models.webhook import SendMessageResponse
+from app.services.evolution_service import EvolutionAPIService, evolution_service
+
+OUTBOUND_MESSAGES = registry.counter(
+    "sciencebot_outbound_messages_total",
+    "Outbound replies by final result (delivered or failed)",
+    labels=("result",),
+)
+OUTBOUND_CHUNKS = registry.counter(
+    "sciencebot_outbound_chunks_total", "WhatsApp messages sent for replies"
+)
+OUTBOUND_RETRIES = registry.counter(
+    "sciencebot_outbound_retries_total", "Retried Evolution send attempts"
+)
+OUTBOUND_DELIVERY_SECONDS = registry.histogram(
+    "sciencebot_outbound_delivery_seconds",
+    "Time from enqueueing a reply to its full delivery",
+)
+OUTBOUND_PENDING = registry.gauge(
+    "sciencebot_outbound_pending",
+    "Replies waiting to be delivered per instance",
+    labels=("instance",),
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def split_message(text: str, max_chars: int) -> list[str]:
+    """Split a long message into chunks of at most ``max_chars`` characters.
+
+    Splits on the coarsest boundary that fits: paragraphs, then lines, then
+    sentences, then words, and only cuts inside a word as a last resort.
+
+    Args:
+        text: Message to split
+        max_chars: Maximum characters per chunk
+
+    Returns:
+        List of non-empty chunks in order
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    for separator in ("\n\n", "\n", None, " "):
+        parts = (
+            _SENTENCE_END.split(text) if separator is None else text.split(separator)
+        )
+        if len(parts) > 1:
+            joiner = " " if separator is None else separator
+            return _pack(parts, joiner, max_chars)
+
+    return [text[i : i + max_chars] for i in range(0, len(text), max_chars)]
+
+
+def _pack(parts: list[str], joiner: str, max_chars: int) -> list[str]:
+    """Greedily join parts into chunks, splitting further the ones too long."""
+    chunks: list[str] = []
+    current = ""
+
+    for part in parts:
+        candidate = f"{current}{joiner}{part}" if current else part
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+
+        if current:
+            chunks.append(current.strip())
+        if len(part) <= max_chars:
+            current = part
+        else:
+            *complete, current = split_message(part, max_chars) or [""]
+            chunks.extend(complete)
+
+    if current.strip():
+        chunks.append(current.strip())
+    return [chunk for chunk in chunks if chunk]
+
+
+@dataclass
+class OutboundMessage:
+    """Reply waiting to be delivered."""
+
+    instance_name: str
+    phone_number: str
+    text: str
+    future: asyncio.Future[bool]
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class _InstanceQueue:
+    """Pending replies of one Evolution instance, grouped by recipient."""
+
+    def __init__(self, max_concurrency: int) -> None:
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.recipients: dict[str, deque[OutboundMessage]] = {}
+        self.workers: dict[str, asyncio.Task[None]] = {}
+
+    @property
+    def pending(self) -> int:
+        return sum(len(messages) for messages in self.recipients.values())
+
+
+class OutboundQueue:
+    """Ordered, retried and rate-bounded delivery of replies per instance."""
+
+    def __init__(
+        self,
+        evolution: EvolutionAPIService,
+        max_concurrency: int,
+        max_retries: int,
+        retry_base_delay: float,
+        retry_max_delay: float,
+        max_message_chars: int,
+    ) -> None:
+        self.evolution = evolution
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.max_message_chars = max_message_chars
+        self._instances: dict[str, _InstanceQueue] = {}
+
+    def enqueue(
+        self, phone_number: str, text: str, instance_name: str
+    ) -> asyncio.Future[bool]:
+        """Queue a reply for delivery.
+
+        Args:
+            phone_number: Recipient phone number
+            text: Reply text (split if too long)
+            instance_name: Evolution API instance name
+
+        Returns:
+            Future resolved with True once delivered, False if it failed
+        """
+        queue = self._instances.setdefault(
+            instance_name, _InstanceQueue(self.max_concurrency)
+        )
+        message = OutboundMessage(
+            instance_name=instance_name,
+            phone_number=phone_number,
+            text=text,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        queue.recipients.setdefault(phone_number, deque()).append(message)
+
+        # One worker per recipient keeps their replies in order
+        if phone_number not in queue.workers:
+            queue.workers[phone_number] = asyncio.create_task(
+                self._recipient_worker(queue, phone_number)
+            )
+
+        return message.future
+
+    async def drain(self, timeout: float) -> None:
+        """Wait up to ``timeout`` seconds for pending replies to be delivered."""
+        workers = [
+            worker
+            for queue in self._instances.values()
+            for worker in queue.workers.values()
+        ]
+        if workers:
+            await asyncio.wait(workers, timeout=timeout)
+
+    def collect_metrics(self) -> None:
+        for instance_name, queue in self._instances.items():
+            OUTBOUND_PENDING.set(queue.pending, instance=instance_name)
+
+    async def _recipient_worker(self, queue: _InstanceQueue, phone_number: str) -> None:
+        messages = queue.recipients[phone_number]
+        try:
+            while messages:
+                message = messages[0]
+                async with queue.semaphore:
+                    try:
+                        delivered = await self._deliver(message)
+                    except Exception as e:
+                        logfire.error(
+                            "Reply delivery crashed",
+                            phone_number=phone_number,
+                            error=str(e),
+                            exc_info=e,
+                        )
+                        delivered = False
+                messages.popleft()
+
+                OUTBOUND_MESSAGES.inc(result="delivered" if delivered else "failed")
+                if delivered:
+                    OUTBOUND_DELIVERY_SECONDS.observe(
+                        time.monotonic() - message.enqueued_at
+                    )
+                if not message.future.done():
+                    message.future.set_result(delivered)
+        finally:
+            del queue.recipients[phone_number]
+            del queue.workers[phone_number]
+
+    async def _deliver(self, message: OutboundMessage) -> bool:
+        chunks = split_message(message.text, self.max_message_chars)
+
+        for index, chunk in enumerate(chunks):
+            response = await self._send_with_retries(message, chunk)
+            if response.error:
+                logfire.error(
+                    "Reply delivery failed",
+                    phone_number=message.phone_number,
+                    instance=message.instance_name,
+                    chunk=index + 1,
+                    chunks=len(chunks),
+                    error=response.message,
+                )
+                return False
+            OUTBOUND_CHUNKS.inc()
+
+        return True
+
+    async def _send_with_retries(
+        self, message: OutboundMessage, text: str
+    ) -> SendMessageResponse:
+        attempt = 0
+        while True:
+            with logfire.span("send_response_message"):
+                response = await self.evolution.send_message(
+                    phone_number=message.phone_number,
+                    message=text,
+                    instance_name=message.instance_name,
+                )
+
+            if not response.error or not response.retryable:
+                return response
+            if attempt >= self.max_retries:
+                return response
+
+            # Exponential backoff with full jitter
+            delay = min(self.retry_max_delay, self.retry_base_delay * 2**attempt)
+            attempt += 1
+            OUTBOUND_RETRIES.inc()
+            logfire.warn(
+                "Retrying reply delivery",
+                phone_number=message.phone_number,
+                attempt=attempt,
+                error=response.message,
+            )
+            # While Evolution's circuit is open, wait until it lets a probe through
+            await asyncio.sleep(
+                max(random.uniform(0, delay), response.retry_after or 0.0)
+            )
+
+
+# Global outbound queue instance
+outbound_queue = OutboundQueue(
+    evolution=evolution_service,
+    max_concurrency=settings.OUTBOUND_MAX_CONCURRENCY,
+    max_retries=settings.OUTBOUND_MAX_RETRIES,
+    retry_base_delay=settings.OUTBOUND_RETRY_BASE_DELAY,
+    retry_max_delay=settings.OUTBOUND_RETRY_MAX_DELAY,
+    max_message_chars=settings.OUTBOUND_MAX_MESSAGE_CHARS,
+)
+
+registry.register_collector(outbound_queue.collect_metrics)
@@ -0,0 +1,147 @@
+"""Startup warm-up run before the app reports ready.
+
+The app starts serving as soon as the light modules are imported; the agent
+stack (langchain, langgraph, openai) is imported and the graph compiled in a
+worker thread, then Mongo, OpenAI and Evolution API connections are opened and
+the documents catalog is loaded concurrently. ``/ready`` answers 503 until the
+agent graph is available, so the first routed requests don't pay those costs.
+
+Connection warm-ups are best effort: a failure is reported by ``/ready`` and
+logged, but the app still becomes ready and retries lazily on first use.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import logfire
+from fastapi import FastAPI
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.evolution_service import evolution_service
+
+READY = registry.gauge("sciencebot_ready", "Whether the app finished warming up")
+READY.set(0)
+WARMUP_STEP_SECONDS = registry.gauge(
+    "sciencebot_warmup_step_seconds",
+    "Duration of each startup warm-up step",
+    labels=("step",),
+)
+
+
+@dataclass
+class WarmupState:
+    """Progress of the startup warm-up."""
+
+    ready: bool = False
+    failed: bool = False
+    started_at: float = field(default_factory=time.monotonic)
+    duration_seconds: float | None = None
+    steps: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def report(self) -> dict[str, Any]:
+        if self.ready:
+            status = "ok"
+        elif self.failed:
+            status = "failed"
+        else:
+            status = "warming_up"
+        return {
+            "status": status,
+            "warmup_seconds": self.duration_seconds,
+            "steps": self.steps,
+        }
+
+
+# Global warm-up state read by /ready
+warmup_state = WarmupState()
+
+
+async def _run_step(name: str, step: Callable[[], Awaitable[Any]]) -> bool:
+    """Run one warm-up step with a timeout, recording its outcome."""
+    start = time.perf_counter()
+    with logfire.span("warmup_step", step=name):
+        try:
+            async with asyncio.timeout(settings.WARMUP_STEP_TIMEOUT):
+                await step()
+            error = None
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            logfire.warn("Warm-up step failed", step=name, error=error)
+
+    seconds = time.perf_counter() - start
+    WARMUP_STEP_SECONDS.set(seconds, step=name)
+    warmup_state.steps[name] = {
+        "ok": error is None,
+        "seconds": round(seconds, 3),
+        **({"error": error} if error else {}),
+    }
+    return error is None
+
+
+def _load_agent() -> Any:
+    """Import the agent stack and compile the graph (runs in a thread)."""
+    import phonenumbers.timezone  # noqa: F401 (deferred by the system prompt)
+
+    from app.science_bot.agent.graph import get_graph
+    from app.science_bot.core import service  # noqa: F401 (deferred by the webhook)
+
+    return get_graph()
+
+
+async def warm_up(app: FastAPI) -> None:
+    """Prepare the app for traffic and mark it ready."""
+    with logfire.span("warmup"):
+
+        async def load_agent() -> None:
+            app.state.science_bot_graph = await asyncio.to_thread(_load_agent)
+
+        # The graph is required; nothing else can run without its imports
+        if not await _run_step("agent_graph", load_agent):
+            warmup_state.failed = True
+            return
+
+        if settings.WARMUP_ENABLED:
+            from app.core.llm import warm_up_chat_model
+            from app.core.mongo_db import get_mongo_service
+
+            async def warm_up_mongo() -> None:
+                mongo_service = get_mongo_service()
+                await mongo_service.connect_db()
+                count = await mongo_service.load_catalog()
+                logfire.info("Documents catalog loaded", document_count=count)
+
+            async def warm_up_embeddings() -> None:
+                # Also loads the tokenizer used to split long inputs
+                await get_mongo_service().query_to_embedding("warm-up")
+
+            await asyncio.gather(
+                _run_step("mongo", warm_up_mongo),
+                _run_step("openai_chat", warm_up_chat_model),
+                _run_step("openai_embeddings", warm_up_embeddings),
+                _run_step("evolution", evolution_service.warm_up),
+            )
+
+        warmup_state.duration_seconds = round(
+            time.monotonic() - warmup_state.started_at, 3
+        )
+        warmup_state.ready = True
+        READY.set(1)
+        logfire.info("App ready", warmup_seconds=warmup_state.duration_seconds)
+
+
+async def shutdown() -> None:
+    """Close the connections opened by the app."""
+    await evolution_service.aclose()
+
+    # The shared service may be created by warm-up or on first use (searches,
+    # Mongo-backed stores), and is only closed if it was actually created
+    mongo_db = sys.modules.get("app.core.mongo_db")
+    if mongo_db is not None and mongo_db.get_mongo_service.cache_info().currsize:
+        await mongo_db.get_mongo_service().close_connection()
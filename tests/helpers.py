@@ -0,0 +1,30 @@
+"""Shared setup of the test cases."""
+
+import unittest
+from typing import Any
+from unittest import mock
+
+from app.core.circuit_breaker import CircuitBreaker
+
+
+def new_breaker(name: str) -> CircuitBreaker:
+    """Closed breaker that opens after two calls with half of them failed."""
+    return CircuitBreaker(
+        name=name,
+        enabled=True,
+        window_size=10,
+        min_calls=2,
+        failure_rate=0.5,
+        slow_call_seconds=60,
+        reset_timeout=60,
+        half_open_calls=1,
+    )
+
+
+class PatchingTestCase(unittest.IsolatedAsyncioTestCase):
+    """Async test case that replaces module globals for the test's duration."""
+
+    def patch(self, target: Any, **attributes: Any) -> None:
+        """Replace attributes of ``target``, restored when the test ends."""
+        for attribute, value in attributes.items():
+            self.enterContext(mock.patch.object(target, attribute, value))
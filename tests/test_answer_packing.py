@@ -0,0 +1,70 @@
+"""Pages are packed within each source's budget, even when sources share one."""
+
+import unittest
+from typing import Any
+from unittest import mock
+
+from langchain_core.messages import AIMessage
+
+from app.core.config import settings
+from app.core.mongo_db import PageMatch
+from app.science_bot.agent.tools.search_documents import service
+from app.science_bot.agent.tools.search_documents.service import (
+    RetrievedSource,
+    SearchDocumentsService,
+)
+
+
+def _page(page_id: str, score: float, summary: str | None = None) -> PageMatch:
+    return PageMatch(
+        id=page_id,
+        file_name="doc.pdf",
+        page=int(page_id[-1]),
+        text=f"full text of {page_id}",
+        score=score,
+        token_count=40,
+        summary=summary,
+        summary_token_count=5 if summary else None,
+    )
+
+
+class SharedPagePackingTest(unittest.IsolatedAsyncioTestCase):
+    async def test_each_source_keeps_its_own_form(self) -> None:
+        prompts: list[str] = []
+
+        async def fake_cascade(input: Any, **_kwargs: Any) -> AIMessage:
+            prompts.append(str(input[-1].content))
+            return AIMessage(content="answer")
+
+        shared = _page("shared-1", 0.9, summary="summary of shared-1")
+        sources = [
+            RetrievedSource(
+                school="Informática", document_name="A", pages=[shared], avg_score=0.9
+            ),
+            RetrievedSource(
+                school="Electrónica",
+                document_name="B",
+                pages=[_page("own-2", 0.95), shared.model_copy(update={"score": 0.5})],
+                avg_score=0.7,
+            ),
+        ]
+
+        with (
+            mock.patch.object(service, "invoke_cascade", fake_cascade),
+            mock.patch.object(
+                service,
+                "settings",
+                settings.model_copy(update={"ANSWER_CONTEXT_TOKEN_BUDGET": 100}),
+            ),
+        ):
+            search = SearchDocumentsService(mongo_service=mock.Mock())
+            await search.generate_answer(query="¿Diferencias?", sources=sources)
+
+        first, second = prompts[0].split("SCHOOL: Electrónica")
+        self.assertIn("full text of shared-1", first)
+        self.assertIn("summary of shared-1", second)
+        self.assertNotIn("full text of shared-1", second)
+
+
+if __name__ == "__main__":
+    unittest.main()
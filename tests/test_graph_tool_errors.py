@@ -0,0 +1,87 @@
+"""Tool failures in the graph: fallbacks end the run, other errors go to the model."""
+
+import unittest
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.deadline import DeadlineExceeded
+from app.science_bot.agent import graph
+from app.science_bot.agent.schemas import InputState
+from app.science_bot.agent.tools.search_documents import tool
+from tests.helpers import PatchingTestCase
+
+SEARCH_CALL = {
+    "name": "search_documents",
+    "args": {"query": "costo de matrícula", "schools": ["Ingeniería Informática"]},
+    "id": "call_1",
+    "type": "tool_call",
+}
+
+
+class _FailingSearchService:
+    """Stands in for ``SearchDocumentsService``, failing every search."""
+
+    error: Exception
+
+    def __init__(self, deadline: Any = None) -> None:
+        pass
+
+    async def __aenter__(self) -> "_FailingSearchService":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        pass
+
+    async def search_and_answer_schools(self, query: str, schools: list[str]) -> Any:
+        raise self.error
+
+
+class GraphToolErrorTest(PatchingTestCase):
+    def setUp(self) -> None:
+        self.chat_inputs: list[list[BaseMessage]] = []
+        self.tool_call = SEARCH_CALL
+
+        async def fake_chat(state: InputState) -> dict[str, list[BaseMessage]]:
+            self.chat_inputs.append(list(state.messages))
+            if len(self.chat_inputs) == 1:
+                return {
+                    "messages": [AIMessage(content="", tool_calls=[self.tool_call])]
+                }
+            return {"messages": [AIMessage(content="final answer")]}
+
+        self.patch(graph, chat=fake_chat)
+        self.patch(tool, SearchDocumentsService=_FailingSearchService)
+
+    async def run_graph(self) -> dict[str, Any]:
+        compiled = graph.create_graph_builder(direct_return=True).compile()
+        return await compiled.ainvoke(  # type: ignore[no-any-return]
+            {"messages": [HumanMessage(content="¿Cuánto cuesta la matrícula?")]},
+            config={"configurable": {"user_id": "51999999999"}},
+        )
+
+    async def test_open_circuit_ends_the_run(self) -> None:
+        _FailingSearchService.error = CircuitOpenError("openai", retry_after=30)
+        with self.assertRaises(CircuitOpenError):
+            await self.run_graph()
+        self.assertEqual(len(self.chat_inputs), 1)
+
+    async def test_exceeded_deadline_ends_the_run(self) -> None:
+        _FailingSearchService.error = DeadlineExceeded("answer", remaining=0.5)
+        with self.assertRaises(DeadlineExceeded):
+            await self.run_graph()
+        self.assertEqual(len(self.chat_inputs), 1)
+
+    async def test_invalid_tool_call_goes_back_to_the_model(self) -> None:
+        self.tool_call = {**SEARCH_CALL, "args": {"query": "costo de matrícula"}}
+        result = await self.run_graph()
+
+        self.assertEqual(result["messages"][-1].content, "final answer")
+        tool_result = self.chat_inputs[-1][-1]
+        assert isinstance(tool_result, ToolMessage)
+        self.assertEqual(tool_result.status, "error")
+
+
+if __name__ == "__main__":
+    unittest.main()
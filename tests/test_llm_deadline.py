@@ -0,0 +1,62 @@
+"""The message deadline cuts chat model calls without tripping OpenAI's circuit."""
+
+import asyncio
+import unittest
+from typing import Any
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from app.core import llm
+from app.core.circuit_breaker import CircuitState
+from app.core.config import settings
+from app.core.deadline import Deadline, DeadlineExceeded
+from tests.helpers import PatchingTestCase, new_breaker
+
+
+async def _slow_model(_: Any) -> AIMessage:
+    await asyncio.sleep(1)
+    return AIMessage(content="late")
+
+
+async def _failing_model(_: Any) -> AIMessage:
+    raise RuntimeError("OpenAI is down")
+
+
+class DeadlineBreakerTest(PatchingTestCase):
+    def setUp(self) -> None:
+        self.breaker = new_breaker("openai")
+        self.patch(
+            llm,
+            openai_breaker=self.breaker,
+            settings=settings.model_copy(update={"DEADLINE_MIN_STAGE_SECONDS": 0.0}),
+        )
+
+    async def invoke(self, model: Any, deadline: Deadline | None = None) -> None:
+        await llm.invoke_chat_model(
+            stage=llm.LLMStage.ANSWER,
+            runnable=RunnableLambda(model),
+            input={},
+            model="gpt-4o-mini",
+            estimated_tokens=10,
+            deadline=deadline,
+        )
+
+    async def test_deadline_expiries_do_not_move_the_breaker(self) -> None:
+        for _ in range(5):
+            with self.assertRaises(DeadlineExceeded):
+                await self.invoke(_slow_model, deadline=Deadline.after(0.05))
+
+        self.assertIs(self.breaker.state, CircuitState.CLOSED)
+        self.assertEqual(len(self.breaker._outcomes), 0)
+
+    async def test_openai_errors_still_open_the_breaker(self) -> None:
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                await self.invoke(_failing_model, deadline=Deadline.after(5))
+
+        self.assertIs(self.breaker.state, CircuitState.OPEN)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""Hedged chat model calls: own lease, per-model delays and cascade stages."""
+
+import asyncio
+import unittest
+from typing import Any
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from pydantic import ValidationError
+
+from app.core import llm
+from app.core.config import ModelRateLimit, Settings, settings
+from app.core.hedging import Hedger
+from app.core.rate_limiter import OpenAIRateLimiter
+from tests.helpers import PatchingTestCase
+
+
+class HedgedLeaseTest(PatchingTestCase):
+    def use_limiter(self, max_in_flight: int) -> None:
+        self.limiter = OpenAIRateLimiter(
+            max_in_flight=max_in_flight,
+            default_limit=ModelRateLimit(
+                requests_per_minute=1000, tokens_per_minute=100_000
+            ),
+        )
+        self.hedger = Hedger(percentile=95, min_delay=0.02, min_samples=2)
+        for _ in range(5):
+            self.hedger.latencies.record(
+                Hedger.latency_key(llm.LLMStage.ANSWER, "gpt-4o-mini"), 0.02
+            )
+
+        self.patch(
+            llm,
+            openai_limiter=self.limiter,
+            hedger=self.hedger,
+            settings=settings.model_copy(
+                update={"LLM_HEDGING_ENABLED": True, "LLM_HEDGED_STAGES": ["answer"]}
+            ),
+        )
+
+    async def invoke(self) -> tuple[AIMessage, int]:
+        calls = 0
+        peak_in_flight = 0
+
+        async def model(_: Any) -> AIMessage:
+            nonlocal calls, peak_in_flight
+            calls += 1
+            peak_in_flight = max(peak_in_flight, self.limiter.in_flight)
+            # Only the first attempt is slow enough to be hedged
+            await asyncio.sleep(0.2 if calls == 1 else 0.01)
+            return AIMessage(content=f"attempt {calls}")
+
+        response = await llm.invoke_chat_model(
+            stage=llm.LLMStage.ANSWER,
+            runnable=RunnableLambda(model),
+            input={},
+            model="gpt-4o-mini",
+            estimated_tokens=10,
+        )
+        assert isinstance(response, AIMessage)
+        return response, peak_in_flight
+
+    async def test_hedge_takes_its_own_lease(self) -> None:
+        self.use_limiter(max_in_flight=2)
+        response, peak_in_flight = await self.invoke()
+
+        self.assertEqual(response.content, "attempt 2")
+        self.assertEqual(peak_in_flight, 2)
+        self.assertEqual(self.limiter.stats.acquired, 2)
+        self.assertEqual(self.limiter.in_flight, 0)
+
+    async def test_hedge_is_skipped_without_spare_capacity(self) -> None:
+        self.use_limiter(max_in_flight=1)
+        response, peak_in_flight = await self.invoke()
+
+        self.assertEqual(response.content, "attempt 1")
+        self.assertEqual(peak_in_flight, 1)
+        stats = self.hedger.stats[llm.LLMStage.ANSWER]
+        self.assertEqual((stats.hedges_fired, stats.hedges_skipped), (0, 1))
+
+
+class HedgeDelayTest(unittest.TestCase):
+    def test_latencies_are_kept_per_model(self) -> None:
+        hedger = Hedger(percentile=95, min_delay=0.1, min_samples=2)
+        for _ in range(5):
+            hedger.latencies.record(Hedger.latency_key("answer", "cheap"), 0.2)
+            hedger.latencies.record(Hedger.latency_key("answer", "expensive"), 3.0)
+
+        self.assertAlmostEqual(hedger.hedge_delay("answer", "cheap") or 0, 0.2)
+        self.assertAlmostEqual(hedger.hedge_delay("answer", "expensive") or 0, 3.0)
+
+
+class CascadeStagesTest(unittest.TestCase):
+    def test_only_cascading_stages_are_accepted(self) -> None:
+        with self.assertRaises(ValidationError):
+            Settings.model_validate(
+                {**settings.model_dump(), "LLM_CASCADE_STAGES": ["agent"]}
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
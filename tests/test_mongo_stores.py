@@ -0,0 +1,64 @@
+"""Mongo-backed stores share the app's MongoDB connection and circuit."""
+
+import unittest
+from typing import Any
+
+from pymongo.errors import DuplicateKeyError
+
+from app.core import dedup_store, mongo_db
+from app.core.circuit_breaker import CircuitState
+from app.core.config import settings
+from tests.helpers import PatchingTestCase, new_breaker
+
+
+class _FakeCollection:
+    def __init__(self) -> None:
+        self.ids: set[str] = set()
+
+    async def insert_one(self, doc: dict[str, Any]) -> None:
+        if doc["_id"] in self.ids:
+            raise DuplicateKeyError("duplicate key")
+        self.ids.add(doc["_id"])
+
+    async def delete_one(self, query: dict[str, Any]) -> None:
+        self.ids.discard(query["_id"])
+
+
+class _FakeMongoService:
+    def __init__(self) -> None:
+        self.collection = _FakeCollection()
+        self.requested: list[tuple[str, str, float]] = []
+
+    async def get_ttl_collection(
+        self, name: str, ttl_field: str, ttl_seconds: float
+    ) -> _FakeCollection:
+        self.requested.append((name, ttl_field, ttl_seconds))
+        return self.collection
+
+
+class MongoDedupStoreTest(PatchingTestCase):
+    def setUp(self) -> None:
+        self.service = _FakeMongoService()
+        self.breaker = new_breaker("mongo")
+        self.patch(mongo_db, get_mongo_service=lambda: self.service)
+        self.patch(dedup_store, mongo_breaker=self.breaker)
+
+    async def test_duplicates_use_the_shared_service_without_failing(self) -> None:
+        store = dedup_store.MongoDedupStore(ttl_seconds=60)
+        self.assertTrue(await store.claim("instance:1"))
+        for _ in range(3):
+            self.assertFalse(await store.claim("instance:1"))
+
+        await store.release("instance:1")
+        self.assertTrue(await store.claim("instance:1"))
+
+        self.assertIs(self.breaker.state, CircuitState.CLOSED)
+        self.assertEqual(sum(self.breaker._outcomes), 0)
+        self.assertEqual(
+            set(self.service.requested),
+            {(settings.MONGO_DEDUP_COLLECTION, "created_at", 60)},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Small talk rules match normalized words and can be loaded from a file."""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from app.science_bot.core.conversation_manager import conversation_manager
+from app.science_bot.core.service import answer_small_talk
+from app.science_bot.core.small_talk import (
+    SmallTalkIntent,
+    classify_small_talk,
+    load_language_rules,
+)
+
+
+class ClassifySmallTalkTest(unittest.TestCase):
+    def test_repeated_letters_are_collapsed(self) -> None:
+        for text in ("graciass", "holaaa", "okk", "Good morning", "see you soon"):
+            with self.subTest(text=text):
+                self.assertIsNotNone(classify_small_talk(text, ["es", "en"], 6))
+
+        match = classify_small_talk("graciass", ["es"], 6)
+        assert match is not None
+        self.assertIs(match.intent, SmallTalkIntent.THANKS)
+
+    def test_only_whole_phrases_match(self) -> None:
+        for text in (
+            "hola buenas tardes",
+            "muchas gracias",
+            "hasta mañana!",
+            "see you",
+        ):
+            with self.subTest(text=text):
+                self.assertIsNotNone(classify_small_talk(text, ["es", "en"], 6))
+
+        for text in ("mañana?", "ya", "mil", "muchas", "hasta", "it", "so", "que tal"):
+            with self.subTest(text=text):
+                self.assertIsNone(classify_small_talk(text, ["es", "en"], 6))
+
+    def test_questions_go_to_the_agent(self) -> None:
+        self.assertIsNone(classify_small_talk("hola, ¿cuándo es el examen?", ["es"], 6))
+
+
+class LoadLanguageRulesTest(unittest.TestCase):
+    def write_rules(self, rules: dict[str, object]) -> str:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / "small_talk.json"
+        path.write_text(json.dumps(rules), encoding="utf-8")
+        return str(path)
+
+    def test_file_adds_languages(self) -> None:
+        path = self.write_rules(
+            {
+                "pt": {
+                    "phrases": {"greeting": ["Olá", "bom dia"], "thanks": ["obrigado"]},
+                    "replies": {
+                        "greeting": "Olá! Como posso ajudar?",
+                        "thanks": "De nada!",
+                        "emoji": "Como posso ajudar?",
+                    },
+                    "filler": ["muito"],
+                }
+            }
+        )
+        rules = load_language_rules(path)
+        self.assertEqual(set(rules), {"es", "en", "pt"})
+
+        match = classify_small_talk("olá!!", ["pt"], 6, rules_by_language=rules)
+        assert match is not None
+        self.assertEqual(match.reply, "Olá! Como posso ajudar?")
+
+    def test_missing_replies_are_rejected(self) -> None:
+        path = self.write_rules(
+            {"pt": {"phrases": {"greeting": ["oi"]}, "replies": {"greeting": "Oi"}}}
+        )
+        with self.assertRaises(ValidationError):
+            load_language_rules(path)
+
+
+class AnswerSmallTalkTest(unittest.TestCase):
+    def test_no_template_right_after_a_question_from_the_bot(self) -> None:
+        user_id = "small-talk-test"
+        conversation_manager.add_user_message(user_id=user_id, content="Hola")
+        conversation_manager.add_assistant_message(
+            user_id, content="¿De qué escuela eres?"
+        )
+        self.assertIsNone(answer_small_talk(user_id=user_id, message="gracias"))
+
+        conversation_manager.add_assistant_message(user_id, content="Listo.")
+        self.assertIsNotNone(answer_small_talk(user_id=user_id, message="gracias"))
+
+
+if __name__ == "__main__":
+    unittest.main()
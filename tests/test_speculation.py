@@ -0,0 +1,33 @@
+"""Word similarity used to decide whether a speculation can be reused."""
+
+import unittest
+
+from app.science_bot.agent.tools.search_documents.speculation import query_similarity
+
+
+class QuerySimilarityTest(unittest.TestCase):
+    def test_short_query_contained_in_broader_message_does_not_match(self) -> None:
+        similarity = query_similarity(
+            "requisitos matricula",
+            "cuales son los requisitos para matricula de traslado externo en "
+            "ingenieria",
+        )
+        self.assertLess(similarity, 0.6)
+
+    def test_rephrased_query_matches(self) -> None:
+        similarity = query_similarity(
+            "requisitos para matrícula de traslado externo ingeniería",
+            "¿Cuáles son los requisitos para matricula de traslado externo en "
+            "ingenieria?",
+        )
+        self.assertGreaterEqual(similarity, 0.6)
+
+    def test_is_symmetric(self) -> None:
+        first, second = "horario de clases", "horario de clases de verano"
+        self.assertEqual(
+            query_similarity(first, second), query_similarity(second, first)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+"""Webhook dedup fails open and lets fallback replies be retried."""
+
+import unittest
+from unittest import mock
+
+from app.core.dedup_store import MemoryDedupStore
+from app.routes import webhook
+
+
+class _BrokenDedupStore:
+    async def claim(self, key: str) -> bool:
+        raise ConnectionError("MongoDB is down")
+
+    async def release(self, key: str) -> None:
+        raise ConnectionError("MongoDB is down")
+
+
+class WebhookDedupTest(unittest.IsolatedAsyncioTestCase):
+    async def test_claim_fails_open(self) -> None:
+        with mock.patch.object(webhook, "webhook_dedup", _BrokenDedupStore()):
+            self.assertTrue(await webhook.claim_message("instance:1"))
+            await webhook.release_message("instance:1")
+
+    async def test_released_message_can_be_claimed_again(self) -> None:
+        store = MemoryDedupStore(ttl_seconds=60, max_entries=10)
+        with mock.patch.object(webhook, "webhook_dedup", store):
+            self.assertTrue(await webhook.claim_message("instance:1"))
+            self.assertFalse(await webhook.claim_message("instance:1"))
+            await webhook.release_message("instance:1")
+            self.assertTrue(await webhook.claim_message("instance:1"))
+
+
+if __name__ == "__main__":
+    unittest.main()